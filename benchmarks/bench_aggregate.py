@@ -0,0 +1,76 @@
+"""Benchmark fleet aggregation against nested loops.
+
+Sums ``pv_estimate``, ``pv_estimate10`` and ``pv_estimate90`` over a
+synthetic fleet of parsed forecast responses, then refreshes 1% of the
+sites::
+
+    python benchmarks/bench_aggregate.py --sites 2000
+"""
+import argparse
+import time
+from pysolcast.aggregate import DEFAULT_FIELDS, FleetAggregator
+from pysolcast.columnar import ColumnarSeries, np
+
+
+def make_fleet(sites: int, periods: int) -> dict:
+    """Build a series per site on a shared half-hourly horizon."""
+    period_end = np.datetime64('2018-01-01T00:30', 'us') + np.arange(periods) * np.timedelta64(30, 'm')
+    period = np.full(periods, 1800, dtype='timedelta64[s]')
+    rng = np.random.default_rng(0)
+    fleet = {}
+    for index in range(sites):
+        values = rng.random(periods) * 10
+        fleet[f'site-{index}'] = ColumnarSeries(period_end, period, {
+            'pv_estimate': values, 'pv_estimate10': values * 0.5, 'pv_estimate90': values * 1.5})
+    return fleet
+
+
+def loop_path(records: dict) -> dict:
+    """Sum record by record into a dict keyed by period_end."""
+    totals = {}
+    for site_records in records.values():
+        for record in site_records:
+            total = totals.setdefault(record['period_end'], dict.fromkeys(DEFAULT_FIELDS, 0.0))
+            for name in DEFAULT_FIELDS:
+                total[name] += record[name]
+    return totals
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=2000)
+    parser.add_argument('--periods', type=int, default=336)
+    args = parser.parse_args()
+    fleet = make_fleet(args.sites, args.periods)
+    records = {resource_id: [{'period_end': end, **{name: float(series[name][index]) for name in DEFAULT_FIELDS}}
+                             for index, end in enumerate(series.period_end.tolist())]
+               for resource_id, series in fleet.items()}
+
+    start = time.perf_counter()
+    loop_path(records)
+    loops = time.perf_counter() - start
+
+    aggregator = FleetAggregator()
+    start = time.perf_counter()
+    aggregator.update_many(fleet)
+    aggregator.result()
+    full = time.perf_counter() - start
+
+    changed = list(fleet)[:max(1, args.sites // 100)]
+    start = time.perf_counter()
+    for resource_id in changed:
+        series = fleet[resource_id]
+        aggregator.update(resource_id, ColumnarSeries(series.period_end, series.period,
+                                                      {name: values + 1 for name, values in series.fields.items()}))
+    aggregator.result()
+    incremental = time.perf_counter() - start
+
+    print(f'nested loops:          {loops * 1e3:.2f} ms')
+    print(f'aggregator, all sites: {full * 1e3:.2f} ms')
+    print(f'aggregator, 1% sites:  {incremental * 1e3:.2f} ms')
+    print(f'refresh speed-up:      {loops / incremental:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
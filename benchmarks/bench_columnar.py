@@ -0,0 +1,56 @@
+"""Benchmark columnar parsing against the dict path.
+
+Builds a synthetic 10k-record forecast response and compares
+``parse_date_time`` plus float conversion with ``ColumnarSeries``::
+
+    python benchmarks/bench_columnar.py --records 10000
+"""
+import argparse
+import copy
+import datetime
+import timeit
+from pysolcast.base import parse_date_time
+from pysolcast.columnar import ColumnarSeries
+
+
+def make_response(count: int) -> dict:
+    """Build a forecast response with count records."""
+    start = datetime.datetime(2018, 1, 1)
+    return {'forecasts': [{
+        'pv_estimate': '9.5',
+        'pv_estimate10': '6',
+        'pv_estimate90': '13.8',
+        'period_end': (start + datetime.timedelta(minutes=5 * index)).strftime('%Y-%m-%dT%H:%M:%S.0000000Z'),
+        'period': 'PT5M',
+    } for index in range(count)]}
+
+
+def dict_path(response: dict):
+    """Parse dates and convert numbers record by record."""
+    parsed = parse_date_time(copy.deepcopy(response), 'forecasts')
+    for item in parsed['forecasts']:
+        for key in ('pv_estimate', 'pv_estimate10', 'pv_estimate90'):
+            item[key] = float(item[key])
+    return parsed
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    response = make_response(args.records)
+
+    copying = min(timeit.repeat(lambda: copy.deepcopy(response), number=1, repeat=args.repeat))
+    dicts = min(timeit.repeat(lambda: dict_path(response), number=1, repeat=args.repeat)) - copying
+    columns = min(timeit.repeat(lambda: ColumnarSeries.from_response(response, 'forecasts'),
+                                number=1, repeat=args.repeat))
+
+    print(f'dict path: {dicts * 1e3:.2f} ms')
+    print(f'columnar:  {columns * 1e3:.2f} ms')
+    print(f'speed-up:  {dicts / columns:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
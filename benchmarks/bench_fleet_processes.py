@@ -0,0 +1,83 @@
+"""Benchmark fleet fetches on threads against worker processes.
+
+Runs against a local stub server returning a week of half-hourly
+forecasts, so decoding and parsing dominate::
+
+    python benchmarks/bench_fleet_processes.py --sites 400 --processes 1 2 4
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pysolcast.base import PySolcast
+from pysolcast.columnar import ColumnarSeries
+from pysolcast.fleet import fetch_fleet, fetch_fleet_processes
+from pysolcast.session import create_session
+
+BODY = json.dumps({'forecasts': [
+    {'pv_estimate': 9.5 + index % 7, 'pv_estimate10': 8.5, 'pv_estimate90': 10.5,
+     'period_end': f'2018-01-{1 + index // 48:02d}T{index % 48 // 2:02d}:{index % 2 * 30:02d}:00.0000000Z',
+     'period': 'PT30M'} for index in range(336)]}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler returning a fixed forecast body."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve the stub body."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Silence request logging."""
+
+
+def run_threads(resource_ids: list, max_workers: int) -> float:
+    """Return seconds to fetch and convert every site on threads in this process."""
+    start = time.perf_counter()
+    fleet = fetch_fleet(resource_ids, api_key='key', endpoints=('forecasts',), max_workers=max_workers,
+                        session=create_session(max_workers))
+    for by_endpoint in fleet.results.values():
+        ColumnarSeries.from_response(by_endpoint['forecasts'], 'forecasts')
+    return time.perf_counter() - start
+
+
+def run_processes(resource_ids: list, processes: int, max_workers: int) -> float:
+    """Return seconds to fetch and convert every site on worker processes."""
+    start = time.perf_counter()
+    fetch_fleet_processes(resource_ids, 'key', endpoints=('forecasts',), processes=processes,
+                          max_workers=max_workers)
+    return time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=400)
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--max-workers', type=int, default=4)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Worker processes are forked, so they inherit the stub server's URL.
+    PySolcast.base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    resource_ids = [f'site-{index}' for index in range(args.sites)]
+
+    threads = run_threads(resource_ids, args.max_workers)
+    print(f'threads:     {threads:.3f} s')
+    for processes in args.processes:
+        elapsed = run_processes(resource_ids, processes, args.max_workers)
+        print(f'processes={processes}: {elapsed:.3f} s ({threads / elapsed:.2f}x)')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
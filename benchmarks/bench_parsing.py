@@ -0,0 +1,67 @@
+"""Micro-benchmarks for timestamp and duration parsing.
+
+Compares the fast parsers in ``pysolcast.parsing`` with isodate, and times
+``parse_date_time`` on a full response::
+
+    python benchmarks/bench_parsing.py --records 10000
+"""
+import argparse
+import copy
+import datetime
+import timeit
+import isodate
+from pysolcast import parsing
+from pysolcast.base import parse_date_time
+
+TIMESTAMP = '2018-01-01T01:00:00.0000000Z'
+DURATION = 'PT30M'
+
+
+def make_response(count: int) -> dict:
+    """Build a forecast response with count records."""
+    start = datetime.datetime(2018, 1, 1)
+    return {'forecasts': [{
+        'pv_estimate': '9.5',
+        'period_end': (start + datetime.timedelta(minutes=30 * index)).strftime('%Y-%m-%dT%H:%M:%S.0000000Z'),
+        'period': DURATION,
+    } for index in range(count)]}
+
+
+def isodate_parse_date_time(dic: dict, tld_key: str) -> dict:
+    """Parse a response with isodate on every record, as before."""
+    for item in dic[tld_key]:
+        item['period_end'] = isodate.parse_datetime(item['period_end'])
+        item['period'] = isodate.parse_duration(item['period'])
+    return dic
+
+
+def best(statement, number: int, repeat: int = 5) -> float:
+    """Best time per call in seconds."""
+    return min(timeit.repeat(statement, number=number, repeat=repeat)) / number
+
+
+def report(name: str, baseline: float, fast: float, unit: float = 1e6, suffix: str = 'us'):
+    """Print one comparison."""
+    print(f'{name:<16} isodate {baseline * unit:9.2f} {suffix}   fast {fast * unit:9.2f} {suffix}   '
+          f'{baseline / fast:6.1f}x')
+
+
+def main():
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=10000)
+    args = parser.parse_args()
+
+    report('parse_datetime', best(lambda: isodate.parse_datetime(TIMESTAMP), 20000),
+           best(lambda: parsing.parse_datetime(TIMESTAMP), 20000))
+    report('parse_duration', best(lambda: isodate.parse_duration(DURATION), 20000),
+           best(lambda: parsing.parse_duration(DURATION), 20000))
+
+    response = make_response(args.records)
+    copying = best(lambda: copy.deepcopy(response), 1)
+    report('parse_date_time', best(lambda: isodate_parse_date_time(copy.deepcopy(response), 'forecasts'), 1) - copying,
+           best(lambda: parse_date_time(copy.deepcopy(response), 'forecasts'), 1) - copying, 1e3, 'ms')
+
+
+if __name__ == '__main__':
+    main()
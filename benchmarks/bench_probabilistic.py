@@ -0,0 +1,57 @@
+"""Benchmark probabilistic fleet aggregation.
+
+Builds synthetic P10, P50 and P90 forecasts and times the analytic and
+sampling methods at 1k, 10k and 100k sites, next to summing quantiles::
+
+    python benchmarks/bench_probabilistic.py --periods 48 --samples 500 --workers 4
+"""
+import argparse
+import time
+from pysolcast.columnar import np
+from pysolcast.probabilistic import Grouped, fleet_quantiles
+
+
+def make_forecasts(sites: int, periods: int) -> tuple:
+    """Build P10, P50 and P90 arrays with a daily shape and skewed spread."""
+    rng = np.random.default_rng(0)
+    shape = np.clip(np.sin(np.linspace(0, np.pi, periods)), 0, None)
+    p50 = rng.uniform(2, 10, (sites, 1)) * shape
+    return p50 * rng.uniform(0.5, 0.9, (sites, 1)), p50, p50 * rng.uniform(1.1, 1.4, (sites, 1))
+
+
+def timed(function) -> tuple:
+    """Call function, returning its result and elapsed seconds."""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--periods', type=int, default=48)
+    parser.add_argument('--samples', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print(f'{"sites":>8} {"summed":>9} {"analytic":>9} {"sample":>9}   '
+          'P90-P10 spread at peak: summed / analytic / sample')
+    for sites in args.sites:
+        p10, p50, p90 = make_forecasts(sites, args.periods)
+        correlation = Grouped(np.arange(sites) % 50, within=0.4, between=0.1)
+        summed, summed_time = timed(lambda: (p10.sum(axis=0), p90.sum(axis=0)))  # pylint: disable=cell-var-from-loop
+        analytic, analytic_time = timed(lambda: fleet_quantiles(  # pylint: disable=cell-var-from-loop
+            p10, p50, p90, correlation=correlation, workers=args.workers))
+        sampled, sample_time = timed(lambda: fleet_quantiles(  # pylint: disable=cell-var-from-loop
+            p10, p50, p90, correlation=correlation, method='sample', samples=args.samples, seed=0,
+            workers=args.workers))
+        peak = args.periods // 2
+        spreads = [summed[1][peak] - summed[0][peak], analytic[0.9][peak] - analytic[0.1][peak],
+                   sampled[0.9][peak] - sampled[0.1][peak]]
+        print(f'{sites:>8} {summed_time * 1e3:>7.1f}ms {analytic_time * 1e3:>7.1f}ms {sample_time * 1e3:>7.1f}ms   '
+              + ' / '.join(f'{spread:.0f}' for spread in spreads))
+
+
+if __name__ == '__main__':
+    main()
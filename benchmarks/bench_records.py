@@ -0,0 +1,56 @@
+"""Benchmark memory of forecast records.
+
+Compares raw dicts, typed dicts and compact records for a 7-day PT5M
+horizon across many sites, measured with tracemalloc::
+
+    python benchmarks/bench_records.py --sites 50
+"""
+import argparse
+import datetime
+import gc
+import json
+import tracemalloc
+from pysolcast.parsing import parse_response
+from pysolcast.records import to_records_response
+
+
+def make_body(count: int) -> str:
+    """Build a forecast response body with count records."""
+    start = datetime.datetime(2018, 1, 1)
+    return json.dumps({'forecasts': [{
+        'pv_estimate': '9.5',
+        'pv_estimate10': '6',
+        'pv_estimate90': '13.8',
+        'period_end': (start + datetime.timedelta(minutes=5 * index)).strftime('%Y-%m-%dT%H:%M:%S.0000000Z'),
+        'period': 'PT5M',
+    } for index in range(count)]})
+
+
+def measure(build) -> int:
+    """Bytes held by the result of build."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=50)
+    parser.add_argument('--records', type=int, default=7 * 24 * 12)
+    args = parser.parse_args()
+    body = make_body(args.records)
+    raw = measure(lambda: [json.loads(body) for _ in range(args.sites)])
+    typed = measure(lambda: [parse_response(json.loads(body), 'forecasts') for _ in range(args.sites)])
+    compact = measure(lambda: [to_records_response(json.loads(body), 'forecasts') for _ in range(args.sites)])
+    total = args.sites * args.records
+    for name, size in (('raw dicts', raw), ('typed dicts', typed), ('compact records', compact)):
+        print(f'{name:<16} {size / 2 ** 20:8.1f} MiB  {size / total:6.0f} bytes/record')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark local resampling against fetching each period.
+
+Resamples a synthetic PT5M series to PT15M, PT30M and PT60M with
+``resample`` and compares it with averaging record by record::
+
+    python benchmarks/bench_resample.py --records 100000
+"""
+import argparse
+import timeit
+from pysolcast.columnar import ColumnarSeries, np
+from pysolcast.resample import resample
+
+PERIODS = (('PT15M', 3), ('PT30M', 6), ('PT60M', 12))
+
+
+def make_series(count: int) -> ColumnarSeries:
+    """Build a PT5M series with count records."""
+    period_end = np.datetime64('2018-01-01T00:05', 'us') + np.arange(count) * np.timedelta64(5, 'm')
+    values = np.random.default_rng(0).random(count) * 10
+    return ColumnarSeries(period_end, np.full(count, 300, dtype='timedelta64[s]'),
+                          {'pv_estimate': values, 'pv_estimate10': values * 0.5, 'pv_estimate90': values * 1.5})
+
+
+def loop_path(series: ColumnarSeries):
+    """Average each period record by record."""
+    fields = {name: values.tolist() for name, values in series.fields.items()}
+    resampled = []
+    for _, size in PERIODS:
+        for values in fields.values():
+            resampled.append([sum(values[start:start + size]) / size for start in range(0, len(values), size)])
+    return resampled
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    series = make_series(args.records)
+
+    loops = min(timeit.repeat(lambda: loop_path(series), number=1, repeat=args.repeat))
+    vectorized = min(timeit.repeat(lambda: [resample(series, period) for period, _ in PERIODS],
+                                   number=1, repeat=args.repeat))
+
+    print(f'loops:      {loops * 1e3:.2f} ms')
+    print(f'vectorized: {vectorized * 1e3:.2f} ms')
+    print(f'speed-up:   {loops / vectorized:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
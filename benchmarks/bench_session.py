@@ -0,0 +1,77 @@
+"""Benchmark per-request latency with and without a pooled session.
+
+Runs against a local keep-alive stub server, so only connection set-up and
+client overhead are measured::
+
+    python benchmarks/bench_session.py --requests 500
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requests import get
+from pysolcast.base import PySolcast
+from pysolcast.rooftop import RooftopSite
+from pysolcast.session import create_session
+
+BODY = json.dumps({'forecasts': [{'pv_estimate': '9.5', 'period_end': '2018-01-01T01:00:00.0000000Z',
+                                  'period': 'PT30M'}]}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler returning a fixed forecast body."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve the stub body."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Silence request logging."""
+
+
+class UnpooledSite(RooftopSite):
+    """Rooftop site issuing a new connection per request, as before pooling."""
+
+    def _get_data(self, uri: str, params: dict = None, timeout=60) -> dict:
+        url = f'{PySolcast.base_url}{uri}'
+        return get(url, auth=(self.api_key, ''), params={'format': 'json'}, timeout=timeout).json()
+
+
+def run(site, count: int) -> float:
+    """Return mean seconds per request."""
+    site.get_forecasts()
+    start = time.perf_counter()
+    for _ in range(count):
+        site.get_forecasts()
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    PySolcast.base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    unpooled = run(UnpooledSite('key', 'site'), args.requests)
+    pooled = run(RooftopSite('key', 'site', session=create_session()), args.requests)
+    server.shutdown()
+
+    print(f'unpooled: {unpooled * 1e3:.3f} ms/request')
+    print(f'pooled:   {pooled * 1e3:.3f} ms/request')
+    print(f'speed-up: {unpooled / pooled:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
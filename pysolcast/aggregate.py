@@ -0,0 +1,407 @@
+"""Aggregate Module.
+
+Weighted, grouped sums of many sites' series, updated incrementally as
+sites refresh. Requires the ``numpy`` extra.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from pysolcast.columnar import ColumnarSeries, np, require_numpy
+from pysolcast.parsing import duration_microseconds
+from pysolcast.resample import resample
+
+FLEET = 'fleet'
+DEFAULT_FIELDS = ('pv_estimate', 'pv_estimate10', 'pv_estimate90')
+SKIP = 'skip'
+PROPAGATE = 'propagate'
+
+
+@dataclass(repr=False, eq=False)
+class FleetAggregate:
+    """Aggregated series for each label of one grouping.
+
+    ``fields`` hold ``(labels, periods)`` sums, ``counts`` the number of
+    sites with a value for each field and period, and ``members`` the
+    number of sites with each label.
+    """
+
+    labels: list
+    period_end: object
+    period: int
+    fields: dict
+    counts: dict
+    members: object
+
+    def __getitem__(self, name: str):
+        return self.fields[name]
+
+    def __repr__(self):
+        return (f'FleetAggregate(labels={self.labels}, periods={len(self.period_end)}, '
+                f'fields={list(self.fields)})')
+
+    def series(self, label=FLEET) -> ColumnarSeries:
+        """Aggregated series of one label.
+
+        :param label: Group label. The fleet total has the label ``fleet``.
+        :return: series
+        :raises KeyError: Unknown label.
+        """
+        row = self.labels.index(label) if label in self.labels else None
+        if row is None:
+            raise KeyError(label)
+        period = np.full(len(self.period_end), self.period, dtype='timedelta64[s]')
+        return ColumnarSeries(self.period_end, period,
+                              {name: values[row] for name, values in self.fields.items()})
+
+
+@dataclass
+class _Grouping:
+    """Labels of one grouping and their sums.
+
+    ``rows`` holds the label index of each site row, ``-1`` for a site without a label.
+    """
+
+    labels: dict
+    rows: object
+    sums: dict
+    counts: dict
+
+
+@dataclass
+class _Sites:
+    """Weights and values of the sites, one row each.
+
+    Rows of removed sites are not reused, so ``size`` is the next free row.
+    """
+
+    rows: dict = field(default_factory=dict)
+    size: int = 0
+    weights: object = None
+    values: dict = None
+
+
+class FleetAggregator:
+    """Weighted sums of many sites' series, overall and by group.
+
+    Each site has a weight, such as an ownership share or a scaling
+    factor, and a label for each grouping, such as region, feeder or
+    customer. Series are placed on a shared axis of ``period`` slots; a
+    series with other periods is resampled first. Sums are kept per
+    grouping and updated by the change in one site's row when it is
+    refreshed, so a refresh of a few sites costs nothing for the others.
+
+    A site with no value for a period is a missing interval. With
+    ``missing='skip'`` the sum covers the sites that have a value and is
+    ``nan`` only when none do; with ``missing='propagate'`` the sum is
+    ``nan`` unless every site in the group has a value. ``counts`` on the
+    result always tells how many sites contributed.
+    """
+
+    def __init__(self, period='PT30M', fields: tuple = DEFAULT_FIELDS, missing: str = SKIP):
+        """Create an empty aggregator.
+
+        :param period: Period of the shared axis as an ISO8601 duration or ``timedelta``.
+        :param fields: Fields summed.
+        :param missing: ``skip`` or ``propagate``.
+        :raises ValueError: Unknown missing policy.
+        """
+        require_numpy()
+        if missing not in (SKIP, PROPAGATE):
+            raise ValueError(f'Unknown missing policy: {missing}')
+        self.period = duration_microseconds(period)
+        self.fields = tuple(fields)
+        self.missing = missing
+        self._counts = Counter()
+        self._sites = _Sites(weights=np.zeros(0),
+                             values={name: np.full((0, 0), np.nan) for name in self.fields})
+        self._groupings = {}
+        self._first = 0
+        self._add_grouping(FLEET)
+
+    def __len__(self):
+        return len(self._sites.rows)
+
+    @property
+    def width(self) -> int:
+        """Slots on the shared axis."""
+        return self._sites.values[self.fields[0]].shape[1]
+
+    @property
+    def sites(self) -> list:
+        """Resource ids of the sites, in row order."""
+        return list(self._sites.rows)
+
+    @property
+    def weights(self):
+        """Weights of the sites, in row order."""
+        return self._sites.weights[list(self._sites.rows.values())]
+
+    def site_labels(self, grouping: str) -> list:
+        """Labels of the sites in a grouping, in row order, ``None`` where a site has none.
+
+        :param grouping: Grouping name.
+        :return: labels
+        :raises KeyError: Unknown grouping.
+        """
+        names = list(self._groupings[grouping].labels)
+        group_rows = self._groupings[grouping].rows
+        return [names[group_rows[row]] if group_rows[row] >= 0 else None
+                for row in self._sites.rows.values()]
+
+    def matrix(self, name: str) -> tuple:
+        """Values of one field for every site.
+
+        :param name: Field name, e.g. ``pv_estimate10``.
+        :return: period_end, values: ``(periods,)`` array of the periods any field covers and
+            ``(sites, periods)`` array in row order, ``nan`` where a site has no value.
+        """
+        rows = list(self._sites.rows.values())
+        covered = np.zeros(self.width, dtype=bool)
+        for values in self._sites.values.values():
+            covered |= ~np.isnan(values[rows]).all(axis=0)
+        values = self._sites.values[name][rows]
+        slots = np.flatnonzero(covered) + self._first
+        return ((slots + 1) * self.period).view('datetime64[us]'), values[:, covered]
+
+    @property
+    def stats(self) -> dict:
+        """Site, update and skipped update counters."""
+        return {'sites': len(self), 'periods': self.width, 'updates': self._counts['updates'],
+                'unchanged': self._counts['unchanged']}
+
+    def _label_index(self, grouping: str, label) -> int:
+        """Row of a label in a grouping's sums, adding it if new."""
+        group = self._groupings[grouping]
+        if label not in group.labels:
+            group.labels[label] = len(group.labels)
+            for name in self.fields:
+                sums, counts = group.sums[name], group.counts[name]
+                group.sums[name] = np.vstack([sums, np.zeros((1, sums.shape[1]))])
+                group.counts[name] = np.vstack(
+                    [counts, np.zeros((1, counts.shape[1]), dtype=np.int64)])
+        return group.labels[label]
+
+    def _add_grouping(self, grouping: str):
+        """Start a grouping in which every existing site is unlabelled."""
+        self._groupings[grouping] = _Grouping(
+            {}, np.full(len(self._sites.weights), -1, dtype=np.intp),
+            {name: np.zeros((0, self.width)) for name in self.fields},
+            {name: np.zeros((0, self.width), dtype=np.int64) for name in self.fields})
+
+    def add_site(self, resource_id: str, weight: float = 1.0, groups: dict = None):
+        """Add a site, or change the weight and groups of one.
+
+        :param resource_id: Site resource id.
+        :param weight: Factor the site's values are multiplied by.
+        :param groups: Label by grouping, e.g. ``{'region': 'NSW', 'feeder': 'F12'}``.
+        """
+        groups = {FLEET: FLEET, **(groups or {})}
+        for grouping in groups:
+            if grouping not in self._groupings:
+                self._add_grouping(grouping)
+        sites = self._sites
+        row = sites.rows.get(resource_id)
+        if row is None:
+            row = sites.rows[resource_id] = sites.size
+            sites.size += 1
+            if row == len(sites.weights):
+                self._grow_rows(max(16, 2 * row))
+            values = None
+        else:
+            values = {name: sites.values[name][row].copy() for name in self.fields}
+            self._apply(row, old=values)
+        sites.weights[row] = weight
+        for grouping, group in self._groupings.items():
+            group.rows[row] = (self._label_index(grouping, groups[grouping])
+                               if grouping in groups else -1)
+        if values is not None:
+            self._apply(row, new=values)
+
+    def _grow_rows(self, capacity: int):
+        """Make room for more sites, doubling so adding n sites copies O(n) rows."""
+        sites = self._sites
+        extra = capacity - len(sites.weights)
+        sites.weights = np.concatenate([sites.weights, np.zeros(extra)])
+        for group in self._groupings.values():
+            group.rows = np.concatenate([group.rows, np.full(extra, -1, dtype=np.intp)])
+        for name in self.fields:
+            sites.values[name] = np.vstack(
+                [sites.values[name], np.full((extra, self.width), np.nan)])
+
+    def remove_site(self, resource_id: str):
+        """Remove a site and its contribution.
+
+        :param resource_id: Site resource id.
+        """
+        sites = self._sites
+        row = sites.rows.pop(resource_id)
+        self._apply(row, old={name: sites.values[name][row].copy() for name in self.fields})
+        for name in self.fields:
+            sites.values[name][row] = np.nan
+        for group in self._groupings.values():
+            group.rows[row] = -1
+        sites.weights[row] = 0.0
+
+    def _apply(self, row: int, old: dict = None, new: dict = None):
+        """Add the change from a site row's old values to its new values to every grouping."""
+        labels = [(group, group.rows[row]) for group in self._groupings.values()
+                  if group.rows[row] >= 0]
+        if not labels:
+            return
+        weight = self._sites.weights[row]
+        for name in self.fields:
+            delta = np.zeros(self.width)
+            count = np.zeros(self.width, dtype=np.int64)
+            for values, sign in ((old, -1), (new, 1)):
+                if values is None:
+                    continue
+                valid = ~np.isnan(values[name])
+                delta += sign * weight * np.where(valid, values[name], 0.0)
+                count += sign * valid
+            for group, label in labels:
+                group.sums[name][label] += delta
+                group.counts[name][label] += count
+
+    def _extend(self, first: int, stop: int):
+        """Grow the shared axis to cover slots first to stop.
+
+        Growth at the end at least doubles the axis, so a horizon sliding
+        forward one slot per refresh is not copied on every refresh.
+        """
+        end = self._first + self.width
+        if not self.width:
+            start = first
+        elif first >= self._first and stop <= end:
+            return
+        else:
+            start = min(first, self._first)
+            if stop > end:
+                stop = max(stop, self._first + 2 * self.width)
+        before = self._first - start if self.width else 0
+        after = max(stop, end) - start - before - self.width
+        for name in self.fields:
+            self._sites.values[name] = np.pad(self._sites.values[name],
+                                              ((0, 0), (before, after)), constant_values=np.nan)
+            for group in self._groupings.values():
+                group.sums[name] = np.pad(group.sums[name], ((0, 0), (before, after)))
+                group.counts[name] = np.pad(group.counts[name], ((0, 0), (before, after)))
+        self._first = start
+
+    def update(self, resource_id: str, data, tld_key: str = 'forecasts') -> bool:
+        """Replace a site's series, re-aggregating only that site.
+
+        Sites not yet added are added with weight 1 and no groups.
+
+        :param resource_id: Site resource id.
+        :param data: Response data, records or a :class:`pysolcast.columnar.ColumnarSeries`.
+        :param tld_key: Key of the records when ``data`` is response data.
+        :return: changed: ``False`` when the series matched the one held.
+        """
+        return self._update(resource_id, data, tld_key, True)
+
+    def _update(self, resource_id: str, data, tld_key: str, apply: bool) -> bool:
+        """Replace a site's row, applying the change to the sums when apply is set."""
+        if isinstance(data, dict):
+            data = data[tld_key]
+        if not isinstance(data, ColumnarSeries):
+            data = ColumnarSeries.from_records(data)
+        period = np.asarray(data.period, dtype='timedelta64[us]').view(np.int64)
+        if len(period) and (period != self.period).any():
+            data = resample(data, np.timedelta64(self.period, 'us'))
+        if resource_id not in self._sites.rows:
+            self.add_site(resource_id)
+        row = self._sites.rows[resource_id]
+        period_end = np.asarray(data.period_end, dtype='datetime64[us]')
+        slots = period_end.view(np.int64) // self.period - 1
+        if len(slots):
+            self._extend(int(slots.min()), int(slots.max()) + 1)
+        columns = slots - self._first
+        new = {}
+        for name in self.fields:
+            new[name] = np.full(self.width, np.nan)
+            if name in data.fields:
+                new[name][columns] = data.fields[name]
+        values = self._sites.values
+        old = {name: values[name][row].copy() for name in self.fields}
+        if all(np.array_equal(old[name], new[name], equal_nan=True) for name in self.fields):
+            self._counts['unchanged'] += 1
+            return False
+        if apply:
+            self._apply(row, old, new)
+        for name in self.fields:
+            values[name][row] = new[name]
+        self._counts['updates'] += 1
+        return True
+
+    def update_many(self, results: dict, tld_key: str = 'forecasts') -> int:
+        """Replace the series of many sites.
+
+        When more than a quarter of the sites are updated, rows are replaced
+        first and the sums rebuilt once with :meth:`recompute`.
+
+        :param results: Response data by resource id, or :class:`pysolcast.fleet.FleetResult`
+            ``results`` keyed by resource id then endpoint.
+        :param tld_key: Key of the records, also the endpoint looked up in nested results.
+        :return: changed: Number of sites whose series changed.
+        """
+        bulk = len(results) * 4 > len(self)
+        changed = 0
+        for resource_id, data in results.items():
+            if isinstance(data, dict) and isinstance(data.get(tld_key), dict):
+                data = data[tld_key]
+            if data is not None:
+                changed += self._update(resource_id, data, tld_key, not bulk)
+        if bulk and changed:
+            self.recompute()
+        return changed
+
+    def trim(self, before):
+        """Drop slots ending before a time, such as forecasts now in the past.
+
+        :param before: Time as ``datetime64`` or ISO string.
+        """
+        count = int(np.datetime64(before, 'us').astype(np.int64) // self.period - 1 - self._first)
+        count = max(0, min(count, self.width))
+        if not count:
+            return
+        for name in self.fields:
+            self._sites.values[name] = self._sites.values[name][:, count:].copy()
+            for group in self._groupings.values():
+                group.sums[name] = group.sums[name][:, count:].copy()
+                group.counts[name] = group.counts[name][:, count:].copy()
+        self._first += count
+
+    def recompute(self):
+        """Rebuild every sum from the held site rows, clearing any rounding drift."""
+        for group in self._groupings.values():
+            onehot = np.zeros((len(group.labels), len(group.rows)))
+            members = group.rows >= 0
+            onehot[group.rows[members], np.flatnonzero(members)] = 1.0
+            for name in self.fields:
+                values = self._sites.values[name]
+                valid = ~np.isnan(values)
+                weighted = np.where(valid, values, 0.0) * self._sites.weights[:, None]
+                group.sums[name] = onehot @ weighted
+                group.counts[name] = (onehot @ valid).astype(np.int64)
+
+    def result(self, grouping: str = FLEET) -> FleetAggregate:
+        """Aggregated series of a grouping.
+
+        :param grouping: Grouping name, or ``fleet`` for the fleet total.
+        :return: aggregate: Periods with no site value in any label are left out.
+        :raises KeyError: Unknown grouping.
+        """
+        group = self._groupings[grouping]
+        members = np.bincount(group.rows[group.rows >= 0], minlength=len(group.labels))
+        covered = np.zeros(self.width, dtype=bool)
+        for counts in group.counts.values():
+            covered |= (counts > 0).any(axis=0)
+        required = 1 if self.missing == SKIP else np.expand_dims(members, 1)
+        fields, field_counts = {}, {}
+        for name in self.fields:
+            count = group.counts[name][:, covered]
+            fields[name] = np.where(count < required, np.nan, group.sums[name][:, covered])
+            field_counts[name] = count
+        slots = np.flatnonzero(covered) + self._first
+        period_end = ((slots + 1) * self.period).view('datetime64[us]')
+        return FleetAggregate(list(group.labels), period_end, self.period // 1000000, fields,
+                              field_counts, members)
@@ -0,0 +1,294 @@
+"""Asyncio Module.
+
+Async counterparts of the site classes. With the ``async`` extra
+(``pip install pysolcast[async]``) requests are sent by an ``httpx``
+async client on the event loop itself, so thousands of fetches can be in
+flight at once. Without it, or when given an executor, requests run on a
+thread pool and concurrency is bounded by its workers.
+"""
+import asyncio
+import contextlib
+import copy
+import functools
+import threading
+import weakref
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import replace
+import requests.exceptions
+from pysolcast.base import PySolcast
+from pysolcast.rooftop import RooftopSite
+from pysolcast.session import DEFAULT_POOL_SIZE
+from pysolcast.utility import UtilitySite
+from pysolcast.weather import WeatherSite
+from pysolcast.world import World
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+DEFAULT_CONNECTIONS = 100
+STREAM_BATCH_SIZE = 1000
+
+_DEFAULTS = {}
+_DEFAULTS_LOCK = threading.Lock()
+_DEFAULT_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def get_default_executor() -> Executor:
+    """Get the executor used when an async site is not given one and has no async client.
+
+    :return: executor
+    """
+    with _DEFAULTS_LOCK:
+        if _DEFAULTS.get('executor') is None:
+            _DEFAULTS['executor'] = ThreadPoolExecutor(max_workers=DEFAULT_POOL_SIZE,
+                                                       thread_name_prefix='pysolcast')
+        return _DEFAULTS['executor']
+
+
+def get_default_client():
+    """Get the ``httpx`` async client of the running event loop, creating it on first use.
+
+    :return: client
+    :raises ImportError: ``httpx`` is not installed.
+    """
+    if httpx is None:
+        raise ImportError('httpx is required for the async client: pip install pysolcast[async]')
+    loop = asyncio.get_running_loop()
+    client = _DEFAULT_CLIENTS.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(limits=httpx.Limits(max_connections=DEFAULT_CONNECTIONS))
+        _DEFAULT_CLIENTS[loop] = client
+    return client
+
+
+async def close_default_client():
+    """Close the ``httpx`` async client of the running event loop, if one was created.
+
+    The next request on the loop creates a new client.
+    """
+    client = _DEFAULT_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _with_credit(rate_limiter, method, *args, **kwargs):
+    """Call method using the rate limit token already reserved on the event loop."""
+    with rate_limiter.credit():
+        return method(*args, **kwargs)
+
+
+def _next_batch(iterator, size: int) -> list:
+    """Pull up to size items from iterator."""
+    batch = []
+    for item in iterator:
+        batch.append(item)
+        if len(batch) == size:
+            break
+    return batch
+
+
+class _Pending(Exception):
+    """A site method needs the response to a request that has not been sent yet."""
+
+    def __init__(self, method: str, url: str, kwargs: dict):
+        super().__init__(method, url)
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+
+
+class _ReplaySession:
+    """Session answering a site's requests with responses fetched on the event loop.
+
+    A site method is called until it returns: each call is answered with the
+    responses fetched so far, in order, and the first request without one
+    raises :class:`_Pending` so it can be sent by the async client.
+    """
+
+    def __init__(self):
+        self.responses = []
+        self._sent = 0
+
+    def rewind(self):
+        """Answer the next call from the first response again."""
+        self._sent = 0
+
+    def request(self, method: str, url: str, **kwargs):
+        """Replay the next response, raising its transport error if it failed."""
+        if self._sent == len(self.responses):
+            raise _Pending(method, url, kwargs)
+        response = self.responses[self._sent]
+        self._sent += 1
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def get(self, url: str, **kwargs):
+        """Replay a GET request."""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        """Replay a POST request."""
+        return self.request('POST', url, **kwargs)
+
+
+def _requests_error(error):
+    """The ``requests`` exception the blocking site raises for an ``httpx`` transport error."""
+    if isinstance(error, httpx.TimeoutException):
+        return requests.exceptions.Timeout(str(error))
+    return requests.exceptions.ConnectionError(str(error))
+
+
+class AsyncSite:
+    """Base class for async sites.
+
+    Public methods of the wrapped site class are exposed under the same names
+    and return awaitables, and ``stream_*`` methods return async iterators.
+    Exceptions are the same as the wrapped class. Each call takes one token
+    from the site's rate limiter.
+
+    Use as an async context manager, or call :meth:`aclose`, to close the
+    async client when done.
+    """
+
+    site_class = PySolcast
+
+    def __init__(self, *args, executor: Executor = None, client=None, **kwargs):
+        """Create an async site.
+
+        :param executor: Run requests on this executor instead of an async client.
+        :param client: ``httpx.AsyncClient`` to send requests with. Defaults to one per event loop.
+        """
+        self.site = self.site_class(*args, **kwargs)
+        self.executor = executor or get_default_executor()
+        self.client = client
+        self.native = client is not None or (executor is None and httpx is not None)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the async client requests are sent with.
+
+        A client passed to the site is closed. Otherwise the event loop's
+        default client is closed and created again on next use.
+        """
+        if self.client is not None:
+            await self.client.aclose()
+        elif self.native:
+            await close_default_client()
+
+    def __getattr__(self, name):
+        if name == 'site':
+            raise AttributeError(name)
+        attr = getattr(self.site, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        if name.startswith('stream_'):
+            @functools.wraps(attr)
+            def stream(*args, **kwargs):
+                return self._stream(attr, *args, **kwargs)
+            return stream
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.call(name, *args, **kwargs)
+        return method
+
+    async def call(self, name: str, *args, **kwargs):
+        """Call a method of the wrapped site by name.
+
+        :param name: Name of the method, e.g. ``get_forecasts``.
+        :return: result: What the blocking method returns.
+        """
+        if self.native:
+            return await self._call_native(name, *args, **kwargs)
+        return await self._run(getattr(self.site, name), *args, **kwargs)
+
+    async def _run(self, method, *args, **kwargs):
+        """Call a blocking method on the executor, taking the rate limit token on the event loop."""
+        loop = asyncio.get_running_loop()
+        rate_limiter = self.site.options.rate_limiter
+        if rate_limiter is None:
+            return await loop.run_in_executor(self.executor,
+                                              functools.partial(method, *args, **kwargs))
+        await rate_limiter.acquire_async()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(_with_credit, rate_limiter, method, *args, **kwargs))
+
+    async def _stream(self, method, *args, **kwargs):
+        """Pull records of a blocking stream from the executor in batches."""
+        loop = asyncio.get_running_loop()
+        iterator = iter(method(*args, **kwargs))
+        pull = functools.partial(_next_batch, iterator, STREAM_BATCH_SIZE)
+        try:
+            # The request is sent on the first pull, which alone takes a rate limit token.
+            batch = await self._run(pull)
+            while batch:
+                for item in batch:
+                    yield item
+                batch = await loop.run_in_executor(self.executor, pull)
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                await loop.run_in_executor(self.executor, close)
+
+    async def _call_native(self, name: str, *args, **kwargs):
+        """Call a site method on the event loop, sending its requests with the async client.
+
+        The method runs against a copy of the site whose session replays
+        responses, so caching, rate limit updates, error handling, storing and
+        parsing are those of the blocking site. Rate limit tokens are taken on
+        the event loop, once per request sent.
+        """
+        session = _ReplaySession()
+        site = copy.copy(self.site)
+        site.options = replace(site.options, session=session)
+        rate_limiter = site.options.rate_limiter
+        while True:
+            session.rewind()
+            try:
+                with (rate_limiter.credit(len(session.responses) + 1) if rate_limiter
+                      else contextlib.nullcontext()):
+                    return getattr(site, name)(*args, **kwargs)
+            except _Pending as pending:
+                if rate_limiter:
+                    await rate_limiter.acquire_async()
+                session.responses.append(await self._send(pending))
+
+    async def _send(self, pending: _Pending):
+        """Send a request with the async client, returning its response or transport error."""
+        client = self.client if self.client is not None else get_default_client()
+        try:
+            return await client.request(pending.method, pending.url, **pending.kwargs)
+        except httpx.TransportError as error:
+            return _requests_error(error)
+
+
+class AsyncRooftopSite(AsyncSite):
+    """Async counterpart of :class:`pysolcast.rooftop.RooftopSite`."""
+
+    site_class = RooftopSite
+
+
+class AsyncUtilitySite(AsyncSite):
+    """Async counterpart of :class:`pysolcast.utility.UtilitySite`."""
+
+    site_class = UtilitySite
+
+
+class AsyncWeatherSite(AsyncSite):
+    """Async counterpart of :class:`pysolcast.weather.WeatherSite`."""
+
+    site_class = WeatherSite
+
+
+class AsyncWorld(AsyncSite):
+    """Async counterpart of :class:`pysolcast.world.World`."""
+
+    site_class = World
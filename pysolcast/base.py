@@ -3,10 +3,47 @@
 Extended by site classes.
 """
 import logging
-from isodate import parse_datetime, parse_duration
-from requests import get, post
+from dataclasses import dataclass, replace
+from requests import Session
 import requests.exceptions
-from pysolcast.exceptions import SiteError, ValidationError, RateLimitExceeded
+import isodate
+from pysolcast.cache import ResponseCache, key_period, make_key
+from pysolcast.exceptions import (ApiError, PySolcastError, SiteError, ValidationError,
+                                  RateLimitExceeded)
+from pysolcast.parsing import parse_datetime, parse_duration, parse_item, parse_response
+from pysolcast.ratelimit import RateLimiter, parse_rate_limit_headers, parse_retry_after
+from pysolcast.records import records_key, to_records_response
+from pysolcast.session import get_default_session
+from pysolcast.store import TimeSeriesStore
+from pysolcast.stream import iter_json_array, iter_text
+
+STREAM_CHUNK_SIZE = 65536
+
+# Errors a site method raises when its request fails.
+REQUEST_ERRORS = (PySolcastError, requests.exceptions.RequestException)
+
+
+@dataclass
+class SiteOptions:
+    """How a site sends requests and handles responses.
+
+    :param session: Session to send requests with. Defaults to the process-wide session.
+    :param rate_limiter: Limiter taking a token before each request.
+    :param cache: Cache of GET responses.
+    :param compact: Parse to compact records instead of dicts.
+    :param numeric: Parse numbers, including numbers sent as strings, to float as well as
+        dates and durations.
+    :param store: Store every fetched response is appended to.
+    :param timeout: Seconds to wait for a response.
+    """
+
+    session: Session = None
+    rate_limiter: RateLimiter = None
+    cache: ResponseCache = None
+    compact: bool = False
+    numeric: bool = False
+    store: TimeSeriesStore = None
+    timeout: float = 60
 
 
 class PySolcast:  # pylint: disable=too-few-public-methods
@@ -14,63 +51,208 @@ class PySolcast:  # pylint: disable=too-few-public-methods
 
     base_url = 'https://api.solcast.com.au'
 
-    def __init__(self, api_key: str, resource_id: str):
+    def __init__(self, api_key: str, resource_id: str, options: SiteOptions = None, **kwargs):
+        """Create a site.
+
+        :param options: Options of the site. Keyword arguments override its fields.
+        """
         self.api_key = api_key
         self.resource_id = resource_id
+        self.options = replace(options or SiteOptions(), **kwargs)
+        if self.options.session is None:
+            self.options.session = get_default_session()
         self.logger = logging.getLogger()
 
-    def _get_data(self, uri: str, params: dict = None, timeout=60) -> dict:  # pylint: disable=inconsistent-return-statements
+    def _get_data(self, uri: str, params: dict = None, timeout=None) -> dict:  # pylint: disable=inconsistent-return-statements
         """Get data from API."""
         url = f'{PySolcast.base_url}{uri}'
-        payload = {'format': 'json'}
-        if params:
-            payload = {**payload, **params}
+        payload = _payload(params)
+        if self.options.cache is not None:
+            cached = self.options.cache.get(make_key(uri, payload))
+            if cached is not None:
+                return cached
+        if self.options.rate_limiter:
+            self.options.rate_limiter.acquire()
         try:
-            _get_response = get(url, auth=(self.api_key, ''), params=payload, timeout=timeout)
+            _get_response = self.options.session.get(url, auth=(self.api_key, ''),
+                                                     params=payload,
+                                                     timeout=timeout or self.options.timeout)
         except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
             self.logger.info(f'Error getting data: {error}')  # pylint: disable=logging-fstring-interpolation
             raise error
+        if self.options.rate_limiter:
+            self.options.rate_limiter.update(_get_response.headers, _get_response.status_code)
         if _get_response.status_code == 200:
-            return _get_response.json()
-        if _get_response.status_code == 429:
+            data = _get_response.json()
+            if self.options.cache is not None:
+                self.options.cache.set(make_key(uri, payload), data, _get_response.headers)
+            if self.options.store is not None and records_key(data):
+                self.options.store.append(*self._store_key(uri, payload), data)
+            return data
+        self._raise_for_status(_get_response)
+
+    def _raise_for_status(self, response):
+        """Raise the exception for an error response."""
+        if response.status_code == 429:
             self.logger.info('Solcast API rate limit reached.')
-            self.logger.info('headers: %s', _get_response.headers)
-            self.logger.info('text: %s', _get_response.text)
+            self.logger.info('headers: %s', response.headers)
+            self.logger.info('text: %s', response.text)
             raise RateLimitExceeded(
-                f"Rate limit exceeded. Reset time: {_get_response.headers.get('x-rate-limit-reset')}")  # pylint: disable=line-too-long
-        if _get_response.status_code == 400:
-            self.logger.info('Validation error: %s', _get_response.headers)
+                f"Rate limit exceeded. Reset time: {response.headers.get('x-rate-limit-reset')}",  # pylint: disable=line-too-long
+                reset=parse_rate_limit_headers(response.headers)['reset'],
+                retry_after=parse_retry_after(response.headers))
+        if response.status_code == 400:
+            self.logger.info('Validation error: %s', response.headers)
             raise ValidationError('Validation error')
-        if _get_response.status_code == 404:
-            self.logger.info('Site error: %s', _get_response.headers)
+        if response.status_code == 404:
+            self.logger.info('Site error: %s', response.headers)
             raise SiteError('Site error')
 
-    def _post_data(self, uri: str, data: dict, timeout=60) -> dict:  # pylint: disable=inconsistent-return-statements
-        """Post data to API."""
+    def _stream_data(self, uri: str, tld_key: str, params: dict = None, parse: bool = False):
+        """Stream records from API as they arrive.
+
+        Yields each item of ``tld_key`` without buffering the whole response.
+        Streamed responses are not cached.
+        """
         url = f'{PySolcast.base_url}{uri}'
+        payload = _payload(params)
+        if self.options.rate_limiter:
+            self.options.rate_limiter.acquire()
         try:
-            _post_response = post(url, json=data, auth=(self.api_key, ''), timeout=timeout)
+            _get_response = self.options.session.get(url, auth=(self.api_key, ''),
+                                                     params=payload, stream=True,
+                                                     timeout=self.options.timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+            self.logger.info(f'Error getting data: {error}')  # pylint: disable=logging-fstring-interpolation
+            raise error
+        with _get_response:
+            if self.options.rate_limiter:
+                self.options.rate_limiter.update(_get_response.headers, _get_response.status_code)
+            if _get_response.status_code != 200:
+                self._raise_for_status(_get_response)
+                return
+            encoding = _get_response.encoding or 'utf-8'
+            chunks = iter_text(_get_response.iter_content(STREAM_CHUNK_SIZE), encoding)
+            for item in iter_json_array(chunks, tld_key):
+                yield self._parse_item(item) if parse else item
+
+    def _post_data(self, uri: str, data: dict, timeout=None) -> dict:
+        """Post data to API.
+
+        :raises ApiError: The response has any other unsuccessful status.
+        """
+        url = f'{PySolcast.base_url}{uri}'
+        if self.options.rate_limiter:
+            self.options.rate_limiter.acquire()
+        try:
+            _post_response = self.options.session.post(url, json=data, auth=(self.api_key, ''),
+                                                       timeout=timeout or self.options.timeout)
         except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
             self.logger.info(error)
             raise error
+        if self.options.rate_limiter:
+            self.options.rate_limiter.update(_post_response.headers, _post_response.status_code)
         if _post_response.status_code == 200:
             return _post_response.json()
-        if _post_response.status_code == 400:
-            raise ValidationError
-        if _post_response.status_code == 404:
-            raise SiteError
+        self._raise_for_status(_post_response)
+        self.logger.info('Unexpected status %s: %s', _post_response.status_code,
+                         _post_response.headers)
+        raise ApiError(f'Unexpected status {_post_response.status_code}',
+                       status_code=_post_response.status_code)
 
     def _create_uri(self, uri: str, endpoint: str) -> str:
         """Create a URI for specific endpoint."""
         return f'/{uri}/{self.resource_id}/{endpoint}'
 
+    def _store_key(self, uri: str, params: dict) -> tuple:
+        """Key and endpoint a response is stored under."""
+        return self.resource_id, store_endpoint(uri.replace(f'/{self.resource_id}', '', 1), params)
+
+    def _parse(self, dic: dict, tld_key: str) -> dict:
+        """Parse dates and durations of records, or compact records when enabled."""
+        if self.options.compact:
+            return to_records_response(dic, tld_key)
+        if self.options.numeric:
+            return parse_response(dic, tld_key)
+        return parse_date_time(dic, tld_key)
+
+    def _parse_item(self, item: dict) -> dict:
+        """Parse dates and durations of one record, and numbers when enabled."""
+        return parse_item(item) if self.options.numeric else parse_record(item)
+
+
+class EstimatedActualsSite(PySolcast):
+    """Site whose estimated actuals take no parameters.
+
+    Extended by rooftop and weather sites.
+    """
+
+    base_uri = None
+
+    def get_estimated_actuals(self) -> dict:
+        """Get estimated actuals data for site.
+
+        :return: estimated_actuals:
+        :raises ValidationError:
+        :raises SiteError:
+        """
+        endpoint = 'estimated_actuals'
+        return self._get_data(self._create_uri(self.base_uri, endpoint))
+
+    def get_estimated_actuals_parsed(self) -> dict:
+        """Get estimated actuals data for site.
+
+        :return: estimated_actuals: Dates and durations are parsed to datetime and timedelta.
+        :raises ValidationError:
+        :raises SiteError:
+        """
+        return self._parse(self.get_estimated_actuals(), 'estimated_actuals')
+
+    def stream_estimated_actuals(self, parse: bool = False):
+        """Stream estimated actuals for site one record at a time.
+
+        :param parse: Parse dates and durations of records as they arrive.
+        :return: estimated_actuals: Iterator of records.
+        :raises ValidationError:
+        :raises SiteError:
+        """
+        endpoint = 'estimated_actuals'
+        return self._stream_data(self._create_uri(self.base_uri, endpoint), endpoint, parse=parse)
+
+
+def _payload(params: dict = None) -> dict:
+    """Query parameters of a GET request, without those set to ``None``."""
+    payload = {'format': 'json'}
+    if params:
+        payload.update((key, value) for key, value in params.items() if value is not None)
+    return payload
+
+
+def store_endpoint(endpoint: str, params: dict) -> str:
+    """Endpoint a response is stored under, one per averaging period requested.
+
+    :param endpoint: Endpoint, e.g. ``/utility_scale_sites/forecasts``.
+    :param params: Query parameters of the request.
+    :return: endpoint: e.g. ``/utility_scale_sites/forecasts/PT30M``.
+    """
+    period = key_period(make_key(endpoint, params), None)
+    if period is None:
+        return endpoint
+    return f'{endpoint}/{isodate.duration_isoformat(parse_duration(period))}'
+
+
+def parse_record(item: dict) -> dict:
+    """Parse datetime and duration objects of one record."""
+    for key, value in item.items():
+        if key == 'period_end':
+            item[key] = parse_datetime(value)
+        if key == 'period':
+            item[key] = parse_duration(value)
+    return item
+
 
 def parse_date_time(dic: dict, tld_key: str) -> dict:
     """Parse datetime and duration objects."""
     for item in dic[tld_key]:
-        for key, value in item.items():
-            if key == 'period_end':
-                item[key] = parse_datetime(value)
-            if key == 'period':
-                item[key] = parse_duration(value)
+        parse_record(item)
     return dic
@@ -0,0 +1,281 @@
+"""Response Cache Module.
+
+Opt-in caching of API responses until the next forecast period boundary.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from isodate import parse_duration
+from pysolcast.ratelimit import parse_rate_limit_headers
+
+DEFAULT_PERIOD = 'PT30M'
+
+
+def make_key(uri: str, params: dict = None) -> tuple:
+    """Build a cache key from a URI and query parameters.
+
+    :param uri: Request URI.
+    :param params: Query parameters.
+    :return: key
+    """
+    return (uri, tuple(sorted((str(key), str(value)) for key, value in (params or {}).items())))
+
+
+def key_period(key, default: str = DEFAULT_PERIOD) -> str:
+    """Get the forecast period of the request a key was built for.
+
+    :param key: Key from :func:`make_key`, or any other cache key.
+    :param default: Period of keys without a ``Period`` parameter.
+    :return: period: ISO8601 duration.
+    """
+    if isinstance(key, tuple) and len(key) == 2 and isinstance(key[1], tuple):
+        for name, value in key[1]:
+            if name.lower() == 'period':
+                return value
+    return default
+
+
+def next_period_boundary(now: float, period: str = DEFAULT_PERIOD) -> float:
+    """Get the next forecast period boundary after ``now``.
+
+    :param now: Time in epoch seconds.
+    :param period: Forecast period in ISO8601 duration format.
+    :return: boundary: Time in epoch seconds.
+    """
+    seconds = parse_duration(period).total_seconds()
+    return (now // seconds + 1) * seconds
+
+
+def copy_response(data: dict) -> dict:
+    """Copy a response so callers can modify records without touching the cache.
+
+    :param data: Response data.
+    :return: data
+    """
+    return {key: [dict(item) if isinstance(item, dict) else item for item in value]
+            if isinstance(value, list) else value
+            for key, value in data.items()}
+
+
+class _CacheStats:
+    """Hit, miss and eviction counters of a cache, guarded by its lock."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        raise NotImplementedError
+
+    @property
+    def stats(self) -> dict:
+        """Hit, miss and eviction counters."""
+        with self._lock:
+            counts = {name: self._counts[name] for name in ('hits', 'misses', 'evictions')}
+        return {**counts, 'size': len(self)}
+
+
+class ResponseCache(_CacheStats):
+    """In-memory LRU cache of responses.
+
+    Entries expire at the next forecast period boundary rather than after a
+    fixed age, so a cached forecast is never served past the period it was
+    fetched in. The period is the request's ``Period`` parameter when it has
+    one. Safe to share across sites and threads.
+    """
+
+    def __init__(self, maxsize: int = 1024, period: str = DEFAULT_PERIOD, clock=time.time):
+        """Create a cache.
+
+        :param maxsize: Largest number of responses kept.
+        :param period: Forecast period in ISO8601 duration format of requests without a ``Period``
+            parameter. Entries expire at its boundaries.
+        """
+        super().__init__()
+        self.maxsize = maxsize
+        self.period = period
+        self._clock = clock
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_entry(self, key) -> dict:
+        """Get a cached response with its metadata.
+
+        :param key: Key from :func:`make_key`.
+        :return: entry: ``data``, ``fetched_at`` and ``rate_limit``. ``None`` on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires'] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._counts['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts['hits'] += 1
+        return {'data': copy_response(entry['data']), 'fetched_at': entry['fetched_at'],
+                'rate_limit': entry['rate_limit']}
+
+    def get(self, key):
+        """Get a cached response.
+
+        :param key: Key from :func:`make_key`.
+        :return: data: ``None`` on a miss.
+        """
+        entry = self.get_entry(key)
+        return entry['data'] if entry else None
+
+    def set(self, key, data: dict, headers=None):
+        """Cache a response until the next boundary of its period.
+
+        :param key: Key from :func:`make_key`.
+        :param data: Response data.
+        :param headers: Response headers, whose rate limit values are kept with the response.
+        """
+        now = self._clock()
+        entry = {'data': copy_response(data), 'fetched_at': now,
+                 'expires': next_period_boundary(now, key_period(key, self.period)),
+                 'rate_limit': parse_rate_limit_headers(headers) if headers else None}
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counts['evictions'] += 1
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache(_CacheStats):
+    """On-disk cache of responses backed by SQLite.
+
+    Stores the response body with its fetch time and rate limit headers, so a
+    restarted worker can serve responses fetched before the restart. Entries
+    expire at the next forecast period boundary, as with
+    :class:`ResponseCache`. Several processes on the same host can share one
+    file.
+
+    Reads record when an entry was last used at most once every
+    ``TOUCH_INTERVAL`` seconds, and expired entries are purged at most once
+    every ``PURGE_INTERVAL`` seconds, so hits do not each cost a write.
+    """
+
+    TOUCH_INTERVAL = 60
+    PURGE_INTERVAL = 300
+
+    def __init__(self, path: str, maxsize: int = 100000, period: str = DEFAULT_PERIOD,
+                 clock=time.time, **connect_kwargs):
+        """Create or open a cache file.
+
+        :param path: Path of the SQLite database file.
+        :param maxsize: Largest number of responses kept.
+        :param period: Forecast period in ISO8601 duration format of requests without a ``Period``
+            parameter. Entries expire at its boundaries.
+        :param connect_kwargs: Passed to ``sqlite3.connect``. ``timeout``, the seconds to wait for
+            another process holding a write lock, defaults to 30.
+        """
+        super().__init__()
+        self.path = path
+        self.maxsize = maxsize
+        self.period = period
+        self._clock = clock
+        self._connect_kwargs = {'timeout': 30, **connect_kwargs}
+        self._local = threading.local()
+        self._next_purge = 0.0
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, body TEXT NOT NULL, fetched_at REAL NOT NULL, '
+                'expires REAL NOT NULL, accessed REAL NOT NULL, rate_limit TEXT)')
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS responses_expires ON responses (expires)')
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, **self._connect_kwargs)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def get_entry(self, key) -> dict:
+        """Get a cached response with its metadata.
+
+        :param key: Key from :func:`make_key`.
+        :return: entry: ``data``, ``fetched_at`` and ``rate_limit``. ``None`` on a miss.
+        """
+        now = self._clock()
+        connection = self._connection()
+        row = connection.execute(
+            'SELECT body, fetched_at, rate_limit, accessed FROM responses '
+            'WHERE key = ? AND expires > ?', (json.dumps(key), now)).fetchone()
+        if row is None:
+            with self._lock:
+                self._counts['misses'] += 1
+            return None
+        if now - row[3] >= self.TOUCH_INTERVAL:
+            with connection:
+                connection.execute('UPDATE responses SET accessed = ? WHERE key = ?',
+                                   (now, json.dumps(key)))
+        with self._lock:
+            self._counts['hits'] += 1
+        return {'data': json.loads(row[0]), 'fetched_at': row[1],
+                'rate_limit': json.loads(row[2]) if row[2] else None}
+
+    def get(self, key):
+        """Get a cached response.
+
+        :param key: Key from :func:`make_key`.
+        :return: data: ``None`` on a miss.
+        """
+        entry = self.get_entry(key)
+        return entry['data'] if entry else None
+
+    def set(self, key, data: dict, headers=None):
+        """Cache a response until the next boundary of its period.
+
+        :param key: Key from :func:`make_key`.
+        :param data: Response data.
+        :param headers: Response headers.
+        """
+        now = self._clock()
+        rate_limit = json.dumps(parse_rate_limit_headers(headers)) if headers else None
+        expires = next_period_boundary(now, key_period(key, self.period))
+        with self._connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                               (json.dumps(key), json.dumps(data), now, expires, now, rate_limit))
+            if now >= self._next_purge:
+                self._next_purge = now + self.PURGE_INTERVAL
+                connection.execute('DELETE FROM responses WHERE expires <= ?', (now,))
+            evicted = connection.execute(
+                'DELETE FROM responses WHERE key IN '
+                '(SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+                (self.maxsize,)).rowcount
+        with self._lock:
+            self._counts['evictions'] += evicted
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._connection() as connection:
+            connection.execute('DELETE FROM responses')
+
+    def close(self):
+        """Close this thread's connection."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,193 @@
+"""Columnar Module.
+
+NumPy arrays of forecast, estimated actuals and radiation records.
+Requires the ``numpy`` extra: ``pip install pysolcast[numpy]``.
+"""
+import datetime
+from dataclasses import dataclass
+from pysolcast.parsing import parse_duration
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+TIME_KEYS = ('period_end', 'period')
+
+
+def require_numpy():
+    """Raise if NumPy is not installed.
+
+    :raises ImportError:
+    """
+    if np is None:
+        raise ImportError('numpy is required for columnar output: pip install pysolcast[numpy]')
+
+
+def _period_end_text(value) -> str:
+    """Convert a period_end string or datetime to a naive UTC ISO string."""
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return value.isoformat()
+    return value[:-1] if value.endswith('Z') else value
+
+
+def _period_seconds(values) -> list:
+    """Convert period strings or timedeltas to seconds, parsing each distinct string once."""
+    parsed = {}
+    seconds = []
+    for value in values:
+        if value not in parsed:
+            duration = parse_duration(value) if isinstance(value, str) else value
+            parsed[value] = int(duration.total_seconds())
+        seconds.append(parsed[value])
+    return seconds
+
+
+class ColumnarSeries:
+    """Records of one response held as arrays.
+
+    ``period_end`` is a ``datetime64[us]`` array in UTC, ``period`` a
+    ``timedelta64[s]`` array and every other field a ``float64`` array in
+    ``fields``, with ``nan`` where a record has no value. Fields that are not
+    numeric are kept as object arrays.
+    """
+
+    def __init__(self, period_end, period, fields: dict):
+        require_numpy()
+        self.period_end = period_end
+        self.period = period
+        self.fields = fields
+
+    def __len__(self):
+        return len(self.period_end)
+
+    def __getitem__(self, name: str):
+        if name in TIME_KEYS:
+            return getattr(self, name)
+        return self.fields[name]
+
+    def __contains__(self, name: str):
+        return name in TIME_KEYS or name in self.fields
+
+    def __repr__(self):
+        return f'ColumnarSeries(length={len(self)}, fields={list(self.fields)})'
+
+    def between(self, start=None, end=None) -> 'ColumnarSeries':
+        """Get the periods ending from start to end, without copying.
+
+        The series must be sorted by ``period_end``, as stored runs are.
+
+        :param start: First ``period_end`` included, as ``datetime64`` or ISO string.
+        :param end: Last ``period_end`` included, as ``datetime64`` or ISO string.
+        :return: series: Views of this series' arrays.
+        """
+        first = 0 if start is None else \
+            int(np.searchsorted(self.period_end, np.datetime64(start, 'us'), side='left'))
+        last = len(self) if end is None else \
+            int(np.searchsorted(self.period_end, np.datetime64(end, 'us'), side='right'))
+        return ColumnarSeries(self.period_end[first:last], self.period[first:last],
+                              {name: values[first:last] for name, values in self.fields.items()})
+
+    @classmethod
+    def from_records(cls, records: list) -> 'ColumnarSeries':
+        """Build arrays from raw or parsed records.
+
+        :param records: Records as returned by the API or by ``parse_date_time``.
+        :return: series
+        """
+        require_numpy()
+        names = []
+        for record in records:
+            for name in record:
+                if name not in TIME_KEYS and name not in names:
+                    names.append(name)
+        period_end = np.array([_period_end_text(record['period_end']) for record in records],
+                              dtype='datetime64[us]')
+        period = np.array(_period_seconds([record.get('period', 'PT0S') for record in records]),
+                          dtype='timedelta64[s]')
+        fields = {}
+        for name in names:
+            column = [record.get(name, 'nan') for record in records]
+            try:
+                fields[name] = np.array(column, dtype=np.float64)
+            except (TypeError, ValueError):
+                fields[name] = np.array(column, dtype=object)
+        return cls(period_end, period, fields)
+
+    @classmethod
+    def from_response(cls, dic: dict, tld_key: str) -> 'ColumnarSeries':
+        """Build arrays from a response.
+
+        :param dic: Response data.
+        :param tld_key: Key of the records, e.g. ``forecasts``.
+        :return: series
+        """
+        return cls.from_records(dic[tld_key])
+
+
+@dataclass(repr=False, eq=False)
+class ColumnarPoints:
+    """Responses for many locations aligned on one ``period_end`` axis.
+
+    ``latitude`` and ``longitude`` are ``(n,)`` arrays, ``period_end`` and
+    ``period`` are ``(t,)`` arrays covering every period of every location,
+    and each numeric field in ``fields`` is an ``(n, t)`` ``float64`` array
+    with ``nan`` where a location has no value for a period.
+    """
+
+    latitude: object
+    longitude: object
+    period_end: object
+    period: object
+    fields: dict
+
+    def __post_init__(self):
+        require_numpy()
+
+    def __len__(self):
+        return len(self.latitude)
+
+    def __getitem__(self, name: str):
+        if name in TIME_KEYS:
+            return getattr(self, name)
+        return self.fields[name]
+
+    def __repr__(self):
+        return (f'ColumnarPoints(points={len(self)}, periods={len(self.period_end)}, '
+                f'fields={list(self.fields)})')
+
+    @classmethod
+    def from_results(cls, results, tld_key: str) -> 'ColumnarPoints':
+        """Build aligned arrays from per-location responses.
+
+        :param results: Iterable of ``(latitude, longitude, data, ...)``, e.g. from
+            :func:`pysolcast.fleet.iter_world`. Results without data are skipped.
+        :param tld_key: Key of the records, e.g. ``estimated_actuals``.
+        :return: points
+        """
+        require_numpy()
+        latitude, longitude, series = [], [], []
+        for result in results:
+            if result[2] is None:
+                continue
+            latitude.append(float(result[0]))
+            longitude.append(float(result[1]))
+            series.append(ColumnarSeries.from_response(result[2], tld_key))
+        if series:
+            period_end = np.unique(np.concatenate([item.period_end for item in series]))
+        else:
+            period_end = np.array([], dtype='datetime64[us]')
+        period = np.zeros(len(period_end), dtype='timedelta64[s]')
+        fields = {}
+        for row, item in enumerate(series):
+            columns = np.searchsorted(period_end, item.period_end)
+            period[columns] = item.period
+            for name, values in item.fields.items():
+                if values.dtype != np.float64:
+                    continue
+                if name not in fields:
+                    fields[name] = np.full((len(series), len(period_end)), np.nan)
+                fields[name][row, columns] = values
+        return cls(np.array(latitude), np.array(longitude), period_end, period, fields)
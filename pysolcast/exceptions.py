@@ -1,16 +1,40 @@
 """Exceptions Module."""
 
 
-class ValidationError(Exception):  # pylint: disable=missing-class-docstring
+class PySolcastError(Exception):
+    """Base class of the errors raised for API requests."""
+
+
+class ValidationError(PySolcastError):  # pylint: disable=missing-class-docstring
     """Data validation error."""
 
 
-class SiteError(Exception):  # pylint: disable=missing-class-docstring
+class SiteError(PySolcastError):  # pylint: disable=missing-class-docstring
     """Site Error.
 
     Site is not found or not accessable.
     """
 
 
-class RateLimitExceeded(Exception):  # pylint: disable=missing-class-docstring
-    """Rate limit exceeded."""
+class RateLimitExceeded(PySolcastError):  # pylint: disable=missing-class-docstring
+    """Rate limit exceeded.
+
+    ``reset`` is the time the limit resets, in epoch seconds, and
+    ``retry_after`` the seconds the API asks to wait before retrying, when known.
+    """
+
+    def __init__(self, *args, reset: float = None, retry_after: float = None):
+        super().__init__(*args)
+        self.reset = reset
+        self.retry_after = retry_after
+
+
+class ApiError(PySolcastError):
+    """Unexpected response status, such as a server error.
+
+    ``status_code`` is the status of the response.
+    """
+
+    def __init__(self, *args, status_code: int = None):
+        super().__init__(*args)
+        self.status_code = status_code
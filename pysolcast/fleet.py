@@ -0,0 +1,304 @@
+"""Fleet Module.
+
+Concurrent bulk fetches across many sites, on threads or worker processes.
+"""
+import logging
+import math
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed, wait)
+from dataclasses import dataclass, replace
+from pysolcast.base import REQUEST_ERRORS, SiteOptions
+from pysolcast.columnar import ColumnarSeries, require_numpy
+from pysolcast.exceptions import ValidationError
+from pysolcast.parsing import parse_response
+from pysolcast.ratelimit import SharedRateLimiter
+from pysolcast.records import records_key
+from pysolcast.rooftop import RooftopSite
+from pysolcast.session import DEFAULT_POOL_SIZE, create_session
+from pysolcast.world import World, validate_coordinates
+
+DEFAULT_ENDPOINTS = ('forecasts', 'estimated_actuals')
+RAW = 'raw'
+PARSED = 'parsed'
+COLUMNAR = 'columnar'
+OUTPUTS = (RAW, PARSED, COLUMNAR)
+
+PointResult = namedtuple('PointResult', ('latitude', 'longitude', 'data', 'error'))
+_Chunk = namedtuple('_Chunk', ('site_class', 'api_key', 'endpoints', 'output', 'max_workers'))
+
+
+@dataclass(repr=False)
+class FleetStats:
+    """Throughput statistics for a fleet fetch."""
+
+    sites: int
+    requests: int
+    errors: int
+    elapsed: float
+    latencies: list
+
+    @property
+    def requests_per_second(self) -> float:
+        """Requests completed per second of the fetch."""
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        """Mean seconds per successful request."""
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    @property
+    def max_latency(self) -> float:
+        """Longest seconds of a successful request."""
+        return max(self.latencies, default=0.0)
+
+    def __repr__(self):
+        return (f'FleetStats(sites={self.sites}, requests={self.requests}, errors={self.errors}, '
+                f'elapsed={self.elapsed:.3f}, requests_per_second={self.requests_per_second:.1f})')
+
+
+@dataclass
+class FleetResult:
+    """Per-site results and errors of a fleet fetch.
+
+    ``results`` and ``errors`` are keyed by resource id, then by endpoint.
+    """
+
+    results: dict
+    errors: dict
+    stats: FleetStats
+
+
+@dataclass
+class ProcessOptions:
+    """How :func:`fetch_fleet_processes` spreads a fleet over worker processes.
+
+    :param processes: Worker processes. Defaults to one per core.
+    :param max_workers: Requests in flight at once in each worker.
+    :param rate_limiter: Rate limiter shared by the workers.
+    :param output: ``columnar`` for :class:`pysolcast.columnar.ColumnarSeries`, which needs the
+        ``numpy`` extra, ``parsed`` for records parsed by ``parse_response`` or ``raw`` for
+        response data.
+    :param site_class: Site class built from each resource id, e.g. ``UtilitySite``.
+    :param chunk_size: Sites per task. Defaults to a quarter of each worker's share.
+    :param mp_context: Multiprocessing context of the workers.
+    """
+
+    processes: int = None
+    max_workers: int = DEFAULT_POOL_SIZE
+    rate_limiter: SharedRateLimiter = None
+    output: str = COLUMNAR
+    site_class: type = RooftopSite
+    chunk_size: int = None
+    mp_context: object = None
+
+
+def _as_sites(sites, api_key: str, options: SiteOptions) -> list:
+    """Build site objects from resource ids, passing site objects through."""
+    built = []
+    for site in sites:
+        if isinstance(site, str):
+            if api_key is None:
+                raise ValueError('api_key is required when sites are given as resource ids')
+            site = RooftopSite(api_key, site, options)
+        built.append(site)
+    return built
+
+
+def _error_count(errors: dict) -> int:
+    """Number of failed requests in errors keyed by resource id, then by endpoint."""
+    return sum(len(value) for value in errors.values())
+
+
+def _timed_call(method):
+    """Call method, returning its result and latency."""
+    start = time.perf_counter()
+    result = method()
+    return result, time.perf_counter() - start
+
+
+def _collect(futures: dict) -> tuple:
+    """Results, errors and latencies of futures keyed by resource id and endpoint."""
+    results = {}
+    errors = {}
+    latencies = []
+    for future in as_completed(futures):
+        resource_id, endpoint = futures[future]
+        try:
+            result, latency = future.result()
+        except REQUEST_ERRORS as error:
+            logging.getLogger().info('Error fetching %s for %s: %s', endpoint, resource_id, error)
+            errors.setdefault(resource_id, {})[endpoint] = error
+            continue
+        latencies.append(latency)
+        results.setdefault(resource_id, {})[endpoint] = result
+    return results, errors, latencies
+
+
+def fetch_fleet(sites, api_key: str = None, endpoints: tuple = DEFAULT_ENDPOINTS,
+                max_workers: int = DEFAULT_POOL_SIZE, options: SiteOptions = None) -> FleetResult:
+    """Fetch endpoints for many sites concurrently.
+
+    A site whose request fails is recorded in ``errors`` and does not stop the batch.
+
+    :param sites: Resource ids or site objects.
+    :param api_key: API key used to build sites from resource ids.
+    :param endpoints: Endpoints to fetch, called as ``get_<endpoint>()`` on each site.
+    :param max_workers: Number of requests in flight at once.
+    :param options: Session, rate limiter and other options of sites built from resource ids.
+    :return: fleet_result
+    """
+    sites = _as_sites(sites, api_key, options)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_timed_call, getattr(site, f'get_{endpoint}')):
+                   (site.resource_id, endpoint) for site in sites for endpoint in endpoints}
+        results, errors, latencies = _collect(futures)
+    stats = FleetStats(len(sites), len(futures), _error_count(errors),
+                       time.perf_counter() - start, latencies)
+    return FleetResult(results, errors, stats)
+
+
+_worker_state = {}
+
+
+def _init_worker(rate_limiter: SharedRateLimiter, pool_size: int):
+    """Give a worker process its own session and the shared rate limiter."""
+    _worker_state['session'] = create_session(pool_size)
+    _worker_state['rate_limiter'] = rate_limiter
+
+
+def _convert(data: dict, output: str):
+    """Convert response data in the worker before it is sent to the parent."""
+    tld_key = records_key(data) if isinstance(data, dict) else None
+    if output == RAW or tld_key is None:
+        return data
+    if output == PARSED:
+        return parse_response(data, tld_key)
+    return ColumnarSeries.from_response(data, tld_key)
+
+
+def _fetch_chunk(chunk: _Chunk, resource_ids: list) -> FleetResult:
+    """Fetch and convert a chunk of sites in a worker process."""
+    options = SiteOptions(session=_worker_state['session'],
+                          rate_limiter=_worker_state['rate_limiter'])
+    sites = [chunk.site_class(chunk.api_key, resource_id, options) for resource_id in resource_ids]
+    fleet = fetch_fleet(sites, endpoints=chunk.endpoints, max_workers=chunk.max_workers)
+    fleet.results = {resource_id: {endpoint: _convert(data, chunk.output)
+                                   for endpoint, data in by_endpoint.items()}
+                     for resource_id, by_endpoint in fleet.results.items()}
+    return fleet
+
+
+def fetch_fleet_processes(resource_ids, api_key: str, endpoints: tuple = DEFAULT_ENDPOINTS,
+                          options: ProcessOptions = None, **kwargs) -> FleetResult:
+    """Fetch endpoints for many sites on worker processes.
+
+    Sites are split into chunks fetched by ``processes`` workers, each with
+    ``max_workers`` requests in flight on its own session. Decoding and
+    parsing happen in the workers, so they run on every core instead of
+    one. With ``columnar`` output each result is sent back to the parent
+    as a few contiguous arrays, which are far cheaper to pickle than
+    records of ``datetime`` objects.
+
+    A :class:`pysolcast.ratelimit.SharedRateLimiter` enforces one rate
+    limit and quota across every worker.
+
+    :param resource_ids: Resource ids.
+    :param api_key: API key used to build sites.
+    :param endpoints: Endpoints to fetch, called as ``get_<endpoint>()`` on each site.
+    :param options: Processes, output and other options. Keyword arguments override its fields.
+    :return: fleet_result
+    :raises ValueError: Unknown output or a rate limiter that is not shared.
+    """
+    options = replace(options or ProcessOptions(), **kwargs)
+    if options.output not in OUTPUTS:
+        raise ValueError(f'Unknown output: {options.output}')
+    if options.output == COLUMNAR:
+        require_numpy()
+    if options.rate_limiter is not None and not isinstance(options.rate_limiter,
+                                                           SharedRateLimiter):
+        raise ValueError('rate_limiter must be a SharedRateLimiter to be shared across processes')
+    resource_ids = list(resource_ids)
+    processes = options.processes or os.cpu_count() or 1
+    chunk_size = options.chunk_size or max(1, math.ceil(len(resource_ids) / (processes * 4)))
+    chunk = _Chunk(options.site_class, api_key, tuple(endpoints), options.output,
+                   options.max_workers)
+    fleet = FleetResult({}, {}, FleetStats(len(resource_ids), 0, 0, 0.0, []))
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes, mp_context=options.mp_context,
+                             initializer=_init_worker,
+                             initargs=(options.rate_limiter, options.max_workers)) as executor:
+        futures = [executor.submit(_fetch_chunk, chunk, resource_ids[offset:offset + chunk_size])
+                   for offset in range(0, len(resource_ids), chunk_size)]
+        for future in futures:
+            chunk_fleet = future.result()
+            fleet.results.update(chunk_fleet.results)
+            fleet.errors.update(chunk_fleet.errors)
+            fleet.stats.requests += chunk_fleet.stats.requests
+            fleet.stats.latencies.extend(chunk_fleet.stats.latencies)
+    fleet.stats.errors = _error_count(fleet.errors)
+    fleet.stats.elapsed = time.perf_counter() - start
+    return fleet
+
+
+def _validated(coordinates):
+    """Yield each latitude and longitude with the ``ValidationError`` found for it, if any."""
+    for latitude, longitude in coordinates:
+        try:
+            latitude, longitude = validate_coordinates(latitude, longitude)
+        except ValidationError as error:
+            yield latitude, longitude, error
+            continue
+        yield latitude, longitude, None
+
+
+def _point_result(future, latitude: float, longitude: float) -> PointResult:
+    """Result of a World request for a point, or the error it failed with."""
+    try:
+        return PointResult(latitude, longitude, future.result(), None)
+    except REQUEST_ERRORS as error:
+        logging.getLogger().info('Error fetching %s, %s: %s', latitude, longitude, error)
+        return PointResult(latitude, longitude, None, error)
+
+
+def iter_world(world: World, coordinates, endpoint: str = 'estimated_actuals', hours: str = None,
+               max_workers: int = DEFAULT_POOL_SIZE):
+    """Fetch World data for many locations, yielding results as they complete.
+
+    Coordinates are validated locally; invalid ones are yielded with a
+    ``ValidationError`` and never sent. At most ``max_workers`` requests are
+    in flight, and only that many coordinates are read ahead, so very large
+    sweeps run in constant memory. Rate limiting is applied by the World
+    client's ``rate_limiter``.
+
+    :param world: World client, or a :class:`pysolcast.grid.GridWorld`.
+    :param coordinates: Iterable of (latitude, longitude) pairs, e.g. an ``(n, 2)`` array.
+    :param endpoint: ``forecasts`` or ``estimated_actuals``.
+    :param hours: Time window of each response in hours.
+    :param max_workers: Number of requests in flight at once.
+    :return: results: Iterator of :class:`PointResult` in completion order.
+    """
+    method = getattr(world, f'get_{endpoint}')
+    points = _validated(coordinates)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        inflight = {}
+        exhausted = False
+        while True:
+            while not exhausted and len(inflight) < max_workers:
+                point = next(points, None)
+                if point is None:
+                    exhausted = True
+                elif point[2] is not None:
+                    yield PointResult(*point[:2], None, point[2])
+                else:
+                    future = executor.submit(method, str(point[0]), str(point[1]), hours)
+                    inflight[future] = point[:2]
+            if not inflight:
+                return
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield _point_result(future, *inflight.pop(future))
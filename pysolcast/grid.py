@@ -0,0 +1,127 @@
+"""Grid Module.
+
+Coordinate snapping, caching and request de-duplication for World lookups.
+"""
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from pysolcast.cache import ResponseCache, copy_response
+from pysolcast.world import World
+
+DEFAULT_RESOLUTION = 0.01
+
+
+def snap(value, resolution: float = DEFAULT_RESOLUTION) -> float:
+    """Snap a coordinate to the nearest grid node, a multiple of ``resolution``.
+
+    :param value: Latitude or longitude in degrees.
+    :param resolution: Cell size in degrees.
+    :return: coordinate
+    """
+    return round(round(float(value) / resolution) * resolution, 6)
+
+
+class GridWorld:
+    """World lookups served per grid cell.
+
+    Coordinates are snapped to the nearest multiple of ``resolution``
+    degrees, so every point in a cell shares one API call and one cached
+    response. Concurrent requests for the same cell wait for a single call
+    instead of each making their own.
+    """
+
+    def __init__(self, world: World, resolution: float = DEFAULT_RESOLUTION,
+                 cache: ResponseCache = None):
+        """Wrap a World client.
+
+        :param world: Client used for API calls.
+        :param resolution: Cell size in degrees.
+        :param cache: Cache of cell responses. Defaults to a :class:`pysolcast.cache.ResponseCache`.
+        """
+        self.world = world
+        self.resolution = resolution
+        self.cache = cache if cache is not None else ResponseCache(maxsize=4096)
+        self._counts = Counter()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @property
+    def calls_saved(self) -> int:
+        """Requests answered without an API call of their own."""
+        with self._lock:
+            return self._counts['cache_hits'] + self._counts['deduplicated']
+
+    @property
+    def stats(self) -> dict:
+        """Request, API call, cache hit and de-duplication counters."""
+        with self._lock:
+            counts = {name: self._counts[name]
+                      for name in ('requests', 'api_calls', 'cache_hits', 'deduplicated')}
+        return {**counts, 'calls_saved': counts['cache_hits'] + counts['deduplicated']}
+
+    def cell(self, latitude, longitude) -> tuple:
+        """Get the grid cell of a point.
+
+        :param latitude: The latitude of the location (EPSG:4326)
+        :param longitude: The longitude of the location (EPSG:4326)
+        :return: cell: Snapped latitude and longitude.
+        """
+        return snap(latitude, self.resolution), snap(longitude, self.resolution)
+
+    def _get(self, endpoint: str, latitude, longitude, hours) -> dict:
+        """Get a cell response from the cache, an in-flight call or the API."""
+        cell = self.cell(latitude, longitude)
+        key = (endpoint, cell, hours)
+        with self._lock:
+            self._counts['requests'] += 1
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._counts['cache_hits'] += 1
+                return cached
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self._counts['deduplicated'] += 1
+        if not owner:
+            data = future.result()
+            return copy_response(data) if data is not None else None
+        try:
+            data = getattr(self.world, f'get_{endpoint}')(str(cell[0]), str(cell[1]), hours)
+            with self._lock:
+                self._counts['api_calls'] += 1
+            if data is not None:
+                self.cache.set(key, data)
+            future.set_result(copy_response(data) if data is not None else None)
+            return data
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def get_forecasts(self, latitude, longitude, hours: str = None) -> dict:
+        """Get forecasts data for the grid cell of a location.
+
+        :param latitude: The latitude of the location (EPSG:4326)
+        :param longitude: The longitude of the location (EPSG:4326)
+        :param hours: Time window of the response in hours
+        :return: forecasts
+        :raises ValidationError:
+        :raises SiteError:
+        """
+        return self._get('forecasts', latitude, longitude, hours)
+
+    def get_estimated_actuals(self, latitude, longitude, hours: str = None) -> dict:
+        """Get estimated actuals data for the grid cell of a location.
+
+        :param latitude: The latitude of the location (EPSG:4326)
+        :param longitude: The longitude of the location (EPSG:4326)
+        :param hours: Time window of the response in hours
+        :return: estimated_actuals
+        :raises ValidationError:
+        :raises SiteError:
+        """
+        return self._get('estimated_actuals', latitude, longitude, hours)
@@ -0,0 +1,237 @@
+"""Forecast History Module.
+
+Compact in-memory history of forecast runs, stored as deltas between
+consecutive runs. Requires the ``numpy`` extra.
+"""
+import bisect
+import time
+from pysolcast.columnar import ColumnarSeries, np, require_numpy
+
+DEFAULT_KEYFRAME_INTERVAL = 24
+
+
+def _pack(indices):
+    """Store a contiguous run of indices as a ``(start, stop)`` tuple."""
+    if len(indices) == 0:
+        return 0, 0
+    if indices[-1] - indices[0] == len(indices) - 1:
+        return int(indices[0]), int(indices[-1]) + 1
+    return indices.astype(np.int32)
+
+
+def _unpack(packed):
+    """Indices stored with :func:`_pack`."""
+    return slice(*packed) if isinstance(packed, tuple) else packed
+
+
+def _nbytes(value) -> int:
+    """Bytes held by the arrays of a keyframe or delta."""
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if isinstance(value, tuple):
+        return sum(_nbytes(item) for item in value)
+    return getattr(value, 'nbytes', 0)
+
+
+def _changed(old, new):
+    """Positions where two aligned columns differ, treating two ``nan`` as equal."""
+    differs = old != new
+    if new.dtype == np.float64:
+        differs &= ~(np.isnan(old) & np.isnan(new))
+    return np.flatnonzero(differs)
+
+
+def _freeze(columns: dict) -> dict:
+    """Make stored columns read-only, as runs share them."""
+    for values in columns.values():
+        values.flags.writeable = False
+    return columns
+
+
+def _columns(series: ColumnarSeries) -> dict:
+    """Columns of a run sorted by ``period_end``, numeric fields only."""
+    order = np.argsort(series.period_end, kind='stable')
+    columns = {'period_end': np.asarray(series.period_end, dtype='datetime64[us]')[order],
+               'period': np.asarray(series.period, dtype='timedelta64[s]')[order]}
+    for name, values in series.fields.items():
+        if values.dtype == np.float64:
+            columns[name] = values[order]
+    return _freeze(columns)
+
+
+class ForecastHistory:
+    """History of forecast runs for one site.
+
+    Every ``keyframe_interval`` runs are stored in full. The runs between
+    are stored as a delta against the run before: which rows carry over,
+    the rows that are new, and only the values that changed. A run whose
+    delta would be no smaller than the run itself is stored in full too.
+    Reading a run replays deltas from the keyframe before it.
+
+    Runs are added as responses, records, such as those returned by
+    ``parse_date_time``, or :class:`pysolcast.columnar.ColumnarSeries`.
+    Only ``period_end``, ``period`` and numeric fields are kept.
+    """
+
+    def __init__(self, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        """Create an empty history.
+
+        :param keyframe_interval: Runs between full copies.
+        """
+        require_numpy()
+        self.keyframe_interval = keyframe_interval
+        self.fetched_at = []
+        self._frames = []
+        self._last = None
+        self._cached = (None, None)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __repr__(self):
+        return f'ForecastHistory(runs={len(self)}, nbytes={self.nbytes})'
+
+    @property
+    def keyframes(self) -> list:
+        """Indices of the runs stored in full."""
+        return [run for run, (kind, _) in enumerate(self._frames) if kind == 'key']
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by stored runs."""
+        return sum(_nbytes(frame) for _, frame in self._frames)
+
+    def add(self, data, tld_key: str = 'forecasts', fetched_at: float = None) -> int:
+        """Add a run, newer than every run already added.
+
+        :param data: Response data, a list of records or a
+            :class:`pysolcast.columnar.ColumnarSeries`.
+        :param tld_key: Key of the records when ``data`` is response data.
+        :param fetched_at: Fetch time in epoch seconds. Defaults to now.
+        :return: run: Index of the run.
+        """
+        if isinstance(data, dict):
+            data = data[tld_key]
+        if not isinstance(data, ColumnarSeries):
+            data = ColumnarSeries.from_records(data)
+        columns = _columns(data)
+        frame = ('key', columns)
+        if self._last is not None and len(self) % self.keyframe_interval:
+            delta = self._delta(self._last, columns)
+            if _nbytes(delta) < _nbytes(columns):
+                frame = ('delta', delta)
+        self._frames.append(frame)
+        self.fetched_at.append(time.time() if fetched_at is None else fetched_at)
+        self._last = columns
+        self._cached = (len(self) - 1, columns)
+        return len(self) - 1
+
+    @staticmethod
+    def _delta(previous: dict, columns: dict) -> dict:
+        """Encode a run against the run before it."""
+        _, new_index, old_index = np.intersect1d(columns['period_end'], previous['period_end'],
+                                                 assume_unique=True, return_indices=True)
+        added = np.setdiff1d(np.arange(len(columns['period_end'])), new_index, assume_unique=True)
+        delta = {'length': len(columns['period_end']), 'old': _pack(old_index),
+                 'new': _pack(new_index), 'added': _pack(added), 'columns': {}}
+        for name, values in columns.items():
+            old = previous.get(name)
+            if old is None:
+                delta['columns'][name] = ('full', values)
+                continue
+            changed = _changed(old[old_index], values[new_index])
+            delta['columns'][name] = ('sparse', values[added], new_index[changed].astype(np.int32),
+                                      values[new_index[changed]])
+        return delta
+
+    @staticmethod
+    def _apply(previous: dict, delta: dict) -> dict:
+        """Rebuild a run from the run before it and its delta."""
+        old, new, added = _unpack(delta['old']), _unpack(delta['new']), _unpack(delta['added'])
+        columns = {}
+        for name, encoded in delta['columns'].items():
+            if encoded[0] == 'full':
+                columns[name] = encoded[1]
+                continue
+            _, added_values, positions, values = encoded
+            column = np.empty(delta['length'], dtype=added_values.dtype)
+            column[new] = previous[name][old]
+            column[added] = added_values
+            column[positions] = values
+            columns[name] = column
+        return _freeze(columns)
+
+    def _columns(self, run: int) -> dict:
+        """Columns of a run, replayed from the nearest keyframe."""
+        if run < 0:
+            run += len(self)
+        if not 0 <= run < len(self):
+            raise IndexError(f'No run {run}')
+        start = run
+        while self._frames[start][0] != 'key':
+            start -= 1
+        columns = self._frames[start][1]
+        cached_run, cached = self._cached
+        if cached_run is not None and start <= cached_run <= run:
+            start, columns = cached_run, cached
+        for index in range(start + 1, run + 1):
+            kind, frame = self._frames[index]
+            columns = frame if kind == 'key' else self._apply(columns, frame)
+        self._cached = (run, columns)
+        return columns
+
+    def get(self, run: int = -1) -> ColumnarSeries:
+        """Rebuild a run. Its arrays are read-only.
+
+        :param run: Index of the run, negative from the latest.
+        :return: series
+        :raises IndexError: No such run.
+        """
+        columns = dict(self._columns(run))
+        return ColumnarSeries(columns.pop('period_end'), columns.pop('period'), columns)
+
+    def run_at(self, fetched_at: float) -> int:
+        """Find the latest run fetched at or before a time.
+
+        :param fetched_at: Time in epoch seconds.
+        :return: run: ``None`` when every run is later.
+        """
+        index = bisect.bisect_right(self.fetched_at, fetched_at) - 1
+        return index if index >= 0 else None
+
+    def diff(self, old: int, new: int = -1, field: str = 'pv_estimate') -> ColumnarSeries:
+        """Change of a field between two runs over the periods both cover.
+
+        Narrow it to a window with :meth:`ColumnarSeries.between`.
+
+        :param old: Index of the earlier run.
+        :param new: Index of the later run.
+        :param field: Field compared, e.g. ``pv_estimate``.
+        :return: series: The shared periods, with ``new - old`` values of the field.
+        """
+        before, after = self._columns(old), self._columns(new)
+        period_end, after_index, before_index = np.intersect1d(
+            after['period_end'], before['period_end'], assume_unique=True, return_indices=True)
+        if field in after and field in before:
+            delta = after[field][after_index] - before[field][before_index]
+        else:
+            delta = np.full(len(period_end), np.nan)
+        return ColumnarSeries(period_end, after['period'][after_index], {field: delta})
+
+    def revisions(self, period_end, field: str = 'pv_estimate') -> tuple:
+        """Value of one period in every run that covers it.
+
+        :param period_end: Period, as ``datetime64`` or ISO string.
+        :param field: Field read, e.g. ``pv_estimate``.
+        :return: fetched_at, values: Arrays of the fetch times and values of runs covering the
+            period.
+        """
+        target = np.datetime64(period_end, 'us')
+        fetched_at, values = [], []
+        for run in range(len(self)):
+            columns = self._columns(run)
+            position = np.searchsorted(columns['period_end'], target)
+            if position < len(columns['period_end']) and columns['period_end'][position] == target:
+                fetched_at.append(self.fetched_at[run])
+                values.append(columns[field][position] if field in columns else np.nan)
+        return np.array(fetched_at, dtype=np.float64), np.array(values, dtype=np.float64)
@@ -0,0 +1,396 @@
+"""Measurement Journal Module.
+
+Durable, append-only queue of measurements that survives API outages and
+process crashes.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, namedtuple
+from dataclasses import dataclass, replace
+from pysolcast.base import REQUEST_ERRORS
+from pysolcast.uploader import MAX_BATCH_SIZE, RETRY_ERRORS
+
+LOG_FILE = 'measurements.log'
+ACK_FILE = 'measurements.ack'
+DEAD_LETTER_FILE = 'measurements.dead'
+
+TAIL_CHUNK_SIZE = 4096
+
+# Last acknowledged sequence number and the log offset where its entry ends.
+Ack = namedtuple('Ack', ('seq', 'offset'))
+
+
+@dataclass
+class JournalOptions:
+    """When a journal syncs and compacts its log.
+
+    :param sync_every: Appends between fsyncs.
+    :param sync_interval: Seconds after the last fsync at which an append, or background
+        replay, syncs.
+    :param compact_after: Acknowledged entries that trigger compaction.
+    """
+
+    sync_every: int = 100
+    sync_interval: float = 1.0
+    compact_after: int = 10000
+
+
+def _earliest(seq: int, other: int) -> int:
+    """Earlier of two sequence numbers, either of which may be unset."""
+    return other if seq is None else min(seq, other)
+
+
+def _open_for_append(path: str) -> int:
+    """Open a file for unbuffered appends, creating it if needed."""
+    return os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+
+class _Log:
+    """Log file of a journal, appended to line by line.
+
+    Each append is written straight to the operating system, so it survives
+    a process crash, while the fsyncs that make it survive power loss are
+    batched. ``lock`` guards the log and the journal state tied to it.
+    """
+
+    def __init__(self, path: str, options: JournalOptions):
+        self.path = path
+        self.options = options
+        self.lock = threading.RLock()
+        self.seq = 0
+        self._fd = None
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def open(self) -> int:
+        """Open the log for appending, cutting off a last line left incomplete by a crash.
+
+        :return: truncated: Bytes cut off.
+        """
+        truncated = 0
+        try:
+            with open(self.path, 'rb+') as log_file:
+                size = position = log_file.seek(0, os.SEEK_END)
+                keep = 0
+                while position > 0:
+                    start = max(position - TAIL_CHUNK_SIZE, 0)
+                    log_file.seek(start)
+                    newline = log_file.read(position - start).rfind(b'\n')
+                    if newline != -1:
+                        keep = start + newline + 1
+                        break
+                    position = start
+                if keep < size:
+                    log_file.truncate(keep)
+                    truncated = size - keep
+        except FileNotFoundError:
+            pass
+        self._fd = _open_for_append(self.path)
+        return truncated
+
+    def append(self, entry: dict) -> int:
+        """Append an entry under the next sequence number, syncing when due.
+
+        :return: seq: Sequence number of the entry.
+        """
+        with self.lock:
+            self.seq += 1
+            os.write(self._fd, (json.dumps({'seq': self.seq, **entry}) + '\n').encode('utf-8'))
+            self._unsynced += 1
+            if (self._unsynced >= self.options.sync_every
+                    or time.monotonic() - self._synced_at >= self.options.sync_interval):
+                self.sync()
+            return self.seq
+
+    def sync(self):
+        """Flush appended entries to disk."""
+        with self.lock:
+            os.fsync(self._fd)
+            self._unsynced = 0
+            self._synced_at = time.monotonic()
+
+    def rewrite(self, entries: list):
+        """Atomically replace the log with entries."""
+        with self.lock:
+            temp_path = f'{self.path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as log_file:
+                for entry in entries:
+                    log_file.write(json.dumps(entry) + '\n')
+                log_file.flush()
+                os.fsync(log_file.fileno())
+            os.close(self._fd)
+            os.replace(temp_path, self.path)
+            self._fd = _open_for_append(self.path)
+            self._unsynced = 0
+            self._synced_at = time.monotonic()
+
+    def close(self):
+        """Sync and close the log."""
+        with self.lock:
+            self.sync()
+            os.close(self._fd)
+
+
+class _Replayer(threading.Thread):
+    """Thread replaying a journal every ``interval`` seconds until stopped."""
+
+    def __init__(self, journal, sites: dict, interval: float):
+        super().__init__(name='pysolcast-journal', daemon=True)
+        self.journal = journal
+        self.sites = sites
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.journal.sync()
+            self.journal.replay(self.sites)
+
+    def stop(self):
+        """Stop replaying and wait for the thread to finish."""
+        self._stopped.set()
+        self.join()
+
+
+class MeasurementJournal:
+    """Append-only, disk-backed measurement queue.
+
+    Measurements are appended to a log file and fsynced in batches, every
+    ``sync_every`` appends or ``sync_interval`` seconds. :meth:`replay` posts
+    pending measurements in order through each site's ``post_measurements``
+    and records how far it got, so replay resumes where it left off after a
+    restart. The log is compacted once acknowledged entries reach
+    ``compact_after``.
+
+    Replay may post a measurement again after a crash or partial failure;
+    Solcast stores measurements by site and ``period_end``, so a repeat
+    overwrites rather than duplicates. Entries for sites missing from the
+    ``sites`` given to :meth:`replay` are moved to a dead letter file so
+    they do not hold up the rest.
+    """
+
+    def __init__(self, path: str, options: JournalOptions = None, **kwargs):
+        """Open or create a journal.
+
+        :param path: Directory for the journal files.
+        :param options: Options of the journal. Keyword arguments override its fields.
+        """
+        self.path = path
+        self.logger = logging.getLogger()
+        self._counts = Counter()
+        os.makedirs(path, exist_ok=True)
+        self._log = _Log(os.path.join(path, LOG_FILE),
+                         replace(options or JournalOptions(), **kwargs))
+        self._replay_lock = threading.Lock()
+        self._replayer = None
+        truncated = self._log.open()
+        if truncated:
+            self.logger.info('Truncated %s bytes of an incomplete journal entry in %s', truncated,
+                             self._log.path)
+        acked = self._read_ack()
+        offset = 0
+        self._log.seq = acked
+        for entry, end in self._read_log():
+            self._log.seq = max(self._log.seq, entry['seq'])
+            if entry['seq'] <= acked:
+                offset = end
+        self._ack = Ack(acked, offset)
+
+    @property
+    def options(self) -> JournalOptions:
+        """When the journal syncs and compacts its log."""
+        return self._log.options
+
+    @property
+    def ack(self) -> Ack:
+        """Last acknowledged sequence number and the log offset where its entry ends."""
+        return self._ack
+
+    @property
+    def stats(self) -> dict:
+        """Posted, dropped and error counters of replays."""
+        return {name: self._counts[name] for name in ('posted', 'dropped', 'errors')}
+
+    def _read_ack(self) -> int:
+        """Read the last acknowledged sequence number."""
+        try:
+            with open(os.path.join(self.path, ACK_FILE), encoding='utf-8') as ack_file:
+                return int(ack_file.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _read_log(self, offset: int = 0) -> list:
+        """Read log entries from a byte offset, skipping malformed lines.
+
+        :return: entries: ``(entry, end)`` pairs, ``end`` being the offset after the entry.
+        """
+        entries = []
+        with open(self._log.path, 'rb') as log_file:
+            log_file.seek(offset)
+            for line in log_file:
+                offset += len(line)
+                try:
+                    entries.append((json.loads(line), offset))
+                except ValueError:
+                    self.logger.info('Skipping malformed journal entry in %s', self._log.path)
+        return entries
+
+    def _write_ack(self, seq: int, offset: int):
+        """Atomically record the last acknowledged sequence number and where it ends in the log."""
+        ack_path = os.path.join(self.path, ACK_FILE)
+        temp_path = f'{ack_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as ack_file:
+            ack_file.write(str(seq))
+            ack_file.flush()
+            os.fsync(ack_file.fileno())
+        os.replace(temp_path, ack_path)
+        self._ack = Ack(seq, offset)
+
+    def _dead_letter(self, entries: list):
+        """Move entries that cannot be replayed to the dead letter file."""
+        with open(os.path.join(self.path, DEAD_LETTER_FILE), 'a', encoding='utf-8') as dead_file:
+            for entry in entries:
+                dead_file.write(json.dumps(entry) + '\n')
+            dead_file.flush()
+            os.fsync(dead_file.fileno())
+
+    def append(self, resource_id: str, measurement: dict) -> int:
+        """Append a measurement without waiting on the network.
+
+        :param resource_id: Site resource id.
+        :param measurement: One measurement.
+        :return: seq: Sequence number of the entry.
+        """
+        return self._log.append({'resource_id': resource_id, 'measurement': measurement})
+
+    def sync(self):
+        """Flush appended entries to disk."""
+        self._log.sync()
+
+    def pending(self, limit: int = None) -> list:
+        """Get entries not yet acknowledged, oldest first.
+
+        :param limit: Most entries returned.
+        :return: entries: Dicts with ``seq``, ``resource_id`` and ``measurement``.
+        """
+        return [entry for entry, _ in self._pending(limit)]
+
+    def _pending(self, limit: int = None) -> list:
+        """Read unacknowledged ``(entry, end)`` pairs, from the end of the last acknowledged."""
+        with self._log.lock:
+            entries = [(entry, end) for entry, end in self._read_log(self._ack.offset)
+                       if entry['seq'] > self._ack.seq]
+        return entries[:limit] if limit is not None else entries
+
+    def __len__(self):
+        return len(self.pending())
+
+    def replay(self, sites: dict, batch_size: int = MAX_BATCH_SIZE, limit: int = None) -> int:
+        """Post pending measurements in order.
+
+        Stops at the first connection error, timeout, rate limit, unexpected
+        status or post without a result, and keeps that entry and everything
+        after it pending. Entries rejected by the API for any other reason
+        are dropped, and entries for sites missing from ``sites`` are moved
+        to the dead letter file. Only one replay runs at a time.
+
+        :param sites: Sites with ``post_measurements`` keyed by resource id.
+        :param batch_size: Most measurements sent in one post.
+        :param limit: Most entries replayed in this call.
+        :return: acknowledged: Entries acknowledged by this call.
+        """
+        with self._replay_lock:
+            return self._replay(sites, batch_size, limit)
+
+    def _replay(self, sites: dict, batch_size: int, limit: int) -> int:
+        """Post pending measurements in order, with the replay lock held."""
+        pending = self._pending(limit)
+        if not pending:
+            return 0
+        entries = [entry for entry, _ in pending]
+        by_site = {}
+        for entry in entries:
+            by_site.setdefault(entry['resource_id'], []).append(entry)
+        failed_seq = None
+        for resource_id, site_entries in by_site.items():
+            site = sites.get(resource_id)
+            if site is None:
+                self.logger.info('Dead lettering measurements for unknown site %s', resource_id)
+                self._dead_letter(site_entries)
+                self._counts['dropped'] += len(site_entries)
+                continue
+            failed_seq = self._post_site(site, site_entries, batch_size, failed_seq)
+        acked = entries[-1]['seq'] if failed_seq is None else failed_seq - 1
+        with self._log.lock:
+            previous = self._ack.seq
+            if acked > previous:
+                self._write_ack(acked, max(end for entry, end in pending if entry['seq'] <= acked))
+            compacted = self._ack.seq - self._compacted_through()
+            if self._ack.seq and compacted >= self.options.compact_after:
+                self.compact()
+        return len([entry for entry in entries if previous < entry['seq'] <= acked])
+
+    def _post_site(self, site, site_entries: list, batch_size: int, failed_seq: int) -> int:
+        """Post one site's entries in batches, returning the earliest sequence number to retry."""
+        resource_id = site_entries[0]['resource_id']
+        for start in range(0, len(site_entries), batch_size):
+            batch = site_entries[start:start + batch_size]
+            if failed_seq is not None and batch[0]['seq'] > failed_seq:
+                break
+            try:
+                result = site.post_measurements(
+                    {'measurements': [entry['measurement'] for entry in batch]})
+            except RETRY_ERRORS as error:
+                self.logger.info('Error replaying measurements for %s: %s', resource_id, error)
+                self._counts['errors'] += 1
+                return _earliest(failed_seq, batch[0]['seq'])
+            except REQUEST_ERRORS as error:
+                self.logger.info('Dropping measurements for %s: %s', resource_id, error)
+                self._counts['errors'] += 1
+                self._counts['dropped'] += len(batch)
+                continue
+            if result is None:
+                self.logger.info('No result replaying measurements for %s', resource_id)
+                self._counts['errors'] += 1
+                return _earliest(failed_seq, batch[0]['seq'])
+            self._counts['posted'] += len(batch)
+        return failed_seq
+
+    def _compacted_through(self) -> int:
+        """Sequence number before the first entry still in the log."""
+        with open(self._log.path, encoding='utf-8') as log_file:
+            first = log_file.readline()
+        try:
+            return json.loads(first)['seq'] - 1
+        except ValueError:
+            return self._ack.seq
+
+    def compact(self):
+        """Rewrite the log without acknowledged entries."""
+        with self._log.lock:
+            self._log.rewrite([entry for entry, _ in self._read_log(self._ack.offset)
+                               if entry['seq'] > self._ack.seq])
+            self._ack = self._ack._replace(offset=0)
+
+    def start(self, sites: dict, interval: float = 5.0):
+        """Replay pending measurements in a background thread.
+
+        :param sites: Sites with ``post_measurements`` keyed by resource id.
+        :param interval: Seconds between replay attempts.
+        """
+        self._replayer = _Replayer(self, sites, interval)
+        self._replayer.start()
+
+    def stop(self):
+        """Stop background replay."""
+        if self._replayer is not None:
+            self._replayer.stop()
+            self._replayer = None
+
+    def close(self):
+        """Stop background replay and close the log."""
+        self.stop()
+        self._log.close()
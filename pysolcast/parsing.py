@@ -0,0 +1,98 @@
+"""Parsing Module.
+
+Fast parsing of Solcast timestamps and durations, falling back to isodate
+for anything outside the format the API returns.
+"""
+import datetime
+import functools
+import re
+import isodate
+from isodate.tzinfo import UTC
+
+_SOLCAST_DATETIME = re.compile(r'(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)(?:\.(\d+))?Z')
+
+
+def parse_datetime(value: str) -> datetime.datetime:
+    """Parse a Solcast timestamp such as ``2018-01-01T01:00:00.0000000Z``.
+
+    Gives the same result as ``isodate.parse_datetime``, which is used for
+    any other ISO8601 format.
+
+    :param value: ISO8601 timestamp.
+    :return: datetime
+    """
+    match = _SOLCAST_DATETIME.fullmatch(value)
+    if match is None:
+        return isodate.parse_datetime(value)
+    year, month, day, hour, minute, second, fraction = match.groups()
+    try:
+        microsecond = int(fraction[:6].ljust(6, '0')) if fraction else 0
+        return datetime.datetime(int(year), int(month), int(day), int(hour), int(minute),
+                                 int(second), microsecond, tzinfo=UTC)
+    except ValueError:
+        return isodate.parse_datetime(value)
+
+
+@functools.lru_cache(maxsize=256)
+def parse_duration(value: str):
+    """Parse an ISO8601 duration such as ``PT30M``, memoized.
+
+    Responses repeat the same period on every record, so each distinct
+    value is parsed once.
+
+    :param value: ISO8601 duration.
+    :return: duration: ``timedelta``, or ``isodate.Duration`` for years and months.
+    """
+    return isodate.parse_duration(value)
+
+
+def duration_microseconds(period) -> int:
+    """Length of a period in microseconds.
+
+    :param period: ISO8601 duration, ``timedelta`` or ``numpy.timedelta64``.
+    :return: microseconds
+    """
+    if isinstance(period, str):
+        period = parse_duration(period)
+    if isinstance(period, datetime.timedelta):
+        return (period.days * 86400 + period.seconds) * 1000000 + period.microseconds
+    if hasattr(period, 'astype'):
+        period = period.astype('timedelta64[us]').astype('int64')
+    return int(period)
+
+
+def parse_item(item: dict) -> dict:
+    """Convert one record to typed values in place.
+
+    ``period_end`` becomes a ``datetime``, ``period`` a ``timedelta`` and
+    numeric values, including numbers sent as strings such as ``"9.5"``,
+    become ``float``. Other values are left unchanged.
+
+    :param item: Record as returned by the API.
+    :return: item
+    """
+    for key, value in item.items():
+        if key == 'period_end':
+            item[key] = parse_datetime(value)
+        elif key == 'period':
+            item[key] = parse_duration(value)
+        elif isinstance(value, str):
+            try:
+                item[key] = float(value)
+            except ValueError:
+                pass
+        elif isinstance(value, int) and not isinstance(value, bool):
+            item[key] = float(value)
+    return item
+
+
+def parse_response(dic: dict, tld_key: str) -> dict:
+    """Convert every record of a response to typed values in place.
+
+    :param dic: Response data.
+    :param tld_key: Key of the records, e.g. ``forecasts``.
+    :return: dic
+    """
+    for item in dic.get(tld_key, ()):
+        parse_item(item)
+    return dic
@@ -0,0 +1,290 @@
+"""Probabilistic Module.
+
+Fleet-level quantiles from per-site P10, P50 and P90 forecasts, allowing
+for correlation between sites. Requires the ``numpy`` extra.
+"""
+import math
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from statistics import NormalDist
+from pysolcast.columnar import ColumnarSeries, np, require_numpy
+
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+DEFAULT_CHUNK_SIZE = 4096
+ANALYTIC = 'analytic'
+SAMPLE = 'sample'
+
+# Standard normal quantile of 0.9, so P10 and P90 sit this many standard deviations from P50.
+Z90 = NormalDist().inv_cdf(0.9)
+
+_Spread = namedtuple('_Spread', 'median low high weights')
+
+
+class FactorCorrelation:
+    """Correlation between sites from shared factors.
+
+    Each site's error is a mix of a factor shared by the whole fleet, a
+    factor shared by its group and its own independent part. Two sites in
+    the same group are correlated by ``within`` and two sites in different
+    groups by ``between``. Costs grow with the number of sites, not their
+    square.
+    """
+
+    def __init__(self, within: float = 0.0, between: float = None, labels=None):
+        """Create a correlation model.
+
+        :param within: Correlation of sites in the same group.
+        :param between: Correlation of sites in different groups. Defaults to ``within``.
+        :param labels: Group label of each site, in site order. Without labels every site is in
+            one group.
+        :raises ValueError: Correlations outside ``0 <= between <= within <= 1``.
+        """
+        between = within if between is None else between
+        if not 0.0 <= between <= within <= 1.0:
+            raise ValueError(f'Correlations must satisfy 0 <= between <= within <= 1: '
+                             f'{between}, {within}')
+        self.within = within
+        self.between = between
+        if labels is None:
+            self.codes, self.groups = None, 0
+        else:
+            names, codes = np.unique(np.asarray(labels, dtype=object).astype(str),
+                                     return_inverse=True)
+            self.codes, self.groups = codes.reshape(-1), len(names)
+
+    def __repr__(self):
+        return (f'{type(self).__name__}(within={self.within}, between={self.between}, '
+                f'groups={self.groups})')
+
+    @property
+    def loadings(self) -> tuple:
+        """Weights of the fleet factor, the group factor and the independent part."""
+        group = math.sqrt(self.within - self.between) if self.codes is not None else 0.0
+        fleet = math.sqrt(self.between if self.codes is not None else self.within)
+        return fleet, group, math.sqrt(1.0 - self.within)
+
+    def group_codes(self, start: int, stop: int):
+        """Group of sites start to stop, or ``None`` without groups."""
+        return self.codes[start:stop] if self.codes is not None else None
+
+
+class Independent(FactorCorrelation):
+    """Sites whose errors are independent."""
+
+    def __init__(self):
+        super().__init__(0.0)
+
+
+class Uniform(FactorCorrelation):
+    """Every pair of sites correlated by the same ``rho``."""
+
+    def __init__(self, rho: float):
+        super().__init__(rho)
+
+
+class Grouped(FactorCorrelation):
+    """Sites correlated by ``within`` in a group, e.g. a region, and by ``between`` across
+    groups."""
+
+    def __init__(self, labels, within: float, between: float = 0.0):
+        super().__init__(within, between, labels)
+
+
+@dataclass
+class QuantileOptions:
+    """How :func:`fleet_quantiles` combines the sites.
+
+    :param correlation: Correlation model. Defaults to :class:`Independent`.
+    :param quantiles: Quantiles returned, between 0 and 1.
+    :param method: ``analytic`` or ``sample``.
+    :param samples: Draws per site for the ``sample`` method.
+    :param seed: Seed for the ``sample`` method; the same seed gives the same result for any
+        ``workers``.
+    :param chunk_size: Sites processed together.
+    :param workers: Threads processing chunks. ``None`` uses one per core.
+    """
+
+    correlation: FactorCorrelation = None
+    quantiles: tuple = DEFAULT_QUANTILES
+    method: str = ANALYTIC
+    samples: int = 1000
+    seed: object = None
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    workers: int = 1
+
+
+def _two_piece_normal(p10, p50, p90) -> tuple:
+    """Median and the normal scales below and above it that pass through P10, P50 and P90.
+
+    Missing values contribute nothing and crossed quantiles are treated as
+    no spread on that side.
+    """
+    low = np.maximum(np.nan_to_num(p50 - p10), 0.0) / Z90
+    high = np.maximum(np.nan_to_num(p90 - p50), 0.0) / Z90
+    return np.nan_to_num(p50), low, high
+
+
+def _chunks(count: int, chunk_size: int) -> list:
+    """Site ranges processed together."""
+    return [(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+
+
+def _map(function, chunks: list, workers: int) -> list:
+    """Run function over chunks, on a thread pool when workers is above 1.
+
+    NumPy releases the GIL in array operations and matrix products, so
+    threads run chunks on separate cores without copying the inputs.
+    """
+    if workers is None or workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(function, chunks))
+    return [function(chunk) for chunk in chunks]
+
+
+def _group_sums(values, codes, groups: int):
+    """Sum rows of values by group code."""
+    order = np.argsort(codes, kind='stable')
+    present, starts = np.unique(codes[order], return_index=True)
+    sums = np.zeros((groups, values.shape[1]))
+    sums[present] = np.add.reduceat(values[order], starts, axis=0)
+    return sums
+
+
+def _analytic(spread: _Spread, options: QuantileOptions) -> dict:
+    """Fleet quantiles from the moments of each site's distribution."""
+    correlation = options.correlation
+    fleet_loading, group_loading, own_loading = correlation.loadings
+    # Half of each side's mass lies beyond the median, so the mean shifts by the difference in
+    # scales times E[Z; Z > 0], and the second moment about the median averages the two sides.
+    shift = 1.0 / math.sqrt(2.0 * math.pi)
+
+    def moments(chunk):
+        start, stop = chunk
+        weight = spread.weights[start:stop, None]
+        chunk_low, chunk_high = spread.low[start:stop], spread.high[start:stop]
+        skew = shift * (chunk_high - chunk_low)
+        mean = spread.median[start:stop] + skew
+        scale = weight * np.sqrt((chunk_low ** 2 + chunk_high ** 2) / 2.0 - skew ** 2)
+        codes = correlation.group_codes(start, stop)
+        groups = _group_sums(scale, codes, correlation.groups) if codes is not None else None
+        return (weight * mean).sum(axis=0), scale.sum(axis=0), (scale ** 2).sum(axis=0), groups
+
+    results = _map(moments, _chunks(len(spread.median), options.chunk_size), options.workers)
+    mean = sum(result[0] for result in results)
+    variance = (fleet_loading * sum(result[1] for result in results)) ** 2 \
+        + own_loading ** 2 * sum(result[2] for result in results)
+    if correlation.codes is not None:
+        groups = sum(result[3] for result in results)
+        variance = variance + group_loading ** 2 * (groups ** 2).sum(axis=0)
+    deviation = np.sqrt(variance)
+    return {quantile: mean + NormalDist().inv_cdf(quantile) * deviation
+            for quantile in options.quantiles}
+
+
+def _sample(spread: _Spread, options: QuantileOptions) -> dict:
+    """Fleet quantiles from correlated draws of every site's distribution."""
+    correlation = options.correlation
+    fleet_loading, group_loading, own_loading = correlation.loadings
+    factor_seed, chunk_seed = np.random.SeedSequence(options.seed).spawn(2)
+    factor_rng = np.random.default_rng(factor_seed)
+    fleet_factor = fleet_loading * factor_rng.standard_normal((options.samples, 1))
+    group_factors = group_loading * factor_rng.standard_normal(
+        (options.samples, correlation.groups)) if correlation.codes is not None else None
+    chunks = _chunks(len(spread.median), options.chunk_size)
+    chunk_seeds = chunk_seed.spawn(len(chunks))
+
+    def draw(index):
+        start, stop = chunks[index]
+        rng = np.random.default_rng(chunk_seeds[index])
+        normal = fleet_factor + own_loading * rng.standard_normal((options.samples, stop - start))
+        codes = correlation.group_codes(start, stop)
+        if codes is not None:
+            normal += group_factors[:, codes]
+        weight = spread.weights[start:stop, None]
+        # Each draw is P50 plus the normal scaled by the spread on its side, summed over sites
+        # as products.
+        return (np.minimum(normal, 0.0) @ (weight * spread.low[start:stop])
+                + np.maximum(normal, 0.0) @ (weight * spread.high[start:stop])
+                + (weight * spread.median[start:stop]).sum(axis=0))
+
+    total = sum(_map(draw, range(len(chunks)), options.workers))
+    return dict(zip(options.quantiles, np.quantile(total, options.quantiles, axis=0)))
+
+
+def fleet_quantiles(p10, p50, p90, weights=None, options: QuantileOptions = None,
+                    **kwargs) -> dict:
+    """Quantiles of the weighted fleet total in each period.
+
+    Each site's forecast in each period is taken as a two-piece normal
+    distribution: half a normal below P50 through P10 and half a normal
+    above it through P90. The ``analytic`` method adds up the means and
+    the correlated variances and reads quantiles from a normal
+    distribution, which is fast and accurate for large, weakly correlated
+    fleets. The ``sample`` method draws ``samples`` correlated values per
+    site and reads quantiles from the simulated totals, keeping the skew
+    that strong correlation leaves in the total. Missing values contribute
+    nothing.
+
+    Summing P10 over sites gives the fleet P10 only when every site is
+    perfectly correlated; otherwise it overstates the fleet's spread.
+
+    :param p10: ``(sites, periods)`` array of P10 values, e.g. ``pv_estimate10``.
+    :param p50: ``(sites, periods)`` array of P50 values, e.g. ``pv_estimate``.
+    :param p90: ``(sites, periods)`` array of P90 values, e.g. ``pv_estimate90``.
+    :param weights: ``(sites,)`` array of weights. Defaults to 1.
+    :param options: Correlation and method. Keyword arguments override its fields, e.g.
+        ``correlation`` or ``seed``.
+    :return: quantiles: ``(periods,)`` array by quantile.
+    :raises ValueError: Unknown method or mismatched shapes.
+    """
+    require_numpy()
+    options = replace(options or QuantileOptions(), **kwargs)
+    if options.method not in (ANALYTIC, SAMPLE):
+        raise ValueError(f'Unknown method: {options.method}')
+    p10, p50, p90 = (np.asarray(values, dtype=np.float64) for values in (p10, p50, p90))
+    if not p10.shape == p50.shape == p90.shape or p50.ndim != 2:
+        raise ValueError(f'P10, P50 and P90 must be (sites, periods) arrays of one shape: '
+                         f'{p10.shape}, {p50.shape}, {p90.shape}')
+    weights = np.ones(len(p50)) if weights is None else np.asarray(weights, dtype=np.float64)
+    if options.correlation is None:
+        options.correlation = Independent()
+    codes = options.correlation.codes
+    if codes is not None and len(codes) != len(p50):
+        raise ValueError(f'Correlation has labels for {len(codes)} sites, not {len(p50)}')
+    spread = _Spread(*_two_piece_normal(p10, p50, p90), weights)
+    if options.method == ANALYTIC:
+        return _analytic(spread, options)
+    return _sample(spread, options)
+
+
+def _field_name(quantile: float) -> str:
+    """Forecast field holding a quantile, e.g. ``pv_estimate10`` for 0.1."""
+    percent = round(quantile * 100)
+    return 'pv_estimate' if percent == 50 else f'pv_estimate{percent}'
+
+
+def aggregator_quantiles(aggregator, correlation: FactorCorrelation = None,
+                         **kwargs) -> ColumnarSeries:
+    """Fleet quantiles of the sites held by a :class:`pysolcast.aggregate.FleetAggregator`.
+
+    Uses its ``pv_estimate10``, ``pv_estimate`` and ``pv_estimate90`` rows and
+    site weights. Group labels for :class:`Grouped` come from
+    ``aggregator.site_labels(grouping)``.
+
+    :param aggregator: Aggregator holding the three fields.
+    :param correlation: Correlation model. Defaults to the one in ``options``, or
+        :class:`Independent`.
+    :param kwargs: Passed to :func:`fleet_quantiles`.
+    :return: series: ``pv_estimate`` for the median and ``pv_estimate<percent>`` for other
+        quantiles.
+    """
+    period_end, p10 = aggregator.matrix('pv_estimate10')
+    _, p50 = aggregator.matrix('pv_estimate')
+    _, p90 = aggregator.matrix('pv_estimate90')
+    if correlation is not None:
+        kwargs['correlation'] = correlation
+    result = fleet_quantiles(p10, p50, p90, aggregator.weights, **kwargs)
+    period = np.full(len(period_end), aggregator.period // 1000000, dtype='timedelta64[s]')
+    return ColumnarSeries(period_end, period,
+                          {_field_name(quantile): values for quantile, values in result.items()})
@@ -0,0 +1,247 @@
+"""Rate Limit Module.
+
+Client-side rate limiting shared by site instances.
+"""
+import asyncio
+import contextlib
+import email.utils
+import math
+import multiprocessing
+import threading
+import time
+from collections import namedtuple
+from pysolcast.exceptions import RateLimitExceeded
+
+
+def parse_rate_limit_headers(headers) -> dict:
+    """Parse ``x-rate-limit-*`` response headers.
+
+    :param headers: Response headers.
+    :return: rate_limit: ``limit``, ``remaining`` and ``reset`` (epoch seconds), ``None`` when
+        absent.
+    """
+    parsed = {}
+    for key, header in (('limit', 'x-rate-limit'), ('remaining', 'x-rate-limit-remaining'),
+                        ('reset', 'x-rate-limit-reset')):
+        value = headers.get(header) if headers else None
+        try:
+            parsed[key] = int(float(value)) if value is not None else None
+        except ValueError:
+            parsed[key] = None
+    return parsed
+
+
+def parse_retry_after(headers, now: float = None) -> float:
+    """Parse a ``Retry-After`` response header.
+
+    :param headers: Response headers.
+    :param now: Current time in epoch seconds, for a header sent as an HTTP date.
+    :return: retry_after: Seconds to wait, ``None`` when absent or malformed.
+    """
+    value = headers.get('retry-after') if headers else None
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - (time.time() if now is None else now), 0.0)
+
+
+Clocks = namedtuple('Clocks', ('monotonic', 'wall'), defaults=(time.monotonic, time.time))
+
+# Positions in a rate limiter's state of the bucket, the reactive pause and the reported quota.
+_TOKENS, _UPDATED, _BLOCKED_UNTIL, _LIMIT, _REMAINING, _RESET = range(6)
+_QUOTA = {'limit': _LIMIT, 'remaining': _REMAINING, 'reset': _RESET}
+
+
+class RateLimiter:
+    """Token bucket rate limiter.
+
+    Proactively spaces requests to ``rate`` per second with bursts of up to
+    ``capacity``, and reactively pauses until ``x-rate-limit-reset`` once the
+    API reports the quota is used up. Safe to share across threads and
+    event loops.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1, max_wait: float = None,
+                 clocks: Clocks = None):
+        """Create a rate limiter.
+
+        :param rate: Requests allowed per second.
+        :param capacity: Largest burst of requests.
+        :param max_wait: Raise ``RateLimitExceeded`` instead of waiting longer than this many
+            seconds.
+        :param clocks: Monotonic clock spacing requests and wall clock ``x-rate-limit-reset``
+            is compared to.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self.clocks = clocks or Clocks()
+        self._state = [capacity, self.clocks.monotonic(), 0.0, math.nan, math.nan, math.nan]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def from_limit(cls, limit: int, period: float, **kwargs) -> 'RateLimiter':
+        """Create a rate limiter from a plan limit.
+
+        :param limit: Requests allowed per period.
+        :param period: Period length in seconds, e.g. 86400 for a daily quota.
+        :return: rate_limiter
+        """
+        return cls(limit / period, capacity=kwargs.pop('capacity', 1), **kwargs)
+
+    @property
+    def tokens(self) -> float:
+        """Tokens in the bucket after the last request, negative while requests wait."""
+        return self._state[_TOKENS]
+
+    @property
+    def limit(self) -> int:
+        """Request limit last reported by the API, ``None`` until reported."""
+        return self._quota('limit')
+
+    @property
+    def remaining(self) -> int:
+        """Requests remaining last reported by the API, ``None`` until reported."""
+        return self._quota('remaining')
+
+    @property
+    def reset(self) -> int:
+        """Quota reset time last reported by the API in epoch seconds, ``None`` until reported."""
+        return self._quota('reset')
+
+    def _quota(self, key: str):
+        """Quota value last reported, ``None`` until reported."""
+        value = self._state[_QUOTA[key]]
+        return None if math.isnan(value) else int(value)
+
+    def reserve(self) -> float:
+        """Take a token, returning seconds to wait before using it.
+
+        :return: wait
+        :raises RateLimitExceeded: The wait would exceed ``max_wait``.
+        """
+        with self._lock:
+            state = self._state
+            now = self.clocks.monotonic()
+            state[_TOKENS] = min(self.capacity,
+                                 state[_TOKENS] + (now - state[_UPDATED]) * self.rate)
+            state[_UPDATED] = now
+            wait = max(0.0, -(state[_TOKENS] - 1) / self.rate, state[_BLOCKED_UNTIL] - now)
+            if self.max_wait is not None and wait > self.max_wait:
+                raise RateLimitExceeded(f'Rate limit wait of {wait:.1f}s exceeds max_wait',
+                                        reset=self._reset_time(now))
+            state[_TOKENS] -= 1
+            return wait
+
+    def _reset_time(self, now: float):
+        """Wall-clock time the reactive pause ends, if any."""
+        if self._state[_BLOCKED_UNTIL] <= now:
+            return None
+        return self.clocks.wall() + self._state[_BLOCKED_UNTIL] - now
+
+    def _has_credit(self) -> bool:
+        """Consume a token already reserved by ``acquire_async`` for this thread."""
+        if getattr(self._local, 'credit', 0) > 0:
+            self._local.credit -= 1
+            return True
+        return False
+
+    def acquire(self):
+        """Block until a request may be sent.
+
+        :raises RateLimitExceeded: The wait would exceed ``max_wait``.
+        """
+        if self._has_credit():
+            return
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be sent.
+
+        :raises RateLimitExceeded: The wait would exceed ``max_wait``.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    @contextlib.contextmanager
+    def credit(self, tokens: int = 1):
+        """Let the next ``acquire`` calls on this thread use tokens reserved with ``acquire_async``.
+
+        :param tokens: Number of ``acquire`` calls that do not take a token.
+        """
+        self._local.credit = tokens
+        try:
+            yield
+        finally:
+            self._local.credit = 0
+
+    def update(self, headers, status_code: int = None):
+        """Update the limiter from a response.
+
+        Pauses all callers until ``x-rate-limit-reset`` when the response is a
+        429 or reports no remaining requests. The latest ``limit``,
+        ``remaining`` and ``reset`` reported are kept as attributes.
+
+        :param headers: Response headers.
+        :param status_code: Response status code.
+        """
+        rate_limit = parse_rate_limit_headers(headers)
+        with self._lock:
+            state = self._state
+            for key, value in rate_limit.items():
+                if value is not None:
+                    state[_QUOTA[key]] = value
+            now = self.clocks.monotonic()
+            if rate_limit['remaining'] is not None:
+                state[_TOKENS] = min(state[_TOKENS], rate_limit['remaining'])
+            exhausted = status_code == 429 or rate_limit['remaining'] == 0
+            if exhausted and rate_limit['reset'] is not None:
+                delay = max(0.0, rate_limit['reset'] - self.clocks.wall())
+                state[_BLOCKED_UNTIL] = max(state[_BLOCKED_UNTIL], now + delay)
+
+
+class SharedRateLimiter(RateLimiter):
+    """Token bucket rate limiter shared by processes.
+
+    Holds the bucket, the reactive pause and the quota last reported by the
+    API in shared memory guarded by a process lock, so worker processes
+    started with it draw from one limit and all pause when any of them is
+    told the quota is used up. Pass it to processes when they start, e.g.
+    as a ``ProcessPoolExecutor`` initializer argument. The monotonic clock
+    must be the same in every process; the default ``time.monotonic`` is
+    system-wide.
+    """
+
+    def __init__(self, *args, context=None, **kwargs):
+        """Create a rate limiter.
+
+        Takes the arguments of :class:`RateLimiter`, and:
+
+        :param context: Multiprocessing context or start method name. Defaults to the default
+            context.
+        """
+        super().__init__(*args, **kwargs)
+        if context is None or isinstance(context, str):
+            context = multiprocessing.get_context(context)
+        self._state = context.Array('d', self._state)
+        self._lock = self._state.get_lock()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_local']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
@@ -0,0 +1,72 @@
+"""Records Module.
+
+Compact, tuple-backed records as an alternative to one dict per period.
+"""
+import sys
+from collections import namedtuple
+from pysolcast.parsing import parse_item
+
+_record_types = {}
+
+
+def record_type(fields: tuple) -> type:
+    """Get the record class for a set of fields.
+
+    Classes are named tuples, so records carry no per-instance ``__dict__``.
+    One class is created per distinct set of fields and reused.
+
+    :param fields: Field names in order.
+    :return: record_class
+    """
+    fields = tuple(fields)
+    cls = _record_types.get(fields)
+    if cls is None:
+        cls = namedtuple('Record', fields, rename=True)
+        _record_types[fields] = cls
+    return cls
+
+
+def _intern(value):
+    """Intern repeated strings so records share one copy."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def to_records(items: list) -> list:
+    """Convert records to compact typed records.
+
+    Values are parsed as by :func:`pysolcast.parsing.parse_item`. Durations
+    are memoized and strings interned, so repeated values such as ``period``
+    are stored once. Fields missing from a record are ``None``.
+
+    :param items: Records as returned by the API.
+    :return: records
+    """
+    fields = {}
+    for item in items:
+        for key in item:
+            fields.setdefault(key, None)
+    cls = record_type(fields)
+    return [cls(*[_intern(parsed.get(key)) for key in fields]) for parsed in map(parse_item, items)]
+
+
+def to_records_response(dic: dict, tld_key: str) -> dict:
+    """Convert the records of a response to compact typed records.
+
+    :param dic: Response data.
+    :param tld_key: Key of the records, e.g. ``forecasts``.
+    :return: dic: Same response with the records replaced.
+    """
+    dic[tld_key] = to_records(dic.get(tld_key, []))
+    return dic
+
+
+def records_key(data: dict) -> str:
+    """Find the key of the records in a response, e.g. ``forecasts``.
+
+    :param data: Response data.
+    :return: tld_key: ``None`` when the response has no list of records.
+    """
+    for key, value in data.items():
+        if isinstance(value, list):
+            return key
+    return None
@@ -0,0 +1,151 @@
+"""Resample Module.
+
+Local resampling of forecast, estimated actuals and radiation series to
+coarser or finer periods, so one API call serves every resolution.
+Requires the ``numpy`` extra.
+"""
+from collections import namedtuple
+from pysolcast.columnar import ColumnarSeries, np, require_numpy
+from pysolcast.parsing import duration_microseconds
+
+MEAN = 'mean'
+SUM = 'sum'
+
+_Pieces = namedtuple('_Pieces', 'inverse overlap share count')
+
+
+def _group(bins) -> tuple:
+    """Distinct output periods and the position of each piece among them.
+
+    Counts over the span of periods instead of sorting when the span is
+    not much longer than the data.
+    """
+    if len(bins) == 0:
+        return bins, bins
+    lowest = bins.min()
+    span = int(bins.max() - lowest) + 1
+    if span > 4 * len(bins):
+        periods, inverse = np.unique(bins, return_inverse=True)
+        return periods, inverse.reshape(-1)
+    present = np.bincount(bins - lowest, minlength=span) > 0
+    positions = np.cumsum(present) - 1
+    return np.flatnonzero(present) + lowest, positions[bins - lowest]
+
+
+def _split(series: ColumnarSeries, target: int) -> tuple:
+    """Split records into pieces at the boundaries of output periods.
+
+    :param series: Series to resample.
+    :param target: Output period in microseconds.
+    :return: record, periods, pieces: Record of each piece, ``None`` when every record is
+        one piece, the output periods since the epoch and the pieces.
+    """
+    end = np.asarray(series.period_end, dtype='datetime64[us]').view(np.int64)
+    length = np.asarray(series.period, dtype='timedelta64[us]').view(np.int64)
+    start = end - length
+    first = start // target
+    counts = np.maximum(-(-end // target) - first, 0)
+    if (counts == 1).all():
+        record, bins = None, first
+    else:
+        record = np.repeat(np.arange(len(end)), counts)
+        offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        bins = first[record] + np.arange(len(record)) - offsets
+        start, end, length = start[record], end[record], length[record]
+    overlap = (np.minimum(end, (bins + 1) * target)
+               - np.maximum(start, bins * target)).astype(np.float64)
+    periods, inverse = _group(bins)
+    return record, periods, _Pieces(inverse, overlap, overlap / length, len(periods))
+
+
+def _aggregate(method: str, values, pieces: _Pieces, coverage):
+    """Time-weighted mean or overlap-shared sum of pieces per output period.
+
+    Pieces without a value are left out, and ``coverage`` is only used when every piece has one.
+    """
+    missing = np.isnan(values)
+    if missing.any():
+        valid = ~missing
+        values = values[valid]
+        pieces = pieces._replace(inverse=pieces.inverse[valid], overlap=pieces.overlap[valid],
+                                 share=pieces.share[valid])
+        coverage = np.bincount(pieces.inverse, pieces.overlap, pieces.count)
+    if method == SUM:
+        return np.where(coverage > 0, np.bincount(pieces.inverse, values * pieces.share,
+                                                  pieces.count), np.nan)
+    return np.divide(np.bincount(pieces.inverse, values * pieces.overlap, pieces.count), coverage,
+                     out=np.full(pieces.count, np.nan), where=coverage > 0)
+
+
+def resample(series: ColumnarSeries, period, how: dict = None,
+             min_coverage: float = 0.0) -> ColumnarSeries:
+    """Resample a series to a new period.
+
+    Each record covers ``period`` up to its ``period_end``, and output
+    periods end on multiples of ``period`` since the epoch, so ``PT60M``
+    periods end on the hour. Every record is split over the output periods
+    it overlaps. By default fields are averaged weighted by the time each
+    record covers within the output period, which suits power and
+    irradiance. Fields listed as ``sum`` in ``how``, such as energy, are
+    summed with each record's value shared out in proportion to the
+    overlap, so resampling to a finer period splits it evenly.
+
+    ``nan`` values are ignored; an output period with no values is ``nan``.
+    Fields that are not numeric are dropped.
+
+    :param series: Series to resample, e.g. from
+        :class:`pysolcast.columnar.ColumnarSeries.from_response`.
+    :param period: New period as an ISO8601 duration, ``timedelta`` or ``timedelta64``.
+    :param how: ``mean`` or ``sum`` by field name. Fields not listed are averaged.
+    :param min_coverage: Fraction of an output period the records must cover, or it is dropped.
+    :return: series
+    :raises ValueError: Unknown aggregation in ``how`` or a period that is not positive.
+    """
+    require_numpy()
+    how = how or {}
+    for name, method in how.items():
+        if method not in (MEAN, SUM):
+            raise ValueError(f'Unknown aggregation for {name}: {method}')
+    target = duration_microseconds(period)
+    if target <= 0:
+        raise ValueError(f'Period must be positive: {period}')
+    record, periods, pieces = _split(series, target)
+    coverage = np.bincount(pieces.inverse, pieces.overlap, pieces.count)
+    keep = coverage >= min_coverage * target
+    fields = {}
+    for name, values in series.fields.items():
+        if values.dtype == np.float64:
+            values = np.asarray(values) if record is None else np.asarray(values)[record]
+            fields[name] = _aggregate(how.get(name, MEAN), values, pieces, coverage)[keep]
+    period_end = ((periods[keep] + 1) * target).view('datetime64[us]')
+    return ColumnarSeries(period_end, np.full(len(period_end), target // 1000000,
+                                              dtype='timedelta64[s]'), fields)
+
+
+def resample_response(dic: dict, tld_key: str, period, how: dict = None,
+                      min_coverage: float = 0.0) -> ColumnarSeries:
+    """Resample the records of a raw or parsed response.
+
+    :param dic: Response data.
+    :param tld_key: Key of the records, e.g. ``forecasts``.
+    :param period: New period as an ISO8601 duration, ``timedelta`` or ``timedelta64``.
+    :param how: ``mean`` or ``sum`` by field name. Fields not listed are averaged.
+    :param min_coverage: Fraction of an output period the records must cover, or it is dropped.
+    :return: series
+    """
+    return resample(ColumnarSeries.from_response(dic, tld_key), period, how, min_coverage)
+
+
+def to_energy(series: ColumnarSeries, fields=None) -> ColumnarSeries:
+    """Convert average power over each period to energy, e.g. kW to kWh.
+
+    :param series: Series of power values.
+    :param fields: Fields converted. Defaults to every numeric field.
+    :return: series: Converted fields, to resample with ``sum``.
+    """
+    require_numpy()
+    hours = np.asarray(series.period, dtype='timedelta64[s]').astype(np.float64) / 3600
+    names = fields if fields is not None else [name for name, values in series.fields.items()
+                                               if values.dtype == np.float64]
+    return ColumnarSeries(series.period_end, series.period,
+                          {name: series.fields[name] * hours for name in names})
@@ -1,8 +1,8 @@
 """Rooftop Site Module."""
-from pysolcast.base import PySolcast, parse_date_time
+from pysolcast.base import EstimatedActualsSite
 
 
-class RooftopSite(PySolcast):
+class RooftopSite(EstimatedActualsSite):
     """Class for interacting with Legacy Rooftop sites.
 
     Refer to https://docs.solcast.com.au/#58ca9bc0-27d4-4418-937f-03986331f01d for more information.
@@ -23,23 +23,24 @@ class RooftopSite(PySolcast):
     def get_forecasts_parsed(self, params: dict = None) -> dict:
         """Get forecasts data for site.
 
-        :return: forecasts: Date is parsed as a datetime object.
+        :return: forecasts: Dates and durations are parsed to datetime and timedelta.
         :raises ValidationError:
         :raises SiteError:
         """
         endpoint = 'forecasts'
-        forecasts = self._get_data(self._create_uri(self.base_uri, endpoint), params)
-        return parse_date_time(forecasts, endpoint)
+        return self._parse(self.get_forecasts(params), endpoint)
 
-    def get_estimated_actuals(self) -> dict:
-        """Get estimated actuals data for site.
+    def stream_forecasts(self, params: dict = None, parse: bool = False):
+        """Stream forecasts for site one record at a time.
 
-        :return: estimated_actuals:
+        :param parse: Parse dates and durations of records as they arrive.
+        :return: forecasts: Iterator of records.
         :raises ValidationError:
         :raises SiteError:
         """
-        endpoint = 'estimated_actuals'
-        return self._get_data(self._create_uri(self.base_uri, endpoint))
+        endpoint = 'forecasts'
+        return self._stream_data(self._create_uri(self.base_uri, endpoint), endpoint, params,
+                                 parse=parse)
 
     def post_measurements(self, data: dict) -> dict:
         """Post measurement data for site.
@@ -0,0 +1,563 @@
+"""Scheduler Module.
+
+Long-running polling of a fleet's sites, spread across the day to stay
+within the API quota, with results written to a pluggable sink.
+"""
+import argparse
+import datetime
+import functools
+import heapq
+import importlib
+import json
+import logging
+import os
+import signal
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import Callable
+from urllib.parse import quote
+import anyconfig
+from pysolcast.base import REQUEST_ERRORS
+from pysolcast.exceptions import RateLimitExceeded
+from pysolcast.ratelimit import RateLimiter
+from pysolcast.rooftop import RooftopSite
+from pysolcast.session import get_default_session
+from pysolcast.store import TimeSeriesStore
+from pysolcast.utility import UtilitySite
+from pysolcast.weather import WeatherSite
+from pysolcast.world import World
+
+DAY = 86400
+DEFAULT_QUOTA = 10
+DEFAULT_MIN_INTERVAL = 900.0
+DEFAULT_RETRY = 60.0
+SITE_TYPES = {'rooftop': RooftopSite, 'utility': UtilitySite, 'weather': WeatherSite}
+
+# Errors of a failed poll that the job is retried after: API and transport errors, a sink that
+# could not be written and a response that could not be decoded.
+JOB_ERRORS = REQUEST_ERRORS + (OSError, ValueError)
+
+
+@dataclass(repr=False, eq=False)
+class Job:
+    """One endpoint of one site, polled by the scheduler.
+
+    :param name: Site resource id, or a name for a World location.
+    :param fetch: Callable returning response data.
+    :param endpoint: Endpoint name passed to the sink.
+    :param weight: Share of the quota relative to other jobs.
+    :raises ValueError: Weight is not positive.
+    """
+
+    name: str
+    fetch: Callable
+    endpoint: str = 'forecasts'
+    weight: float = 1.0
+    due: float = field(default=None, init=False)
+    last_run: float = field(default=None, init=False)
+    counts: Counter = field(default_factory=Counter, init=False)
+
+    def __post_init__(self):
+        if self.weight <= 0:
+            raise ValueError(f'Weight of {self.name} must be positive: {self.weight}')
+
+    def __repr__(self):
+        return f'Job(name={self.name!r}, endpoint={self.endpoint!r}, weight={self.weight})'
+
+
+class JsonLinesSink:
+    """Append each result as one JSON line to a file.
+
+    The file is opened for each result, so it can be rotated while polling.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, name: str, endpoint: str, data: dict, fetched_at: float):
+        """Write a result.
+
+        :param name: Job name.
+        :param endpoint: Endpoint name.
+        :param data: Response data.
+        :param fetched_at: Fetch time in epoch seconds.
+        """
+        line = json.dumps({'name': name, 'endpoint': endpoint, 'fetched_at': fetched_at,
+                           'data': data})
+        with self._lock, open(self.path, 'a', encoding='utf-8') as lines_file:
+            lines_file.write(line + '\n')
+
+    def close(self):
+        """Nothing to close."""
+
+
+class DirectorySink:
+    """Keep the latest result of each job as ``<path>/<name>/<endpoint>.json``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, name: str, endpoint: str, data: dict, fetched_at: float):
+        """Atomically replace a job's file with the latest result.
+
+        :param name: Job name.
+        :param endpoint: Endpoint name.
+        :param data: Response data.
+        :param fetched_at: Fetch time in epoch seconds.
+        """
+        directory = os.path.join(self.path, quote(name, safe=''))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{quote(endpoint, safe='')}.json")
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as result_file:
+            json.dump({'fetched_at': fetched_at, 'data': data}, result_file)
+        os.replace(temp_path, path)
+
+    def close(self):
+        """Nothing to close."""
+
+
+class StoreSink:
+    """Append each result to a :class:`pysolcast.store.TimeSeriesStore`.
+
+    Requires the ``numpy`` extra.
+    """
+
+    def __init__(self, path: str = None, store: TimeSeriesStore = None):
+        self.store = store if store is not None else TimeSeriesStore(path)
+
+    def write(self, name: str, endpoint: str, data: dict, fetched_at: float):
+        """Append a result as a run.
+
+        :param name: Job name.
+        :param endpoint: Endpoint name.
+        :param data: Response data.
+        :param fetched_at: Fetch time in epoch seconds.
+        """
+        self.store.append(name, endpoint, data, fetched_at=fetched_at)
+
+    def close(self):
+        """Nothing to close."""
+
+
+class CallbackSink:
+    """Pass each result to a callable taking ``(name, endpoint, data, fetched_at)``."""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def write(self, name: str, endpoint: str, data: dict, fetched_at: float):
+        """Call the callback with a result."""
+        self.callback(name, endpoint, data, fetched_at)
+
+    def close(self):
+        """Nothing to close."""
+
+
+SINKS = {'jsonl': JsonLinesSink, 'directory': DirectorySink, 'store': StoreSink}
+
+
+def load_sink(config: dict):
+    """Build a sink from its configuration.
+
+    :param config: ``type`` is ``jsonl``, ``directory``, ``store`` or an import path such as
+        ``mypackage.sinks:KafkaSink``; other keys are passed to the sink's constructor.
+    :return: sink
+    :raises ValueError: Unknown sink type.
+    """
+    config = dict(config)
+    sink_type = config.pop('type', 'jsonl')
+    if sink_type in SINKS:
+        return SINKS[sink_type](**config)
+    if ':' not in sink_type:
+        raise ValueError(f'Unknown sink type: {sink_type}')
+    module, name = sink_type.split(':', 1)
+    return getattr(importlib.import_module(module), name)(**config)
+
+
+def _next_utc_midnight(now: float) -> float:
+    """Epoch seconds of the next UTC midnight."""
+    return (now // DAY + 1) * DAY
+
+
+@dataclass
+class SchedulerOptions:
+    """How a scheduler spends its quota.
+
+    :param quota: Requests allowed per quota period, normally a day.
+    :param reserve: Fraction of the quota left unused.
+    :param min_interval: Fewest seconds between runs of one job.
+    :param rate_limiter: Limiter shared by the jobs' sites, read for the quota the API reports.
+    :param stagger: Spread first runs over each job's interval instead of running every job at
+        once.
+    :param clock: Clock in epoch seconds.
+    """
+
+    quota: int = DEFAULT_QUOTA
+    reserve: float = 0.0
+    min_interval: float = DEFAULT_MIN_INTERVAL
+    rate_limiter: RateLimiter = None
+    stagger: bool = True
+    clock: Callable = time.time
+
+
+@dataclass
+class _Schedule:
+    """Queue of due jobs and the quota period being counted.
+
+    ``queue`` is ``None`` until the first runs are queued.
+    """
+
+    queue: list = None
+    period_end: float = None
+    running: bool = False
+
+
+class Scheduler:
+    """Poll jobs at intervals that spread the remaining quota over the day.
+
+    The requests left until the quota resets are shared between jobs in
+    proportion to their weights, so a job's interval is the total weight
+    over its weight, divided by the request rate the quota allows. The
+    interval is recomputed at every run from the quota still remaining,
+    so unused requests are spread over the rest of the day and overuse
+    slows polling down. No job runs more often than ``min_interval``.
+
+    The quota resets at ``x-rate-limit-reset`` when the shared rate
+    limiter has seen it, and at UTC midnight otherwise. ``reserve`` keeps
+    a fraction of the quota back for other callers.
+
+    First runs are staggered over each job's interval so a fleet does not
+    poll all at once on start.
+    """
+
+    def __init__(self, jobs: list, sink, options: SchedulerOptions = None, **kwargs):
+        """Create a scheduler.
+
+        :param jobs: Jobs to poll.
+        :param sink: Object with ``write(name, endpoint, data, fetched_at)`` and ``close()``.
+        :param options: Options of the scheduler. Keyword arguments override its fields.
+        """
+        self.jobs = list(jobs)
+        self.sink = sink
+        self.options = replace(options or SchedulerOptions(), **kwargs)
+        self.logger = logging.getLogger()
+        self._counts = Counter()
+        self._schedule = _Schedule()
+        self._condition = threading.Condition()
+
+    @property
+    def total_weight(self) -> float:
+        """Sum of job weights."""
+        return sum(job.weight for job in self.jobs)
+
+    def reset_at(self, now: float = None) -> float:
+        """Time the quota next resets, in epoch seconds."""
+        now = self.options.clock() if now is None else now
+        reset = getattr(self.options.rate_limiter, 'reset', None)
+        if reset is not None and reset > now:
+            return float(reset)
+        return _next_utc_midnight(now)
+
+    def _roll_period(self, now: float):
+        """Start counting afresh once the quota has reset."""
+        schedule = self._schedule
+        if schedule.period_end is None or now >= schedule.period_end:
+            if schedule.period_end is not None:
+                self._counts['quota_used'] = 0
+            schedule.period_end = self.reset_at(now)
+
+    def remaining(self, now: float = None) -> int:
+        """Requests left in the quota period, less the reserve.
+
+        :param now: Time in epoch seconds. Defaults to now.
+        :return: remaining
+        """
+        options = self.options
+        now = options.clock() if now is None else now
+        self._roll_period(now)
+        remaining = options.quota - self._counts['quota_used']
+        reported = getattr(options.rate_limiter, 'remaining', None)
+        reset = getattr(options.rate_limiter, 'reset', None)
+        if reported is not None and reset is not None and reset > now:
+            remaining = min(remaining, reported)
+        return max(0, int(remaining - options.reserve * options.quota))
+
+    def interval(self, job: Job, now: float = None) -> float:
+        """Seconds until a job should run again.
+
+        :param job: Job.
+        :param now: Time in epoch seconds. Defaults to now.
+        :return: interval
+        """
+        now = self.options.clock() if now is None else now
+        remaining = self.remaining(now)
+        seconds_left = max(self._schedule.period_end - now, 1.0)
+        min_interval = self.options.min_interval
+        if not remaining:
+            return max(min_interval, seconds_left)
+        return max(min_interval, self.total_weight * seconds_left / (remaining * job.weight))
+
+    def _queue(self, job: Job, due: float):
+        """Queue a job's next run."""
+        job.due = due
+        heapq.heappush(self._schedule.queue, (due, id(job), job))
+
+    def _start(self, now: float):
+        """Queue every job's first run."""
+        self._schedule.queue = []
+        for job in self.jobs:
+            phase = zlib.crc32(f'{job.name}/{job.endpoint}'.encode()) / 2 ** 32 \
+                if self.options.stagger else 0.0
+            self._queue(job, now + phase * self.interval(job, now))
+
+    def add(self, job: Job):
+        """Add a job while running; it first runs now.
+
+        :param job: Job.
+        """
+        with self._condition:
+            self.jobs.append(job)
+            if self._schedule.queue is not None:
+                self._queue(job, self.options.clock())
+                self._condition.notify()
+
+    def _retry_delay(self, job: Job, now: float) -> float:
+        """Seconds before retrying a job, doubled on each failure in a row up to its interval."""
+        return min(DEFAULT_RETRY * 2 ** (job.counts['failures'] - 1), self.interval(job, now))
+
+    def _run_job(self, job: Job, now: float):
+        """Run a job, write its result and queue its next run."""
+        self._roll_period(now)
+        counts = self._counts
+        lag = max(0.0, now - job.due)
+        counts['lag_last'] = lag
+        counts['lag_max'] = max(counts['lag_max'], lag)
+        counts['lag_total'] += lag
+        counts['requests'] += 1
+        counts['quota_used'] += 1
+        job.last_run = now
+        try:
+            data = job.fetch()
+            self.sink.write(job.name, job.endpoint, data, now)
+        except RateLimitExceeded as error:
+            counts['errors'] += 1
+            job.counts['errors'] += 1
+            self.logger.info('Rate limited polling %s %s: %s', job.name, job.endpoint, error)
+            self._queue(job, max(float(error.reset or 0), now + DEFAULT_RETRY))
+            return
+        except JOB_ERRORS as error:
+            counts['errors'] += 1
+            job.counts['errors'] += 1
+            job.counts['failures'] += 1
+            self.logger.info('Error polling %s %s: %s', job.name, job.endpoint, error)
+            self._queue(job, now + self._retry_delay(job, now))
+            return
+        job.counts['runs'] += 1
+        job.counts['failures'] = 0
+        self._queue(job, now + self.interval(job, now))
+
+    def run_pending(self, now: float = None) -> int:
+        """Run every job that is due.
+
+        :param now: Time in epoch seconds. Defaults to now.
+        :return: runs: Jobs run.
+        """
+        runs = 0
+        while True:
+            with self._condition:
+                now_run = self.options.clock() if now is None else now
+                if self._schedule.queue is None:
+                    self._start(now_run)
+                queue = self._schedule.queue
+                if not queue or queue[0][0] > now_run:
+                    return runs
+                _, _, job = heapq.heappop(queue)
+            self._run_job(job, now_run)
+            runs += 1
+
+    def run_once(self) -> int:
+        """Run every job once, now, ignoring the schedule.
+
+        :return: runs: Jobs run.
+        """
+        now = self.options.clock()
+        with self._condition:
+            self._schedule.queue = []
+            for job in self.jobs:
+                job.due = now
+        for job in list(self.jobs):
+            self._run_job(job, self.options.clock())
+        return len(self.jobs)
+
+    def run(self, on_tick=None, tick: float = 60.0):
+        """Poll until :meth:`stop` is called.
+
+        :param on_tick: Called with the scheduler every ``tick`` seconds, e.g. to publish metrics.
+        :param tick: Seconds between ``on_tick`` calls.
+        """
+        with self._condition:
+            self._schedule.running = True
+        next_tick = self.options.clock()
+        while True:
+            self.run_pending()
+            now = self.options.clock()
+            if on_tick is not None and now >= next_tick:
+                on_tick(self)
+                next_tick = now + tick
+            with self._condition:
+                if not self._schedule.running:
+                    return
+                queue = self._schedule.queue
+                next_due = queue[0][0] if queue else now + tick
+                self._condition.wait(
+                    max(0.0, min(next_due, next_tick if on_tick else next_due) - now))
+                if not self._schedule.running:
+                    return
+
+    def stop(self):
+        """Stop :meth:`run` after the job in progress."""
+        with self._condition:
+            self._schedule.running = False
+            self._condition.notify_all()
+
+    @property
+    def stats(self) -> dict:
+        """Request, error, quota and scheduling lag metrics."""
+        now = self.options.clock()
+        remaining = self.remaining(now)
+        counts, quota = self._counts, self.options.quota
+        with self._condition:
+            queue = self._schedule.queue or []
+            overdue = [now - due for due, _, _ in queue if due < now]
+            next_due = queue[0][0] - now if queue else None
+        return {
+            'jobs': len(self.jobs),
+            'requests': counts['requests'],
+            'errors': counts['errors'],
+            'quota': quota,
+            'quota_used': counts['quota_used'],
+            'quota_remaining': remaining,
+            'quota_used_fraction': counts['quota_used'] / quota if quota else 0.0,
+            'quota_reset_in': self._schedule.period_end - now,
+            'lag_last': counts['lag_last'],
+            'lag_mean': counts['lag_total'] / counts['requests'] if counts['requests'] else 0.0,
+            'lag_max': counts['lag_max'],
+            'overdue': len(overdue),
+            'overdue_max': max(overdue, default=0.0),
+            'next_due_in': next_due,
+        }
+
+    def close(self):
+        """Stop polling and close the sink."""
+        self.stop()
+        self.sink.close()
+
+
+def _site_jobs(config: dict, api_key: str, session, rate_limiter: RateLimiter,
+               world: World) -> list:
+    """Build the jobs of one site definition."""
+    site_type = config.get('type', 'rooftop')
+    endpoints = config.get('endpoints') or [config.get('endpoint', 'forecasts')]
+    params = config.get('params') or {}
+    if site_type == 'world':
+        site, name = world, config['name']
+    elif site_type in SITE_TYPES:
+        name = config['resource_id']
+        site = SITE_TYPES[site_type](api_key, name, session=session, rate_limiter=rate_limiter)
+    else:
+        raise ValueError(f'Unknown site type: {site_type}')
+    return [Job(config.get('name', name),
+                functools.partial(getattr(site, f'get_{endpoint}'), **params),
+                endpoint, float(config.get('weight', 1.0))) for endpoint in endpoints]
+
+
+def from_config(config: dict, session=None, clock=time.time) -> Scheduler:
+    """Build a scheduler from a fleet definition.
+
+    The definition has ``api_key`` (or the ``SOLCAST_API_KEY`` environment
+    variable), ``quota``, optional ``reserve`` and ``min_interval``, a
+    ``sink`` as for :func:`load_sink`, and ``sites``. Each site
+    has a ``type`` (``rooftop``, ``utility``, ``weather`` or ``world``), a
+    ``resource_id`` (or ``name`` for World locations), ``endpoint`` or
+    ``endpoints``, ``weight`` and ``params`` passed as keyword arguments to
+    the ``get_<endpoint>`` method, e.g. ``{period: PT30M, hours: 48}``.
+
+    :param config: Fleet definition.
+    :param session: Session shared by the sites. Defaults to the shared pool.
+    :return: scheduler
+    :raises ValueError: No API key or an unknown site or sink type.
+    """
+    api_key = config.get('api_key') or os.environ.get('SOLCAST_API_KEY')
+    if not api_key:
+        raise ValueError('api_key is required in the fleet definition or SOLCAST_API_KEY')
+    quota = int(config.get('quota', DEFAULT_QUOTA))
+    session = session or get_default_session()
+    # The scheduler spreads the quota itself, so the limiter only tracks what the API reports.
+    # With max_wait=0 it raises instead of pausing, and the job is rescheduled at the reset.
+    rate_limiter = RateLimiter(max(quota, 1), capacity=max(quota, 1), max_wait=0)
+    world = World(api_key, session=session, rate_limiter=rate_limiter)
+    jobs = []
+    for site in config.get('sites', []):
+        jobs.extend(_site_jobs(site, api_key, session, rate_limiter, world))
+    sink = load_sink(config.get('sink', {'type': 'jsonl', 'path': 'pysolcast.jsonl'}))
+    return Scheduler(jobs, sink, quota=quota,
+                     reserve=float(config.get('reserve', 0.0)),
+                     min_interval=float(config.get('min_interval', DEFAULT_MIN_INTERVAL)),
+                     rate_limiter=rate_limiter, clock=clock)
+
+
+def write_metrics(path: str, stats: dict):
+    """Atomically write metrics as JSON.
+
+    :param path: File path.
+    :param stats: Metrics, e.g. :attr:`Scheduler.stats`.
+    """
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as metrics_file:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        json.dump({**stats, 'time': now.isoformat()}, metrics_file)
+    os.replace(temp_path, path)
+
+
+def main(argv: list = None) -> int:
+    """Run the scheduler from the command line.
+
+    :param argv: Arguments. Defaults to ``sys.argv``.
+    :return: exit_code
+    """
+    parser = argparse.ArgumentParser(
+        description='Poll a fleet of Solcast sites within the API quota.')
+    parser.add_argument('config',
+                        help='Fleet definition in any format anyconfig reads, e.g. JSON or YAML.')
+    parser.add_argument('--once', action='store_true', help='Poll every site once and exit.')
+    parser.add_argument('--metrics-file',
+                        help='Write metrics as JSON to this file every --metrics-interval.')
+    parser.add_argument('--metrics-interval', type=float, default=60.0)
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, format='%(asctime)s %(levelname)s %(message)s')
+    scheduler = from_config(anyconfig.load(args.config))
+
+    def publish(current: Scheduler):
+        stats = current.stats
+        logging.getLogger().info('Scheduler metrics: %s', json.dumps(stats))
+        if args.metrics_file:
+            write_metrics(args.metrics_file, stats)
+
+    try:
+        if args.once:
+            scheduler.run_once()
+            publish(scheduler)
+            return 1 if scheduler.stats['errors'] else 0
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signal_number, lambda *_: scheduler.stop())
+        scheduler.run(on_tick=publish, tick=args.metrics_interval)
+        return 0
+    finally:
+        scheduler.close()
@@ -0,0 +1,348 @@
+"""Series Module.
+
+Merging of overlapping responses, so a poll only downloads the newest
+intervals, and sorted indexes for range and point queries.
+"""
+import bisect
+import datetime
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import Callable
+from pysolcast.parsing import parse_datetime
+
+
+def _period_end(record):
+    """period_end of a dict or compact record."""
+    return record['period_end'] if isinstance(record, dict) else record.period_end
+
+
+def _period(record):
+    """period of a dict or compact record, ``None`` when absent."""
+    return record.get('period') if isinstance(record, dict) else getattr(record, 'period', None)
+
+
+def _ascending(records: list) -> bool:
+    """Whether records run oldest first."""
+    return len(records) < 2 or _period_end(records[0]) <= _period_end(records[-1])
+
+
+def merge_records(previous: list, new: list, drop_before=None) -> list:
+    """Merge newer records into older ones.
+
+    Records of ``previous`` inside the ``period_end`` range of ``new`` are
+    replaced by ``new``, and records on either side of that range are kept.
+    Both lists must have ``period_end`` values of the same type, either the
+    strings returned by the API or parsed datetimes, and may run oldest or
+    newest first; the result runs in the order of ``new``.
+
+    :param previous: Records from an earlier response.
+    :param new: Records from a newer response, covering one contiguous range.
+    :param drop_before: Drop records with a ``period_end`` before this.
+    :return: records
+    """
+    if not new:
+        return list(previous)
+    if not _ascending(previous):
+        previous = previous[::-1]
+    ascending = _ascending(new)
+    if not ascending:
+        new = new[::-1]
+    keys = [_period_end(record) for record in previous]
+    first = bisect.bisect_left(keys, _period_end(new[0]))
+    last = bisect.bisect_right(keys, _period_end(new[-1]))
+    start = bisect.bisect_left(keys, drop_before, hi=first) if drop_before is not None else 0
+    merged = previous[start:first] + list(new) + previous[last:]
+    return merged if ascending else merged[::-1]
+
+
+def merge_response(previous: dict, new: dict, tld_key: str, drop_before=None) -> dict:
+    """Merge a newer response into an older one.
+
+    :param previous: Earlier response data, or ``None``.
+    :param new: Newer response data.
+    :param tld_key: Key of the records, e.g. ``forecasts``.
+    :param drop_before: Drop records with a ``period_end`` before this.
+    :return: data: A new response holding the merged records.
+    """
+    if not previous:
+        return new
+    return {**new,
+            tld_key: merge_records(previous.get(tld_key, []), new.get(tld_key, []), drop_before)}
+
+
+@dataclass
+class RefreshOptions:
+    """How much an :class:`IncrementalRefresh` fetches, and when.
+
+    :param hours: Hours of a full fetch.
+    :param refresh_hours: Hours of an incremental fetch.
+    :param full_interval: Seconds between full fetches.
+    :param drop_past: Drop records before the latest response. Defaults to ``True`` for
+        forecasts.
+    :param clock: Monotonic clock in seconds.
+    """
+
+    hours: int
+    refresh_hours: int
+    full_interval: float = 21600.0
+    drop_past: bool = None
+    clock: Callable = time.monotonic
+
+
+class IncrementalRefresh:
+    """Keep a full horizon up to date by fetching only its near-term part.
+
+    The first call, and any call ``full_interval`` seconds after the last
+    full fetch, downloads ``hours`` of data. Other calls download
+    ``refresh_hours`` and merge them into the held response with
+    :func:`merge_response`. For forecasts, records ending before the first
+    record of the latest response are dropped as they are in the past.
+    """
+
+    def __init__(self, fetch, tld_key: str, options: RefreshOptions = None, **kwargs):
+        """Create a refresher.
+
+        :param fetch: Callable taking ``hours`` and returning response data.
+        :param tld_key: Key of the records, e.g. ``forecasts``.
+        :param options: Options of the refresher. Keyword arguments override its fields.
+        """
+        self.fetch = fetch
+        self.tld_key = tld_key
+        self.options = replace(options, **kwargs) if options else RefreshOptions(**kwargs)
+        if self.options.drop_past is None:
+            self.options.drop_past = tld_key == 'forecasts'
+        self.data = None
+        self._counts = Counter()
+        self._full_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> dict:
+        """Numbers of full and incremental fetches."""
+        with self._lock:
+            return {'full_fetches': self._counts['full_fetches'],
+                    'incremental_fetches': self._counts['incremental_fetches']}
+
+    @classmethod
+    def for_utility_site(cls, site, period: str, endpoint: str = 'forecasts',
+                         **kwargs) -> 'IncrementalRefresh':
+        """Create a refresher for a utility site endpoint.
+
+        :param site: ``UtilitySite``.
+        :param period: Length of the averaging period in ISO8601 duration format.
+        :param endpoint: ``forecasts``, ``estimated_actuals``, ``radiation_forecasts`` or
+            ``radiation_estimated_actuals``.
+            Other keyword arguments are options of the refresher, e.g. ``hours``.
+        :return: refresher
+        """
+        method = getattr(site, f'get_{endpoint}')
+        tld_key = 'estimated_actuals' if endpoint.endswith('estimated_actuals') else 'forecasts'
+        return cls(lambda window: method(period, str(window)), tld_key, **kwargs)
+
+    @classmethod
+    def for_world(cls, world, latitude, longitude, endpoint: str = 'forecasts',
+                  **kwargs) -> 'IncrementalRefresh':
+        """Create a refresher for a World location.
+
+        :param world: ``World``, or a wrapper with the same methods such as ``GridWorld``.
+        :param latitude: The latitude of the location (EPSG:4326)
+        :param longitude: The longitude of the location (EPSG:4326)
+        :param endpoint: ``forecasts`` or ``estimated_actuals``.
+            Other keyword arguments are options of the refresher, e.g. ``hours``.
+        :return: refresher
+        """
+        method = getattr(world, f'get_{endpoint}')
+        return cls(lambda window: method(latitude, longitude, str(window)), endpoint, **kwargs)
+
+    def refresh(self, full: bool = False) -> dict:
+        """Fetch new data and merge it into the held response.
+
+        :param full: Fetch the full horizon regardless of when it was last fetched.
+        :return: data: The merged response.
+        :raises SiteError:
+        """
+        with self._lock:
+            options = self.options
+            now = options.clock()
+            full = full or self.data is None or now - self._full_at >= options.full_interval
+            new = self.fetch(options.hours if full else options.refresh_hours)
+            if full:
+                self._counts['full_fetches'] += 1
+                self._full_at = now
+                self.data = new
+                return new
+            self._counts['incremental_fetches'] += 1
+            records = new.get(self.tld_key) or []
+            drop_before = min(_period_end(records[0]), _period_end(records[-1])) \
+                if options.drop_past and records else None
+            self.data = merge_response(self.data, new, self.tld_key, drop_before)
+            return self.data
+
+
+class IndexedSeries:
+    """Records of a parsed response indexed by ``period_end``.
+
+    Holds the response's own records, in ascending ``period_end`` order,
+    next to a list of their ``period_end`` values. Range and point queries
+    bisect that list, and slices are views over the same lists, so
+    queries neither scan nor copy records. Records returned newest first,
+    as estimated actuals are, are read in reverse without being reordered.
+
+    Query times may be ``datetime`` or ISO8601 strings, which are parsed.
+    """
+
+    def __init__(self, records: list):
+        """Index records.
+
+        :param records: Parsed or compact records, sorted either way by ``period_end``. Unsorted
+            records are sorted into a new list.
+        """
+        reverse = not _ascending(records)
+        keys = [_period_end(record) for record in (reversed(records) if reverse else records)]
+        if any(later < earlier for earlier, later in zip(keys, keys[1:])):
+            records = sorted(records, key=_period_end)
+            keys, reverse = [_period_end(record) for record in records], False
+        self._records = records
+        self._keys = keys
+        self._reverse = reverse
+        self._start = 0
+        self._stop = len(keys)
+
+    @classmethod
+    def from_response(cls, dic: dict, tld_key: str) -> 'IndexedSeries':
+        """Index the records of a parsed response.
+
+        :param dic: Response data parsed by ``get_*_parsed`` or ``parse_date_time``.
+        :param tld_key: Key of the records, e.g. ``forecasts``.
+        :return: series
+        """
+        return cls(dic[tld_key])
+
+    def _view(self, start: int, stop: int) -> 'IndexedSeries':
+        """View of positions start to stop, sharing the records and index."""
+        view = object.__new__(IndexedSeries)
+        view.__dict__.update(self.__dict__, _start=start, _stop=stop)
+        return view
+
+    def _record(self, position: int):
+        """Record at an absolute position."""
+        return self._records[len(self._keys) - 1 - position if self._reverse else position]
+
+    def _coerce(self, value):
+        """Convert a query time to the type of the index."""
+        if isinstance(value, str) and self._keys and isinstance(self._keys[0], datetime.datetime):
+            return parse_datetime(value)
+        return value
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __iter__(self):
+        for position in range(self._start, self._stop):
+            yield self._record(position)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError('IndexedSeries slices must have a step of 1')
+            return self._view(self._start + start, self._start + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('IndexedSeries index out of range')
+        return self._record(self._start + index)
+
+    def __repr__(self):
+        return f'IndexedSeries(length={len(self)})'
+
+    @property
+    def period_ends(self) -> list:
+        """``period_end`` of every record in the view, ascending."""
+        return self._keys[self._start:self._stop]
+
+    def slice(self, start=None, end=None) -> 'IndexedSeries':
+        """Records with a ``period_end`` after start, up to and including end.
+
+        With times on period boundaries these are the periods covering
+        ``(start, end]``, e.g. the next six hours from now.
+
+        :param start: Exclusive lower bound. Defaults to the first record.
+        :param end: Inclusive upper bound. Defaults to the last record.
+        :return: series: A view sharing this series' records.
+        """
+        first = self._start if start is None else \
+            bisect.bisect_right(self._keys, self._coerce(start), self._start, self._stop)
+        last = self._stop if end is None else \
+            bisect.bisect_right(self._keys, self._coerce(end), self._start, self._stop)
+        return self._view(first, max(first, last))
+
+    def at(self, when):
+        """Record of the period containing a time.
+
+        :param when: Time, e.g. 14:30 finds the period ending at or after 14:30.
+        :return: record: ``None`` when no period contains the time.
+        """
+        when = self._coerce(when)
+        position = bisect.bisect_left(self._keys, when, self._start, self._stop)
+        if position == self._stop:
+            return None
+        record = self._record(position)
+        period = _period(record)
+        if isinstance(period, datetime.timedelta) and self._keys[position] - period >= when:
+            return None
+        return record
+
+    def nearest(self, when):
+        """Record with the ``period_end`` closest to a time.
+
+        :param when: Time.
+        :return: record: ``None`` when the series is empty; the earlier record on a tie.
+        """
+        when = self._coerce(when)
+        position = bisect.bisect_left(self._keys, when, self._start, self._stop)
+        candidates = [index for index in (position - 1, position)
+                      if self._start <= index < self._stop]
+        if not candidates:
+            return None
+        return self._record(min(candidates, key=lambda index: abs(self._keys[index] - when)))
+
+    def asof(self, when, tolerance: datetime.timedelta = None):
+        """Latest record with a ``period_end`` at or before a time.
+
+        :param when: Time.
+        :param tolerance: Largest gap between the time and the record's ``period_end``.
+        :return: record: ``None`` when there is none within tolerance.
+        """
+        when = self._coerce(when)
+        position = bisect.bisect_right(self._keys, when, self._start, self._stop) - 1
+        if position < self._start:
+            return None
+        if tolerance is not None and when - self._keys[position] > tolerance:
+            return None
+        return self._record(position)
+
+    def join_asof(self, other: 'IndexedSeries', tolerance: datetime.timedelta = None) -> list:
+        """Pair each record with the latest record of another series at or before it.
+
+        For example, pair forecasts with the latest estimated actual, or
+        measurements with the forecast run in force.
+
+        :param other: Series to look up.
+        :param tolerance: Largest gap between the two ``period_end`` values.
+        :return: pairs: ``(record, other_record)`` for each record here, ``other_record``
+            ``None`` without a match.
+        """
+        pairs = []
+        keys = other.period_ends
+        position = 0
+        for index in range(self._start, self._stop):
+            key = self._keys[index]
+            position = bisect.bisect_right(keys, key, position)
+            match = None
+            if position and (tolerance is None or key - keys[position - 1] <= tolerance):
+                match = other[position - 1]
+            pairs.append((self._record(index), match))
+        return pairs
@@ -0,0 +1,48 @@
+"""HTTP Session Module.
+
+Pooled, persistent sessions shared by the site classes.
+"""
+import threading
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+
+_DEFAULTS = {}
+_DEFAULTS_LOCK = threading.Lock()
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE, pool_block: bool = False) -> Session:
+    """Create a session with a keep-alive connection pool.
+
+    The session can be shared across site instances and threads.
+
+    :param pool_size: Number of connections kept alive per host.
+    :param pool_block: Block when every pooled connection is in use instead of opening a new one.
+    :return: session
+    """
+    session = Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=pool_block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_default_session() -> Session:
+    """Get the process-wide session used when a site is not given one.
+
+    :return: session
+    """
+    with _DEFAULTS_LOCK:
+        if _DEFAULTS.get('session') is None:
+            _DEFAULTS['session'] = create_session()
+        return _DEFAULTS['session']
+
+
+def set_default_session(session: Session = None):
+    """Replace the process-wide session.
+
+    :param session: Session to use by default. ``None`` creates a new one on next use.
+    """
+    with _DEFAULTS_LOCK:
+        _DEFAULTS['session'] = session
@@ -0,0 +1,197 @@
+"""Spatial Module.
+
+Nearest-neighbour lookup and inverse-distance interpolation over World
+responses already fetched. Requires the ``numpy`` extra.
+"""
+from dataclasses import dataclass, replace
+from pysolcast.columnar import ColumnarPoints, np, require_numpy
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Relative widening of latitude bands, so rounding never leaves out a location on their edge.
+BAND_TOLERANCE = 1e-9
+# Narrowest latitude band searched, in kilometres either side of a query.
+MIN_BAND_KM = 1.0
+
+
+def haversine(latitude1, longitude1, latitude2, longitude2):
+    """Great-circle distance in kilometres, broadcast over arrays.
+
+    :param latitude1: Latitudes in degrees.
+    :param longitude1: Longitudes in degrees.
+    :param latitude2: Latitudes in degrees.
+    :param longitude2: Longitudes in degrees.
+    :return: distance
+    """
+    require_numpy()
+    latitude1, longitude1, latitude2, longitude2 = map(
+        np.radians, (latitude1, longitude1, latitude2, longitude2))
+    half_chord = (np.sin((latitude2 - latitude1) / 2) ** 2
+                  + np.cos(latitude1) * np.cos(latitude2)
+                  * np.sin((longitude2 - longitude1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(half_chord, 0, 1)))
+
+
+@dataclass
+class InterpolationOptions:
+    """How :meth:`SpatialIndex.interpolate` weights neighbours.
+
+    :param k: Number of neighbours used.
+    :param power: Distance exponent of the weights.
+    :param max_distance: Neighbours further than this many kilometres are not used.
+    """
+
+    k: int = 4
+    power: float = 2
+    max_distance: float = None
+
+
+class SpatialIndex:
+    """Index over World responses for answering nearby points locally.
+
+    Values are aligned on the ``period_end`` axis of the underlying
+    :class:`pysolcast.columnar.ColumnarPoints`, so every query returns a
+    ``(queries, periods)`` array. Locations are kept sorted by latitude, and
+    a query only measures its distance to the locations in a latitude band
+    wide enough to hold its nearest neighbours, found by bisection.
+    """
+
+    def __init__(self, points: ColumnarPoints):
+        """Index aligned responses.
+
+        :param points: Responses for the indexed locations.
+        """
+        require_numpy()
+        self.points = points
+        self._order = np.argsort(points.latitude, kind='stable')
+        self._latitude = np.asarray(points.latitude, dtype=np.float64)[self._order]
+
+    @classmethod
+    def from_results(cls, results, tld_key: str) -> 'SpatialIndex':
+        """Index per-location responses.
+
+        :param results: Iterable of ``(latitude, longitude, data, ...)``, e.g. from
+            :func:`pysolcast.fleet.iter_world`, or a dict of ``{(latitude, longitude): data}``.
+        :param tld_key: Key of the records, e.g. ``estimated_actuals``.
+        :return: index
+        """
+        if isinstance(results, dict):
+            results = [(latitude, longitude, data)
+                       for (latitude, longitude), data in results.items()]
+        return cls(ColumnarPoints.from_results(results, tld_key))
+
+    @property
+    def period_end(self):
+        """Periods of the returned series."""
+        return self.points.period_end
+
+    def _band(self, latitude: float, longitude: float, radius: float) -> tuple:
+        """Locations less than ``radius`` kilometres north or south of a point.
+
+        :return: candidates, distances: Indices of the locations and their distance to the point.
+        """
+        degrees = np.degrees(radius / EARTH_RADIUS_KM) * (1 + BAND_TOLERANCE)
+        start = np.searchsorted(self._latitude, latitude - degrees, side='left')
+        stop = np.searchsorted(self._latitude, latitude + degrees, side='right')
+        candidates = self._order[start:stop]
+        return candidates, haversine(latitude, longitude, self.points.latitude[candidates],
+                                     self.points.longitude[candidates])
+
+    def _nearest(self, latitude: float, longitude: float, k: int, limit: float) -> tuple:
+        """Find the ``k`` nearest locations to one point no further than ``limit`` kilometres.
+
+        The band doubles in width until ``k`` of its locations are within
+        its half-width. A location is never closer than its difference in
+        latitude, so the band then holds every nearer location.
+
+        :return: indices, distances: Up to ``k`` locations sorted by distance.
+        """
+        radius = min(MIN_BAND_KM, limit)
+        while True:
+            candidates, distances = self._band(latitude, longitude, radius)
+            if len(candidates) >= k and np.partition(distances, k - 1)[k - 1] <= radius:
+                break
+            if radius >= limit or radius >= np.pi * EARTH_RADIUS_KM:
+                break
+            radius = min(radius * 2, limit)
+        if len(candidates) > k:
+            nearest = np.argpartition(distances, k - 1)[:k]
+            candidates, distances = candidates[nearest], distances[nearest]
+        order = np.argsort(distances, kind='stable')
+        order = order[distances[order] <= limit]
+        return candidates[order], distances[order]
+
+    def query(self, latitude, longitude, k: int = 1, max_distance: float = None) -> tuple:
+        """Find the nearest indexed locations.
+
+        :param latitude: Query latitudes in degrees.
+        :param longitude: Query longitudes in degrees.
+        :param k: Number of neighbours per query.
+        :param max_distance: Neighbours further than this many kilometres are reported as missing.
+        :return: indices, distances: ``(queries, k)`` arrays sorted by distance. Missing
+            neighbours have index ``-1`` and distance ``inf``.
+        """
+        latitude = np.atleast_1d(np.asarray(latitude, dtype=np.float64))
+        longitude = np.atleast_1d(np.asarray(longitude, dtype=np.float64))
+        k = min(k, len(self.points))
+        indices = np.full((len(latitude), k), -1, dtype=np.intp)
+        distances = np.full((len(latitude), k), np.inf)
+        if not k:
+            return indices, distances
+        limit = np.inf if max_distance is None else max_distance
+        for row, point in enumerate(zip(latitude, longitude)):
+            found, found_distances = self._nearest(*point, k, limit)
+            indices[row, :len(found)] = found
+            distances[row, :len(found)] = found_distances
+        return indices, distances
+
+    def _require_points(self):
+        """Raise when there are no locations to take values from."""
+        if not self.points:
+            raise ValueError('SpatialIndex has no locations')
+
+    def nearest(self, latitude, longitude, field: str, max_distance: float = None):
+        """Get the series of the nearest indexed location.
+
+        :param latitude: Query latitudes in degrees.
+        :param longitude: Query longitudes in degrees.
+        :param field: Field name, e.g. ``ghi``.
+        :param max_distance: Kilometres beyond which the result is ``nan``.
+        :return: values: ``(queries, periods)`` array.
+        :raises ValueError: The index has no locations.
+        """
+        self._require_points()
+        indices, _ = self.query(latitude, longitude, k=1, max_distance=max_distance)
+        values = self.points.fields[field][indices[:, 0]]
+        values[indices[:, 0] < 0] = np.nan
+        return values
+
+    def interpolate(self, latitude, longitude, field: str, options: InterpolationOptions = None,
+                    **kwargs):
+        """Inverse-distance weighted interpolation of a field.
+
+        Neighbours without a value for a period are left out of that period's
+        weights. A query on an indexed location returns its value exactly.
+
+        :param latitude: Query latitudes in degrees.
+        :param longitude: Query longitudes in degrees.
+        :param field: Field name, e.g. ``ghi``.
+        :param options: Weighting of the neighbours. Keyword arguments override its fields.
+        :return: values: ``(queries, periods)`` array, ``nan`` where no neighbour has a value.
+        :raises ValueError: The index has no locations.
+        """
+        self._require_points()
+        options = replace(options or InterpolationOptions(), **kwargs)
+        indices, distances = self.query(latitude, longitude, k=options.k,
+                                        max_distance=options.max_distance)
+        found = indices >= 0
+        values = np.take(self.points.fields[field], np.where(found, indices, 0), axis=0)
+        exact = found & (distances == 0)
+        with np.errstate(divide='ignore'):
+            weights = np.where(found, 1.0 / distances ** options.power, 0.0)
+        weights = np.where(exact.any(axis=1, keepdims=True), exact.astype(np.float64), weights)
+        weights = np.where(np.isnan(values), 0.0, np.expand_dims(weights, 2))
+        total = np.sum(weights, axis=1)
+        with np.errstate(invalid='ignore'):
+            return np.where(total > 0, np.sum(np.nan_to_num(values) * weights, axis=1) / total,
+                            np.nan)
@@ -0,0 +1,173 @@
+"""Time Series Store Module.
+
+Append-only local store of fetched responses, with columns read back as
+memory-mapped arrays. Requires the ``numpy`` extra.
+"""
+import json
+import os
+import threading
+import time
+from urllib.parse import quote
+from pysolcast.columnar import ColumnarSeries, np, require_numpy
+from pysolcast.records import records_key
+
+INDEX_FILE = 'index.jsonl'
+TIME_COLUMNS = {'period_end': ('period_end.i8', 'datetime64[us]'),
+                'period': ('period.i8', 'timedelta64[s]')}
+# Bytes read back from the end of an index to find where its last complete line ends.
+TAIL_SIZE = 65536
+
+
+class TimeSeriesStore:
+    """Store of runs keyed by (site, endpoint, fetch time).
+
+    Each (site, endpoint) has one file per column, appended to on every run
+    and memory-mapped on read, so reads return views without copying. Each
+    run is stored sorted by ``period_end``. A run becomes visible once its
+    line is written to the index, so a write cut short by a crash is
+    ignored and overwritten by the next append.
+    """
+
+    def __init__(self, root: str):
+        """Open or create a store.
+
+        :param root: Directory of the store.
+        """
+        require_numpy()
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str, endpoint: str) -> str:
+        """Directory of one (site, endpoint)."""
+        return os.path.join(self.root, quote(str(key), safe=''),
+                            quote(endpoint.strip('/'), safe=''))
+
+    def _index(self, path: str) -> list:
+        """Read the runs of one (site, endpoint), skipping lines that are not complete runs."""
+        runs = []
+        try:
+            with open(os.path.join(path, INDEX_FILE), encoding='utf-8') as index_file:
+                for line in index_file:
+                    if not line.endswith('\n'):
+                        continue
+                    try:
+                        runs.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return runs
+
+    @staticmethod
+    def _column_file(name: str) -> str:
+        """File name of a column."""
+        return TIME_COLUMNS[name][0] if name in TIME_COLUMNS else f'{quote(name, safe="")}.f8'
+
+    def _write_column(self, path: str, name: str, values, offset: int):
+        """Write a column's values from an offset, over anything left there by a torn write."""
+        column_path = os.path.join(path, self._column_file(name))
+        with open(column_path, 'ab') as column_file:
+            column_file.truncate(min(os.path.getsize(column_path), offset * 8))
+            padding = offset - os.path.getsize(column_path) // 8
+            if padding > 0:
+                np.full(padding, np.nan).tofile(column_file)
+            values.view(np.int64 if name in TIME_COLUMNS else np.float64).tofile(column_file)
+
+    @staticmethod
+    def _write_index(path: str, run: dict):
+        """Add a run to the index, after cutting off a last line left incomplete by a crash."""
+        with open(os.path.join(path, INDEX_FILE), 'ab') as index_file:
+            size = index_file.tell()
+            if size:
+                with open(os.path.join(path, INDEX_FILE), 'rb') as tail_file:
+                    tail_file.seek(max(size - TAIL_SIZE, 0))
+                    tail = tail_file.read()
+                index_file.truncate(size - len(tail) + tail.rfind(b'\n') + 1)
+            index_file.write((json.dumps(run) + '\n').encode('utf-8'))
+
+    def append(self, key: str, endpoint: str, data, fetched_at: float = None) -> dict:
+        """Append a run.
+
+        :param key: Site resource id, or location for World data.
+        :param endpoint: Endpoint, e.g. ``rooftop_sites/forecasts``.
+        :param data: Response data or a :class:`pysolcast.columnar.ColumnarSeries`.
+        :param fetched_at: Fetch time in epoch seconds. Defaults to now.
+        :return: run: ``fetched_at``, ``offset`` and ``length`` of the stored run.
+        """
+        if not isinstance(data, ColumnarSeries):
+            data = ColumnarSeries.from_response(data, records_key(data))
+        order = np.argsort(data.period_end, kind='stable')
+        path = self._path(key, endpoint)
+        with self._lock:
+            os.makedirs(path, exist_ok=True)
+            runs = self._index(path)
+            offset = runs[-1]['offset'] + runs[-1]['length'] if runs else 0
+            fields = set(runs[-1]['fields']) if runs else set()
+            fields.update(name for name, values in data.fields.items()
+                          if values.dtype == np.float64)
+            columns = {'period_end': data.period_end.astype('datetime64[us]'),
+                       'period': data.period.astype('timedelta64[s]')}
+            for name in fields:
+                values = data.fields.get(name)
+                columns[name] = values if values is not None and values.dtype == np.float64 else \
+                    np.full(len(data), np.nan)
+            for name, values in columns.items():
+                self._write_column(path, name, values[order], offset)
+            run = {'fetched_at': time.time() if fetched_at is None else fetched_at,
+                   'offset': offset, 'length': len(data), 'fields': sorted(fields)}
+            self._write_index(path, run)
+        return run
+
+    def runs(self, key: str, endpoint: str) -> list:
+        """List stored runs, oldest first.
+
+        :param key: Site resource id, or location for World data.
+        :param endpoint: Endpoint, e.g. ``rooftop_sites/forecasts``.
+        :return: runs: Dicts with ``fetched_at``, ``offset``, ``length`` and ``fields``.
+        """
+        return self._index(self._path(key, endpoint))
+
+    def _map(self, path: str, name: str, length: int):
+        """Memory-map the first length values of a column."""
+        dtype = TIME_COLUMNS[name][1] if name in TIME_COLUMNS else np.float64
+        if not length:
+            return np.array([], dtype=dtype)
+        return np.memmap(os.path.join(path, self._column_file(name)), dtype=dtype, mode='r',
+                         shape=(length,))
+
+    def history(self, key: str, endpoint: str) -> tuple:
+        """Map every stored run at once.
+
+        :param key: Site resource id, or location for World data.
+        :param endpoint: Endpoint, e.g. ``rooftop_sites/forecasts``.
+        :return: series, runs: Memory-mapped columns of all runs back to back, and the runs.
+        """
+        path = self._path(key, endpoint)
+        runs = self._index(path)
+        length = runs[-1]['offset'] + runs[-1]['length'] if runs else 0
+        fields = runs[-1]['fields'] if runs else []
+        series = ColumnarSeries(self._map(path, 'period_end', length),
+                                self._map(path, 'period', length),
+                                {name: self._map(path, name, length) for name in fields})
+        return series, runs
+
+    def read(self, key: str, endpoint: str, fetched_at: float = None) -> ColumnarSeries:
+        """Read one run without copying.
+
+        Use :meth:`pysolcast.columnar.ColumnarSeries.between` on the result to limit it
+        to a ``period_end`` range.
+
+        :param key: Site resource id, or location for World data.
+        :param endpoint: Endpoint, e.g. ``rooftop_sites/forecasts``.
+        :param fetched_at: Latest run fetched at or before this time. Defaults to the latest run.
+        :return: series: ``None`` when no run matches.
+        """
+        series, runs = self.history(key, endpoint)
+        if fetched_at is not None:
+            runs = [run for run in runs if run['fetched_at'] <= fetched_at]
+        if not runs:
+            return None
+        first, last = runs[-1]['offset'], runs[-1]['offset'] + runs[-1]['length']
+        return ColumnarSeries(series.period_end[first:last], series.period[first:last],
+                              {name: values[first:last] for name, values in series.fields.items()})
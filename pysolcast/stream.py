@@ -0,0 +1,84 @@
+"""Streaming Module.
+
+Incremental decoding of large JSON responses.
+"""
+import codecs
+import json
+import re
+
+_WHITESPACE = ' \t\r\n,'
+
+
+def iter_text(chunks, encoding: str = 'utf-8'):
+    """Decode byte chunks to text, handling characters split across chunks.
+
+    :param chunks: Iterable of bytes.
+    :param encoding: Text encoding of the bytes.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def _seek_array(chunks, key: str) -> tuple:
+    """Read chunks until the opening bracket of the array of key.
+
+    :return: buffer, position: Text read and the index after the bracket, ``None`` when not found.
+    """
+    marker = re.compile(rf'"{re.escape(key)}"\s*:\s*\[')
+    buffer = ''
+    while True:
+        match = marker.search(buffer)
+        if match:
+            return buffer, match.end()
+        chunk = next(chunks, None)
+        if chunk is None:
+            return None
+        buffer += chunk
+
+
+def iter_json_array(chunks, key: str):
+    """Yield the items of a top-level JSON array as soon as each is complete.
+
+    Only the item being decoded and the unread part of the current chunk
+    are held in memory.
+
+    :param chunks: Iterable of text chunks of a JSON object.
+    :param key: Key of the array, e.g. ``forecasts``.
+    :raises ValueError: The response ended before the array was closed.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    found = _seek_array(chunks, key)
+    if found is None:
+        return
+    buffer, position = found
+    exhausted = False
+    while True:
+        while position < len(buffer) and buffer[position] in _WHITESPACE:
+            position += 1
+        if position < len(buffer):
+            if buffer[position] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                pass
+            else:
+                if end < len(buffer) or exhausted:
+                    yield item
+                    position = end
+                    continue
+        if exhausted:
+            raise ValueError(f'Response ended before the end of {key}')
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+        else:
+            buffer = buffer[position:] + chunk
+            position = 0
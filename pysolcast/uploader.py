@@ -0,0 +1,226 @@
+"""Measurement Uploader Module.
+
+Buffered, batched upload of measurements in the background.
+"""
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import Callable
+import requests.exceptions
+from pysolcast.base import REQUEST_ERRORS
+from pysolcast.exceptions import ApiError, RateLimitExceeded
+
+MAX_BATCH_SIZE = 100
+
+RETRY_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, RateLimitExceeded,
+                ApiError)
+
+
+@dataclass
+class UploadOptions:
+    """When an uploader flushes and how it retries failed posts.
+
+    :param max_batch_size: Most measurements sent in one post.
+    :param flush_size: Buffered measurements that trigger a flush. Defaults to
+        ``max_batch_size``.
+    :param max_age: Seconds a measurement may wait before its site is flushed.
+    :param backoff: Seconds before a site is retried after a failed post, doubled on each
+        further failure.
+    :param max_backoff: Most seconds before a site is retried.
+    :param clock: Monotonic clock in seconds.
+    """
+
+    max_batch_size: int = MAX_BATCH_SIZE
+    flush_size: int = None
+    max_age: float = 60.0
+    backoff: float = 1.0
+    max_backoff: float = 300.0
+    clock: Callable = time.monotonic
+
+
+@dataclass
+class _Buffer:
+    """Measurements of one site waiting to be posted."""
+
+    site: object
+    measurements: list = field(default_factory=list)
+    since: float = None
+    failures: int = 0
+    retry_at: float = 0.0
+
+
+class MeasurementUploader:
+    """Buffer measurements per site and post them in batches.
+
+    A site's buffer is flushed once it holds ``flush_size`` measurements or
+    its oldest measurement is ``max_age`` seconds old. Each flush is split
+    into posts of at most ``max_batch_size`` measurements. Measurements that
+    fail with a connection error, timeout, rate limit or unexpected status
+    stay buffered, and the site is retried after an exponential backoff with
+    jitter, or after the ``Retry-After`` of a rate limited post. Any other
+    error drops the batch.
+
+    Use as a context manager, or call :meth:`start` and :meth:`stop`.
+    """
+
+    def __init__(self, options: UploadOptions = None, **kwargs):
+        """Create an uploader.
+
+        :param options: Options of the uploader. Keyword arguments override its fields.
+        """
+        self.options = replace(options or UploadOptions(), **kwargs)
+        self.logger = logging.getLogger()
+        self._counts = Counter()
+        self._buffers = {}
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def queue_depth(self) -> int:
+        """Measurements waiting to be posted."""
+        with self._condition:
+            return sum(len(buffer.measurements) for buffer in self._buffers.values())
+
+    @property
+    def stats(self) -> dict:
+        """Queue depth, throughput and flush latency counters."""
+        counts = self._counts
+        return {
+            'queue_depth': self.queue_depth,
+            'measurements_sent': counts['measurements_sent'],
+            'posts': counts['posts'],
+            'errors': counts['errors'],
+            'dropped': counts['dropped'],
+            'last_flush_latency': counts['last_flush_latency'],
+            'mean_flush_latency':
+                counts['flush_latency_total'] / counts['flushes'] if counts['flushes'] else 0.0,
+        }
+
+    def add(self, site, measurement: dict):
+        """Buffer a measurement for a site without blocking on the network.
+
+        :param site: Site with ``post_measurements``, e.g. ``RooftopSite`` or ``UtilitySite``.
+        :param measurement: One measurement, e.g.
+            ``{'period_end': ..., 'period': 'PT5M', 'total_power': 1.2}``.
+        """
+        with self._condition:
+            buffer = self._buffers.get(site.resource_id)
+            if buffer is None:
+                buffer = self._buffers[site.resource_id] = _Buffer(site)
+            if not buffer.measurements:
+                buffer.since = self.options.clock()
+            buffer.measurements.append(measurement)
+            if len(buffer.measurements) >= (self.options.flush_size or self.options.max_batch_size):
+                self._condition.notify()
+
+    def _due(self, force: bool) -> list:
+        """Take the buffers that are due for a flush.
+
+        A site waiting to be retried is due once its backoff has passed.
+        """
+        now = self.options.clock()
+        flush_size = self.options.flush_size or self.options.max_batch_size
+        due = []
+        with self._condition:
+            for buffer in self._buffers.values():
+                if not buffer.measurements or (not force and now < buffer.retry_at):
+                    continue
+                if (force or buffer.failures or len(buffer.measurements) >= flush_size
+                        or now - buffer.since >= self.options.max_age):
+                    due.append((buffer, buffer.measurements))
+                    buffer.measurements = []
+        return due
+
+    def _retry_delay(self, failures: int, error) -> float:
+        """Seconds to wait before retrying a site after its failures-th failed post in a row."""
+        if isinstance(error, RateLimitExceeded) and error.retry_after is not None:
+            return error.retry_after
+        ceiling = min(self.options.max_backoff, self.options.backoff * 2 ** (failures - 1))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def _requeue(self, buffer: _Buffer, measurements: list, error):
+        """Put measurements back at the front of a site's buffer and back off the site."""
+        with self._condition:
+            buffer.measurements = measurements + buffer.measurements
+            buffer.since = self.options.clock()
+            buffer.failures += 1
+            buffer.retry_at = buffer.since + self._retry_delay(buffer.failures, error)
+
+    def _upload(self, buffer: _Buffer, measurements: list):
+        """Post measurements in batches, requeuing what could not be sent."""
+        site = buffer.site
+        for start in range(0, len(measurements), self.options.max_batch_size):
+            batch = measurements[start:start + self.options.max_batch_size]
+            try:
+                site.post_measurements({'measurements': batch})
+            except RETRY_ERRORS as error:
+                self.logger.info('Error posting measurements for %s: %s', site.resource_id, error)
+                self._counts['errors'] += 1
+                self._requeue(buffer, measurements[start:], error)
+                return
+            except REQUEST_ERRORS as error:
+                self.logger.info('Dropping measurements for %s: %s', site.resource_id, error)
+                self._counts['errors'] += 1
+                self._counts['dropped'] += len(batch)
+                continue
+            self._counts['posts'] += 1
+            self._counts['measurements_sent'] += len(batch)
+        with self._condition:
+            buffer.failures = 0
+            buffer.retry_at = 0.0
+
+    def flush(self, force: bool = True):
+        """Post buffered measurements now.
+
+        :param force: Flush every buffer, not only those over the size or age threshold,
+            including sites waiting to be retried.
+        """
+        with self._flush_lock:
+            due = self._due(force)
+            if not due:
+                return
+            start = time.perf_counter()
+            for buffer, measurements in due:
+                self._upload(buffer, measurements)
+            latency = time.perf_counter() - start
+            self._counts['last_flush_latency'] = latency
+            self._counts['flush_latency_total'] += latency
+            self._counts['flushes'] += 1
+
+    def _run(self):
+        """Background loop flushing due buffers until the uploader is stopped."""
+        while True:
+            with self._condition:
+                if self._thread is not threading.current_thread():
+                    return
+                self._condition.wait(timeout=min(self.options.max_age, 1.0))
+            self.flush(force=False)
+
+    def start(self):
+        """Start uploading in a background thread."""
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='pysolcast-uploader',
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and post what is left."""
+        with self._condition:
+            thread, self._thread = self._thread, None
+            self._condition.notify()
+        if thread is not None:
+            thread.join()
+        self.flush()
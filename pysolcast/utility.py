@@ -25,6 +25,33 @@ class UtilitySite(PySolcast):
         }
         return self._get_data(self._create_uri(self.base_uri, endpoint), params=payload)
 
+    def get_forecasts_parsed(self, period: str, hours: str) -> dict:
+        """Get forecasts data for site.
+
+        :param period: Length of the averaging period in ISO8601 duration format.
+        :param hours: An offset to which the number of forecasts will be included in the response.
+        :return: forecasts: Dates and durations are parsed to datetime and timedelta.
+        :raises SiteError:
+        """
+        return self._parse(self.get_forecasts(period, hours), 'forecasts')
+
+    def stream_forecasts(self, period: str, hours: str, parse: bool = False):
+        """Stream forecasts for site one record at a time.
+
+        :param period: Length of the averaging period in ISO8601 duration format.
+        :param hours: An offset to which the number of forecasts will be included in the response.
+        :param parse: Parse dates and durations of records as they arrive.
+        :return: forecasts: Iterator of records.
+        :raises SiteError:
+        """
+        endpoint = 'forecasts'
+        payload = {
+            'Period': period,
+            'Hours': hours
+        }
+        return self._stream_data(self._create_uri(self.base_uri, endpoint), 'forecasts', payload,
+                                 parse=parse)
+
     def get_estimated_actuals(self, period: str, hours: str) -> dict:
         """Get estimated actuals data for site.
 
@@ -40,6 +67,33 @@ class UtilitySite(PySolcast):
         }
         return self._get_data(self._create_uri(self.base_uri, endpoint), params=payload)
 
+    def get_estimated_actuals_parsed(self, period: str, hours: str) -> dict:
+        """Get estimated actuals data for site.
+
+        :param period: Length of the averaging period in ISO8601 duration format.
+        :param hours: An offset to which the number of forecasts will be included in the response.
+        :return: estimated_actuals: Dates and durations are parsed to datetime and timedelta.
+        :raises SiteError:
+        """
+        return self._parse(self.get_estimated_actuals(period, hours), 'estimated_actuals')
+
+    def stream_estimated_actuals(self, period: str, hours: str, parse: bool = False):
+        """Stream estimated actuals for site one record at a time.
+
+        :param period: Length of the averaging period in ISO8601 duration format.
+        :param hours: An offset to which the number of forecasts will be included in the response.
+        :param parse: Parse dates and durations of records as they arrive.
+        :return: estimated_actuals: Iterator of records.
+        :raises SiteError:
+        """
+        endpoint = 'estimated_actuals'
+        payload = {
+            'Period': period,
+            'Hours': hours
+        }
+        return self._stream_data(self._create_uri(self.base_uri, endpoint), 'estimated_actuals',
+                                 payload, parse=parse)
+
     def get_radiation_forecasts(self, period: str, hours: str) -> dict:
         """Get radiation forecasts data for site.
 
@@ -55,6 +109,33 @@ class UtilitySite(PySolcast):
         }
         return self._get_data(self._create_uri(self.base_uri, endpoint), params=payload)
 
+    def get_radiation_forecasts_parsed(self, period: str, hours: str) -> dict:
+        """Get radiation forecasts data for site.
+
+        :param period: Length of the averaging period in ISO8601 duration format.
+        :param hours: An offset to which the number of forecasts will be included in the response.
+        :return: forecasts: Dates and durations are parsed to datetime and timedelta.
+        :raises SiteError:
+        """
+        return self._parse(self.get_radiation_forecasts(period, hours), 'forecasts')
+
+    def stream_radiation_forecasts(self, period: str, hours: str, parse: bool = False):
+        """Stream radiation forecasts for site one record at a time.
+
+        :param period: Length of the averaging period in ISO8601 duration format.
+        :param hours: An offset to which the number of forecasts will be included in the response.
+        :param parse: Parse dates and durations of records as they arrive.
+        :return: forecasts: Iterator of records.
+        :raises SiteError:
+        """
+        endpoint = 'weather/forecasts'
+        payload = {
+            'Period': period,
+            'Hours': hours
+        }
+        return self._stream_data(self._create_uri(self.base_uri, endpoint), 'forecasts', payload,
+                                 parse=parse)
+
     def get_radiation_estimated_actuals(self, period: str, hours: str) -> dict:
         """Get radiation estimated actual data for site.
 
@@ -70,6 +151,33 @@ class UtilitySite(PySolcast):
         }
         return self._get_data(self._create_uri(self.base_uri, endpoint), params=payload)
 
+    def get_radiation_estimated_actuals_parsed(self, period: str, hours: str) -> dict:
+        """Get radiation estimated actual data for site.
+
+        :param period: Length of the averaging period in ISO8601 duration format.
+        :param hours: An offset to which the number of forecasts will be included in the response.
+        :return: estimated_actuals: Dates and durations are parsed to datetime and timedelta.
+        :raises SiteError:
+        """
+        return self._parse(self.get_radiation_estimated_actuals(period, hours), 'estimated_actuals')
+
+    def stream_radiation_estimated_actuals(self, period: str, hours: str, parse: bool = False):
+        """Stream radiation estimated actuals for site one record at a time.
+
+        :param period: Length of the averaging period in ISO8601 duration format.
+        :param hours: An offset to which the number of forecasts will be included in the response.
+        :param parse: Parse dates and durations of records as they arrive.
+        :return: estimated_actuals: Iterator of records.
+        :raises SiteError:
+        """
+        endpoint = 'weather/estimated_actuals'
+        payload = {
+            'Period': period,
+            'Hours': hours
+        }
+        return self._stream_data(self._create_uri(self.base_uri, endpoint), 'estimated_actuals',
+                                 payload, parse=parse)
+
     def post_measurements(self, data: dict) -> dict:
         """Post measurement data for site.
 
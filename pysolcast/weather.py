@@ -1,8 +1,8 @@
 """Weather site Module."""
-from pysolcast.base import PySolcast
+from pysolcast.base import EstimatedActualsSite
 
 
-class WeatherSite(PySolcast):
+class WeatherSite(EstimatedActualsSite):
     """Class for interacting with weather sites.
 
     Refer to https://docs.solcast.com.au/#weather-site for more information.
@@ -20,12 +20,22 @@ class WeatherSite(PySolcast):
         endpoint = 'forecasts'
         return self._get_data(self._create_uri(self.base_uri, endpoint))
 
-    def get_estimated_actuals(self) -> dict:
-        """Get estimated actuals data for site.
+    def get_forecasts_parsed(self) -> dict:
+        """Get forecasts data for site.
 
-        :returns: estimated_actuals
+        :returns: forecasts: Dates and durations are parsed to datetime and timedelta.
         :raises ValidationError:
         :raises SiteError:
         """
-        endpoint = 'estimated_actuals'
-        return self._get_data(self._create_uri(self.base_uri, endpoint))
+        return self._parse(self.get_forecasts(), 'forecasts')
+
+    def stream_forecasts(self, parse: bool = False):
+        """Stream forecasts for site one record at a time.
+
+        :param parse: Parse dates and durations of records as they arrive.
+        :returns: forecasts: Iterator of records.
+        :raises ValidationError:
+        :raises SiteError:
+        """
+        endpoint = 'forecasts'
+        return self._stream_data(self._create_uri(self.base_uri, endpoint), endpoint, parse=parse)
@@ -1,6 +1,23 @@
 """World Solar Radiation Module."""
-import logging
-from pysolcast.base import PySolcast
+from pysolcast.base import PySolcast, SiteOptions, store_endpoint
+from pysolcast.exceptions import ValidationError
+
+
+def validate_coordinates(latitude, longitude) -> tuple:
+    """Check a location is a valid EPSG:4326 coordinate before calling the API.
+
+    :param latitude: The latitude of the location, -90 to 90.
+    :param longitude: The longitude of the location, -180 to 180.
+    :return: coordinates: Latitude and longitude as floats.
+    :raises ValidationError: Latitude or longitude is not a number or is out of range.
+    """
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError) as error:
+        raise ValidationError(f'Invalid coordinates: {latitude}, {longitude}') from error
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValidationError(f'Coordinates out of range: {latitude}, {longitude}')
+    return latitude, longitude
 
 
 class World(PySolcast):
@@ -11,9 +28,8 @@ class World(PySolcast):
 
     base_uri = 'world_radiation'
 
-    def __init__(self, api_key):  # pylint: disable=super-init-not-called
-        self.api_key = api_key
-        self.logger = logging.getLogger()
+    def __init__(self, api_key, options: SiteOptions = None, **kwargs):
+        super().__init__(api_key, None, options, **kwargs)
 
     def get_forecasts(self, latitude: str, longitude: str, hours: str = None) -> dict:
         """Get forecasts data for given location.
@@ -34,6 +50,41 @@ class World(PySolcast):
         }
         return self._get_data(self._create_uri(self.base_uri, endpoint), params=payload)
 
+    def get_forecasts_parsed(self, latitude: str, longitude: str, hours: str = None) -> dict:
+        """Get forecasts data for given location.
+
+        :param latitude: The latitude of the location (EPSG:4326)
+        :param longitude: The longitude of the location (EPSG:4326)
+        :param hours: Time window of the response in hours
+        :return: forecasts: Dates and durations are parsed to datetime and timedelta.
+        :raises ValidationError:
+            Latitude, longitude or hours are invalid, see response_status for further details
+        :raises SiteNotFound: The location is outside our coverage area.
+        """
+        return self._parse(self.get_forecasts(latitude, longitude, hours), 'forecasts')
+
+    def stream_forecasts(self, latitude: str, longitude: str, hours: str = None,
+                         parse: bool = False):
+        """Stream forecasts for given location one record at a time.
+
+        :param latitude: The latitude of the location (EPSG:4326)
+        :param longitude: The longitude of the location (EPSG:4326)
+        :param hours: Time window of the response in hours
+        :param parse: Parse dates and durations of records as they arrive.
+        :return: forecasts: Iterator of records.
+        :raises ValidationError:
+            Latitude, longitude or hours are invalid, see response_status for further details
+        :raises SiteNotFound: The location is outside our coverage area.
+        """
+        endpoint = 'forecasts'
+        payload = {
+            'latitude': latitude,
+            'longitude': longitude,
+            'hours': hours
+        }
+        return self._stream_data(self._create_uri(self.base_uri, endpoint), endpoint, payload,
+                                 parse=parse)
+
     def get_estimated_actuals(self, latitude: str, longitude: str, hours: str = None) -> dict:
         """Get estimated actuals data for given location.
 
@@ -53,6 +104,47 @@ class World(PySolcast):
         }
         return self._get_data(self._create_uri(self.base_uri, endpoint), params=payload)
 
+    def get_estimated_actuals_parsed(self, latitude: str, longitude: str,
+                                     hours: str = None) -> dict:
+        """Get estimated actuals data for given location.
+
+        :param latitude: The latitude of the location (EPSG:4326)
+        :param longitude: The longitude of the location (EPSG:4326)
+        :param hours: Time window of the response in hours
+        :return: estimated_actuals: Dates and durations are parsed to datetime and timedelta.
+        :raises ValidationError:
+            Latitude, longitude or hours are invalid, see response_status for further details
+        :raises SiteNotFound: The location is outside our coverage area.
+        """
+        return self._parse(self.get_estimated_actuals(latitude, longitude, hours),
+                           'estimated_actuals')
+
+    def stream_estimated_actuals(self, latitude: str, longitude: str, hours: str = None,
+                                 parse: bool = False):
+        """Stream estimated actuals for given location one record at a time.
+
+        :param latitude: The latitude of the location (EPSG:4326)
+        :param longitude: The longitude of the location (EPSG:4326)
+        :param hours: Time window of the response in hours
+        :param parse: Parse dates and durations of records as they arrive.
+        :return: estimated_actuals: Iterator of records.
+        :raises ValidationError:
+            Latitude, longitude or hours are invalid, see response_status for further details
+        :raises SiteNotFound: The location is outside our coverage area.
+        """
+        endpoint = 'estimated_actuals'
+        payload = {
+            'latitude': latitude,
+            'longitude': longitude,
+            'hours': hours
+        }
+        return self._stream_data(self._create_uri(self.base_uri, endpoint), endpoint, payload,
+                                 parse=parse)
+
     def _create_uri(self, uri: str, endpoint: str) -> str:
         """Create a URI for specific endpoint."""
         return f'/{uri}/{endpoint}'
+
+    def _store_key(self, uri: str, params: dict) -> tuple:
+        """Key and endpoint a response is stored under."""
+        return f"{params['latitude']},{params['longitude']}", store_endpoint(uri, params)
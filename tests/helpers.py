@@ -0,0 +1,53 @@
+"""Helpers shared by the tests."""
+
+import datetime
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        """Move the clock forward."""
+        self.now += seconds
+
+    def set(self, now):
+        """Move the clock to a time."""
+        self.now = now
+
+
+def frozen_clock():
+    """Clock that never advances, usable in any process."""
+    return 0.0
+
+
+def make_response(values, period_minutes=30, first_end='2018-01-01T00:30', key='forecasts',
+                  field='pv_estimate', quantiles=False):
+    """Build a response of consecutive records.
+
+    :param values: Value of each record. ``None`` leaves its period out.
+    :param period_minutes: Length of each period.
+    :param first_end: ``period_end`` of the first record.
+    :param key: Key of the records.
+    :param field: Name of the value.
+    :param quantiles: Add ``<field>10`` and ``<field>90`` at half and twice the value.
+    """
+    first = datetime.datetime.fromisoformat(first_end)
+    period = datetime.timedelta(minutes=period_minutes)
+    records = []
+    for index, value in enumerate(values):
+        if value is None:
+            continue
+        period_end = first + index * period
+        record = {field: value, 'period_end': period_end.strftime('%Y-%m-%dT%H:%M:%S.0000000Z'),
+                  'period': f'PT{period_minutes}M'}
+        if quantiles:
+            record[f'{field}10'] = value / 2
+            record[f'{field}90'] = value * 2
+        records.append(record)
+    return {key: records}
@@ -0,0 +1,105 @@
+"""Tests for aggregate module."""
+
+import pytest
+from pysolcast.aggregate import FleetAggregator
+from pysolcast.columnar import ColumnarSeries
+from tests.helpers import make_response
+
+np = pytest.importorskip('numpy')
+
+
+def build(missing='skip'):
+    """Build an aggregator of three sites in two regions."""
+    aggregator = FleetAggregator(missing=missing)
+    aggregator.add_site('a', weight=1.0, groups={'region': 'north'})
+    aggregator.add_site('b', weight=0.5, groups={'region': 'north'})
+    aggregator.add_site('c', weight=2.0, groups={'region': 'south'})
+    aggregator.update('a', make_response([1, 2, 3], quantiles=True))
+    aggregator.update('b', make_response([4, 4], 30, '2018-01-01T01:00', quantiles=True))
+    aggregator.update('c', make_response([1, 1, 1], quantiles=True))
+    return aggregator
+
+
+def test_weighted_sums_and_groups():
+    """Test fleet and group totals."""
+    # Act
+    aggregator = build()
+    fleet = aggregator.result()
+    regions = aggregator.result('region')
+
+    # Assert
+    assert fleet.period_end[0] == np.datetime64('2018-01-01T00:30')
+    assert fleet['pv_estimate'].tolist() == [[3.0, 6.0, 7.0]]
+    assert fleet['pv_estimate90'].tolist() == [[6.0, 12.0, 14.0]]
+    assert fleet.counts['pv_estimate'].tolist() == [[2, 3, 3]]
+    assert regions.labels == ['north', 'south']
+    assert regions['pv_estimate'].tolist() == [[1.0, 4.0, 5.0], [2.0, 2.0, 2.0]]
+    assert regions.members.tolist() == [2, 1]
+    assert regions.series('south')['pv_estimate10'].tolist() == [1.0, 1.0, 1.0]
+
+
+def test_missing_propagate():
+    """Test periods missing a site are nan when missing values propagate."""
+    # Act
+    north = build(missing='propagate').result('region')
+
+    # Assert
+    assert np.isnan(north['pv_estimate'][0, 0])
+    assert north['pv_estimate'][0, 1:].tolist() == [4.0, 5.0]
+
+
+def test_incremental_update_matches_recompute():
+    """Test updating changed sites gives the same sums as a full rebuild."""
+    # Arrange
+    aggregator = build()
+
+    # Act
+    changed = aggregator.update('a', make_response([5, 6, 7], 30, '2018-01-01T01:00', quantiles=True))
+    unchanged = aggregator.update('c', make_response([1, 1, 1], quantiles=True))
+    aggregator.add_site('b', weight=1.0, groups={'region': 'south'})
+    incremental = aggregator.result('region')['pv_estimate'].copy()
+    aggregator.recompute()
+
+    # Assert
+    assert (changed, unchanged) == (True, False)
+    assert aggregator.stats['updates'] == 4
+    assert np.array_equal(incremental, aggregator.result('region')['pv_estimate'], equal_nan=True)
+    assert np.array_equal(incremental, [[np.nan, 5.0, 6.0, 7.0], [2.0, 6.0, 6.0, np.nan]], equal_nan=True)
+
+
+def test_trim_remove_and_resample():
+    """Test trimming past periods, removing a site and resampling finer series."""
+    # Arrange
+    aggregator = build()
+    quarter_hourly = make_response([2, 4, 6, 8], 15, '2018-01-01T00:15', quantiles=True)
+    aggregator.update('d', ColumnarSeries.from_response(quarter_hourly, 'forecasts'))
+
+    # Act
+    aggregator.remove_site('a')
+    aggregator.trim('2018-01-01T01:00')
+
+    # Assert
+    fleet = aggregator.result()
+    assert fleet.period_end.tolist()[0] == np.datetime64('2018-01-01T01:00').astype(object)
+    assert fleet['pv_estimate'][0].tolist() == [11.0, 4.0]
+    assert len(aggregator) == 3
+
+
+def test_update_many():
+    """Test updating from fleet results keyed by endpoint."""
+    # Arrange
+    aggregator = FleetAggregator()
+
+    # Act
+    changed = aggregator.update_many({'a': {'forecasts': make_response([1], quantiles=True)},
+                                      'b': make_response([2], quantiles=True), 'c': None})
+
+    # Assert
+    assert changed == 2
+    assert aggregator.result()['pv_estimate'].tolist() == [[3.0]]
+
+
+def test_unknown_missing_policy():
+    """Test an unknown missing policy."""
+    with pytest.raises(ValueError):
+        FleetAggregator(missing='zero')
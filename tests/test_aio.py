@@ -0,0 +1,275 @@
+"""Tests for aio module."""
+
+import asyncio
+import datetime
+import requests.exceptions
+import responses
+import pytest
+from pysolcast.aio import (AsyncRooftopSite, AsyncUtilitySite, AsyncWeatherSite, AsyncWorld,
+                           get_default_client, get_default_executor)
+from pysolcast.cache import ResponseCache
+from pysolcast.exceptions import RateLimitExceeded, SiteError, ValidationError
+from pysolcast.ratelimit import Clocks, RateLimiter
+from pysolcast.world import World
+from tests.helpers import FakeClock
+
+BASE_URL = 'https://api.solcast.com.au'
+
+
+def test_AsyncRooftopSite():
+    """Test creating object."""
+    # Act
+    site = AsyncRooftopSite('12345', '1234-1234')
+
+    # Assert
+    assert site.resource_id == '1234-1234'
+    assert site.api_key == '12345'
+
+
+@responses.activate
+def test_get_forecasts_concurrent():
+    """Test many async get_forecasts calls on one event loop."""
+    # Arrange
+    resource_ids = [f'site-{index}' for index in range(20)]
+    for resource_id in resource_ids:
+        responses.add(responses.GET, f'{BASE_URL}/rooftop_sites/{resource_id}/forecasts',
+                      json={'forecasts': [{'resource_id': resource_id}]}, status=200)
+
+    async def fetch_all():
+        sites = [AsyncRooftopSite('12345', resource_id, executor=get_default_executor())
+                 for resource_id in resource_ids]
+        return await asyncio.gather(*(site.get_forecasts() for site in sites))
+
+    # Act
+    results = asyncio.run(fetch_all())
+
+    # Assert
+    assert [result['forecasts'][0]['resource_id'] for result in results] == resource_ids
+
+
+@responses.activate
+def test_get_forecasts_utility():
+    """Test async utility forecasts pass through parameters."""
+    # Arrange
+    expected_url = f'{BASE_URL}/utility_scale_sites/1234-1234/forecasts'
+    responses.add(responses.GET, expected_url, json={'forecasts': []}, status=200)
+
+    # Act
+    site = AsyncUtilitySite('12345', '1234-1234', executor=get_default_executor())
+    result = asyncio.run(site.get_forecasts('PT30M', '24'))
+
+    # Assert
+    assert result == {'forecasts': []}
+    assert 'Period=PT30M' in responses.calls[0].request.url
+
+
+@pytest.mark.parametrize('status, exception', [
+    (400, ValidationError),
+    (404, SiteError),
+    (429, RateLimitExceeded),
+])
+@responses.activate
+def test_get_forecasts_errors(status, exception):
+    """Test async sites raise the same exceptions."""
+    # Arrange
+    responses.add(responses.GET, f'{BASE_URL}/weather_sites/1234-1234/forecasts', status=status)
+
+    # Act
+    site = AsyncWeatherSite('12345', '1234-1234', executor=get_default_executor())
+    with pytest.raises(exception):
+        asyncio.run(site.get_forecasts())
+
+
+@responses.activate
+def test_world_get_estimated_actuals():
+    """Test async world estimated actuals."""
+    # Arrange
+    responses.add(responses.GET, f'{BASE_URL}/world_radiation/estimated_actuals',
+                  json={'estimated_actuals': []}, status=200)
+
+    # Act
+    world = AsyncWorld('12345', executor=get_default_executor())
+    result = asyncio.run(world.get_estimated_actuals('-35.1', '149.1'))
+
+    # Assert
+    assert result == {'estimated_actuals': []}
+
+
+@responses.activate
+def test_stream_forecasts_async_iterator():
+    """Test streams are async iterators taking one rate limit token per request."""
+    # Arrange
+    records = [{'pv_estimate': index, 'period_end': '2018-01-01T01:00:00.0000000Z', 'period': 'PT30M'}
+               for index in range(5)]
+    responses.add(responses.GET, f'{BASE_URL}/rooftop_sites/1234-1234/forecasts',
+                  json={'forecasts': records}, status=200)
+    limiter = RateLimiter(rate=1, capacity=5, clocks=Clocks(FakeClock()))
+    site = AsyncRooftopSite('12345', '1234-1234', rate_limiter=limiter,
+                            executor=get_default_executor())
+
+    async def collect():
+        return [record async for record in site.stream_forecasts()]
+
+    # Act
+    result = asyncio.run(collect())
+
+    # Assert
+    assert [record['pv_estimate'] for record in result] == list(range(5))
+    assert limiter.tokens == 4
+
+
+def mock_client(handler):
+    """Async client answering requests with handler."""
+    httpx = pytest.importorskip('httpx')
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_native_get_forecasts_concurrent():
+    """Test many native async calls on one event loop, with parsed variants."""
+    # Arrange
+    httpx = pytest.importorskip('httpx')
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        resource_id = request.url.path.split('/')[2]
+        return httpx.Response(200, json={'forecasts': [{'resource_id': resource_id, 'period': 'PT30M',
+                                                        'period_end': '2018-01-01T01:00:00.0000000Z'}]})
+
+    async def fetch_all():
+        client = mock_client(handler)
+        sites = [AsyncRooftopSite('12345', f'site-{index}', client=client) for index in range(50)]
+        results = await asyncio.gather(*(site.get_forecasts() for site in sites))
+        parsed = await sites[0].get_forecasts_parsed()
+        await client.aclose()
+        return results, parsed
+
+    # Act
+    results, parsed = asyncio.run(fetch_all())
+
+    # Assert
+    assert [result['forecasts'][0]['resource_id'] for result in results] == \
+        [f'site-{index}' for index in range(50)]
+    assert parsed['forecasts'][0]['period'] == datetime.timedelta(minutes=30)
+    assert requests[0].url.params['format'] == 'json'
+    assert requests[0].headers['authorization'].startswith('Basic ')
+
+
+def test_native_world_params_and_rate_limit():
+    """Test native requests pass parameters and take one token each."""
+    # Arrange
+    httpx = pytest.importorskip('httpx')
+    urls = []
+
+    def handler(request):
+        urls.append(str(request.url))
+        return httpx.Response(200, json={'estimated_actuals': []},
+                              headers={'x-rate-limit-remaining': '99'})
+
+    limiter = RateLimiter(rate=1, capacity=5, clocks=Clocks(FakeClock()))
+
+    async def fetch():
+        client = mock_client(handler)
+        world = AsyncWorld('12345', rate_limiter=limiter, client=client)
+        result = await world.get_estimated_actuals('-35.1', '149.1')
+        await client.aclose()
+        return result
+
+    # Act
+    result = asyncio.run(fetch())
+
+    # Assert
+    assert result == {'estimated_actuals': []}
+    assert 'latitude=-35.1' in urls[0] and 'hours' not in urls[0]
+    assert limiter.tokens == 4
+    assert limiter.remaining == 99
+
+
+@pytest.mark.parametrize('status, exception', [
+    (400, ValidationError),
+    (404, SiteError),
+    (429, RateLimitExceeded),
+])
+def test_native_errors(status, exception):
+    """Test native requests raise the same exceptions."""
+    # Arrange
+    httpx = pytest.importorskip('httpx')
+
+    async def fetch():
+        client = mock_client(lambda request: httpx.Response(status))
+        try:
+            return await AsyncWeatherSite('12345', '1234-1234', client=client).get_forecasts()
+        finally:
+            await client.aclose()
+
+    # Act
+    with pytest.raises(exception):
+        asyncio.run(fetch())
+
+
+def test_native_transport_errors_and_timeout():
+    """Test native requests use the site timeout and raise the blocking site's errors."""
+    # Arrange
+    httpx = pytest.importorskip('httpx')
+    timeouts = []
+
+    def handler(request):
+        timeouts.append(request.extensions['timeout'])
+        raise httpx.ReadTimeout('timed out', request=request)
+
+    async def fetch():
+        client = mock_client(handler)
+        async with AsyncRooftopSite('12345', '1234-1234', client=client, timeout=5) as site:
+            return await site.get_forecasts()
+
+    # Act
+    with pytest.raises(requests.exceptions.Timeout):
+        asyncio.run(fetch())
+
+    # Assert
+    assert timeouts[0]['read'] == 5
+
+
+def test_native_cache_key_matches_blocking():
+    """Test native and blocking requests cache under the same key, without None parameters."""
+    # Arrange
+    httpx = pytest.importorskip('httpx')
+    cache = ResponseCache(clock=FakeClock())
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={'forecasts': []})
+
+    async def fetch():
+        client = mock_client(handler)
+        async with AsyncWorld('12345', client=client, cache=cache) as world:
+            return await world.get_forecasts('-35.1', '149.1')
+
+    # Act
+    asyncio.run(fetch())
+    result = World('12345', cache=cache).get_forecasts('-35.1', '149.1')
+
+    # Assert
+    assert result == {'forecasts': []}
+    assert len(calls) == 1
+    assert cache.stats['hits'] == 1
+
+
+def test_aclose_default_client():
+    """Test closing a site closes the event loop's default client."""
+    # Arrange
+    pytest.importorskip('httpx')
+
+    async def close():
+        site = AsyncRooftopSite('12345', '1234-1234')
+        client = get_default_client()
+        await site.aclose()
+        return client, get_default_client()
+
+    # Act
+    client, new_client = asyncio.run(close())
+
+    # Assert
+    assert client.is_closed
+    assert new_client is not client
@@ -0,0 +1,228 @@
+"""Tests for cache module."""
+
+import sqlite3
+import threading
+import responses
+from pysolcast.cache import ResponseCache, SQLiteCache, make_key, next_period_boundary
+from pysolcast.rooftop import RooftopSite
+from tests.helpers import FakeClock
+
+BASE_URL = 'https://api.solcast.com.au'
+
+
+def test_make_key():
+    """Test keys ignore parameter order."""
+    assert make_key('/a', {'b': 1, 'c': '2'}) == make_key('/a', {'c': 2, 'b': '1'})
+    assert make_key('/a') == make_key('/a', {})
+
+
+def test_next_period_boundary():
+    """Test period boundaries."""
+    assert next_period_boundary(0, 'PT30M') == 1800
+    assert next_period_boundary(1799, 'PT30M') == 1800
+    assert next_period_boundary(1800, 'PT30M') == 3600
+    assert next_period_boundary(100, 'PT5M') == 300
+
+
+def test_expires_at_period_boundary():
+    """Test entries expire at the next period boundary."""
+    # Arrange
+    clock = FakeClock(1700.0)
+    cache = ResponseCache(period='PT30M', clock=clock)
+    cache.set('key', {'forecasts': []})
+
+    # Act
+    before = cache.get('key')
+    clock.now = 1800.0
+    after = cache.get('key')
+
+    # Assert
+    assert before == {'forecasts': []}
+    assert after is None
+    assert cache.stats == {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 0}
+
+
+def test_expires_at_request_period_boundary():
+    """Test entries of requests with a Period parameter expire at its boundaries."""
+    # Arrange
+    clock = FakeClock(100.0)
+    cache = ResponseCache(period='PT30M', clock=clock)
+    cache.set(make_key('/a', {'Period': 'PT5M'}), {'forecasts': []})
+    cache.set(make_key('/a', {'Period': 'PT60M'}), {'forecasts': []})
+    cache.set(make_key('/a'), {'forecasts': []})
+
+    # Act
+    clock.set(300.0)
+
+    # Assert
+    assert cache.get(make_key('/a', {'Period': 'PT5M'})) is None
+    assert cache.get(make_key('/a', {'Period': 'PT60M'})) == {'forecasts': []}
+    assert cache.get(make_key('/a')) == {'forecasts': []}
+    clock.set(1800.0)
+    assert cache.get(make_key('/a')) is None
+    assert cache.get(make_key('/a', {'Period': 'PT60M'})) == {'forecasts': []}
+
+
+def test_lru_eviction():
+    """Test least recently used entries are evicted."""
+    # Arrange
+    cache = ResponseCache(maxsize=2, clock=FakeClock())
+    cache.set('a', {'x': 1})
+    cache.set('b', {'x': 2})
+    cache.get('a')
+
+    # Act
+    cache.set('c', {'x': 3})
+
+    # Assert
+    assert cache.get('b') is None
+    assert cache.get('a') == {'x': 1}
+    assert cache.stats['evictions'] == 1
+
+
+def test_get_returns_copy():
+    """Test callers cannot modify cached records."""
+    # Arrange
+    cache = ResponseCache(clock=FakeClock())
+    cache.set('key', {'forecasts': [{'period': 'PT30M'}]})
+
+    # Act
+    cache.get('key')['forecasts'][0]['period'] = 'changed'
+
+    # Assert
+    assert cache.get('key') == {'forecasts': [{'period': 'PT30M'}]}
+
+
+@responses.activate
+def test_site_cache():
+    """Test repeat calls are served from the cache."""
+    # Arrange
+    expected_url = f'{BASE_URL}/rooftop_sites/1234-1234/forecasts'
+    forecast_response = {'forecasts': [{'pv_estimate': '9.5', 'period_end': '2018-01-01T01:00:00.00000Z',
+                                        'period': 'PT30M'}]}
+    responses.add(responses.GET, expected_url, json=forecast_response, status=200)
+    site = RooftopSite('12345', '1234-1234', cache=ResponseCache())
+
+    # Act
+    first = site.get_forecasts_parsed()
+    second = site.get_forecasts_parsed()
+
+    # Assert
+    assert first == second
+    assert len(responses.calls) == 1
+    assert site.options.cache.stats['hits'] == 1
+
+
+def test_sqlite_cache_survives_reopen(tmp_path):
+    """Test responses are served after reopening the cache file."""
+    # Arrange
+    path = str(tmp_path / 'cache.db')
+    clock = FakeClock(100.0)
+    cache = SQLiteCache(path, clock=clock)
+    cache.set('key', {'forecasts': [{'pv_estimate': '9.5'}]},
+              {'x-rate-limit': '10', 'x-rate-limit-remaining': '7', 'x-rate-limit-reset': '1555555555'})
+    cache.close()
+
+    # Act
+    reopened = SQLiteCache(path, clock=clock)
+    entry = reopened.get_entry('key')
+
+    # Assert
+    assert entry['data'] == {'forecasts': [{'pv_estimate': '9.5'}]}
+    assert entry['fetched_at'] == 100.0
+    assert entry['rate_limit'] == {'limit': 10, 'remaining': 7, 'reset': 1555555555}
+
+
+def test_sqlite_cache_expiry_and_eviction(tmp_path):
+    """Test SQLite entries expire at period boundaries and are evicted by age of access."""
+    # Arrange
+    clock = FakeClock(0.0)
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), maxsize=2, clock=clock)
+    cache.set(make_key('/a'), {'x': 1})
+    clock.set(100.0)
+    cache.set(make_key('/b'), {'x': 2})
+    clock.set(200.0)
+    cache.get(make_key('/a'))
+
+    # Act
+    clock.set(300.0)
+    cache.set(make_key('/c'), {'x': 3})
+
+    # Assert
+    assert cache.get(make_key('/b')) is None
+    assert cache.get(make_key('/a')) == {'x': 1}
+    assert cache.stats['evictions'] == 1
+    clock.now = 1800.0
+    assert cache.get(make_key('/a')) is None
+
+
+def test_sqlite_cache_lazy_writes(tmp_path):
+    """Test hits record access at most once per interval and expired entries are purged lazily."""
+    # Arrange
+    path = str(tmp_path / 'cache.db')
+    clock = FakeClock(100.0)
+    cache = SQLiteCache(path, clock=clock)
+    cache.set(make_key('/a', {'Period': 'PT5M'}), {'x': 1})
+
+    def accessed():
+        return sqlite3.connect(path).execute('SELECT accessed FROM responses').fetchall()
+
+    # Act
+    clock.set(130.0)
+    cache.get(make_key('/a', {'Period': 'PT5M'}))
+    before = accessed()
+    clock.set(190.0)
+    cache.get(make_key('/a', {'Period': 'PT5M'}))
+    after = accessed()
+    clock.set(310.0)
+    cache.set(make_key('/b'), {'x': 2})
+    unpurged = len(cache)
+    clock.set(400.0)
+    cache.set(make_key('/c'), {'x': 3})
+
+    # Assert
+    assert before == [(100.0,)]
+    assert after == [(190.0,)]
+    assert unpurged == 2
+    assert len(cache) == 2
+    assert cache.get(make_key('/a', {'Period': 'PT5M'})) is None
+
+
+def test_sqlite_cache_counters_threads(tmp_path):
+    """Test hit and miss counters add up when threads share the cache."""
+    # Arrange
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), clock=FakeClock(100.0))
+    cache.set('key', {'forecasts': []})
+
+    def lookup():
+        for index in range(50):
+            cache.get('key' if index % 2 else 'missing')
+        cache.close()
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+
+    # Act
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert (cache.stats['hits'], cache.stats['misses']) == (200, 200)
+
+
+@responses.activate
+def test_site_sqlite_cache(tmp_path):
+    """Test a new site serves responses cached by an earlier one."""
+    # Arrange
+    expected_url = f'{BASE_URL}/rooftop_sites/1234-1234/forecasts'
+    responses.add(responses.GET, expected_url, json={'forecasts': []}, status=200)
+    path = str(tmp_path / 'cache.db')
+    RooftopSite('12345', '1234-1234', cache=SQLiteCache(path)).get_forecasts()
+
+    # Act
+    forecasts = RooftopSite('12345', '1234-1234', cache=SQLiteCache(path)).get_forecasts()
+
+    # Assert
+    assert forecasts == {'forecasts': []}
+    assert len(responses.calls) == 1
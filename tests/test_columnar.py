@@ -0,0 +1,90 @@
+"""Tests for columnar module."""
+
+import copy
+import pytest
+from pysolcast.base import parse_date_time
+from pysolcast.columnar import ColumnarPoints, ColumnarSeries
+
+np = pytest.importorskip('numpy')
+
+FORECAST_RESPONSE = {
+    "forecasts": [
+        {
+            "pv_estimate": "9.5",
+            "pv_estimate10": "6",
+            "pv_estimate90": "13.8",
+            "period_end": "2018-01-01T01:00:00.0000000Z",
+            "period": "PT30M"
+        },
+        {
+            "pv_estimate": "10",
+            "pv_estimate10": "8",
+            "period_end": "2018-01-01T01:30:00.0000000Z",
+            "period": "PT30M"
+        }
+    ]
+}
+
+
+def test_from_response():
+    """Test building arrays from a raw response."""
+    # Act
+    series = ColumnarSeries.from_response(FORECAST_RESPONSE, 'forecasts')
+
+    # Assert
+    assert len(series) == 2
+    assert series.period_end.dtype == np.dtype('datetime64[us]')
+    assert series['period_end'][1] == np.datetime64('2018-01-01T01:30:00')
+    assert series['period'][0] == np.timedelta64(30, 'm')
+    assert series['pv_estimate'].tolist() == [9.5, 10.0]
+    assert np.isnan(series['pv_estimate90'][1])
+    assert 'pv_estimate10' in series
+
+
+def test_from_parsed_records():
+    """Test parsed records give the same arrays."""
+    # Arrange
+    parsed = parse_date_time(copy.deepcopy(FORECAST_RESPONSE), 'forecasts')
+
+    # Act
+    series = ColumnarSeries.from_response(parsed, 'forecasts')
+    expected = ColumnarSeries.from_response(FORECAST_RESPONSE, 'forecasts')
+
+    # Assert
+    assert (series.period_end == expected.period_end).all()
+    assert (series.period == expected.period).all()
+
+
+def test_non_numeric_field():
+    """Test non-numeric fields are kept as objects."""
+    # Act
+    series = ColumnarSeries.from_records([{'period_end': '2018-01-01T01:00:00Z', 'period': 'PT5M',
+                                           'cloud': 'broken'}])
+
+    # Assert
+    assert series['cloud'].dtype == object
+    assert series['period'][0] == np.timedelta64(300, 's')
+
+
+def test_points_from_results():
+    """Test per-location responses are aligned on one axis."""
+    # Arrange
+    results = [
+        (-35.1, 149.1, {'estimated_actuals': [
+            {'ghi': 1, 'period_end': '2018-01-01T01:00:00.0000000Z', 'period': 'PT30M'},
+            {'ghi': 2, 'period_end': '2018-01-01T01:30:00.0000000Z', 'period': 'PT30M'}]}),
+        (-35.2, 149.2, None),
+        (-35.3, 149.3, {'estimated_actuals': [
+            {'ghi': 3, 'period_end': '2018-01-01T01:30:00.0000000Z', 'period': 'PT30M'}]}),
+    ]
+
+    # Act
+    points = ColumnarPoints.from_results(results, 'estimated_actuals')
+
+    # Assert
+    assert len(points) == 2
+    assert points.latitude.tolist() == [-35.1, -35.3]
+    assert len(points.period_end) == 2
+    assert points['ghi'][0].tolist() == [1.0, 2.0]
+    assert np.isnan(points['ghi'][1][0])
+    assert points['ghi'][1][1] == 3.0
@@ -0,0 +1,176 @@
+"""Tests for fleet module."""
+
+import responses
+import pytest
+from pysolcast.exceptions import SiteError
+from pysolcast.exceptions import RateLimitExceeded
+from pysolcast.fleet import fetch_fleet, fetch_fleet_processes, iter_world
+from pysolcast.ratelimit import Clocks, RateLimiter, SharedRateLimiter
+from pysolcast.rooftop import RooftopSite
+from tests.helpers import frozen_clock
+
+BASE_URL = 'https://api.solcast.com.au'
+ROOFTOP_URI = 'rooftop_sites'
+
+
+@responses.activate
+def test_fetch_fleet():
+    """Test fetching forecasts and estimated actuals for several sites."""
+    # Arrange
+    resource_ids = ['site-1', 'site-2', 'site-3']
+    for resource_id in resource_ids:
+        for endpoint in ('forecasts', 'estimated_actuals'):
+            responses.add(responses.GET, f'{BASE_URL}/{ROOFTOP_URI}/{resource_id}/{endpoint}',
+                          json={endpoint: [{'resource_id': resource_id}]}, status=200)
+
+    # Act
+    fleet = fetch_fleet(resource_ids, api_key='12345', max_workers=4)
+
+    # Assert
+    assert sorted(fleet.results) == resource_ids
+    assert fleet.results['site-2']['estimated_actuals'] == {'estimated_actuals': [{'resource_id': 'site-2'}]}
+    assert fleet.errors == {}
+    assert fleet.stats.requests == 6
+    assert fleet.stats.errors == 0
+    assert fleet.stats.requests_per_second > 0
+
+
+@responses.activate
+def test_fetch_fleet_partial_failure():
+    """Test a failing site does not abort the batch."""
+    # Arrange
+    responses.add(responses.GET, f'{BASE_URL}/{ROOFTOP_URI}/good/forecasts', json={'forecasts': []}, status=200)
+    responses.add(responses.GET, f'{BASE_URL}/{ROOFTOP_URI}/bad/forecasts', status=404)
+    sites = [RooftopSite('12345', 'good'), RooftopSite('12345', 'bad')]
+
+    # Act
+    fleet = fetch_fleet(sites, endpoints=('forecasts',))
+
+    # Assert
+    assert fleet.results == {'good': {'forecasts': {'forecasts': []}}}
+    assert isinstance(fleet.errors['bad']['forecasts'], SiteError)
+    assert fleet.stats.errors == 1
+
+
+def test_fetch_fleet_requires_api_key():
+    """Test resource ids without an api key."""
+    with pytest.raises(ValueError):
+        fetch_fleet(['site-1'])
+
+
+class FakeWorld:
+    """World client returning one record per location."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_forecasts(self, latitude, longitude, hours=None):
+        """Return the same response as estimated actuals."""
+        return self.get_estimated_actuals(latitude, longitude, hours)
+
+    def get_estimated_actuals(self, latitude, longitude, hours=None):
+        """Return a response, failing for latitude 0."""
+        self.calls.append((latitude, longitude, hours))
+        if float(latitude) == 0:
+            raise SiteError('Site error')
+        return {'estimated_actuals': [{'ghi': float(latitude), 'period_end': '2018-01-01T01:00:00.0000000Z',
+                                       'period': 'PT30M'}]}
+
+
+def test_iter_world():
+    """Test bulk World fetches with local validation and per-point errors."""
+    # Arrange
+    world = FakeWorld()
+    coordinates = [(-35.1, 149.1), (95, 0), ('x', 0), (0, 0)] + [(index, 10) for index in range(1, 11)]
+
+    # Act
+    results = list(iter_world(world, coordinates, hours='24', max_workers=3))
+
+    # Assert
+    assert len(results) == 14
+    assert len(world.calls) == 12
+    errors = [result for result in results if result.error]
+    assert sorted(type(result.error).__name__ for result in errors) == ['SiteError', 'ValidationError',
+                                                                        'ValidationError']
+    assert world.calls[0] == ('-35.1', '149.1', '24')
+
+
+def test_iter_world_all_invalid():
+    """Test a run of invalid coordinates does not end the sweep early."""
+    # Arrange
+    world = FakeWorld()
+    coordinates = [(100, 0)] * 5 + [(1, 1)]
+
+    # Act
+    results = list(iter_world(world, coordinates, max_workers=2))
+
+    # Assert
+    assert len(results) == 6
+    assert len(world.calls) == 1
+
+
+class FakeSite:
+    """Site built in worker processes, failing for resource id ``bad``."""
+
+    def __init__(self, api_key, resource_id, options=None):
+        self.api_key = api_key
+        self.resource_id = resource_id
+        self.options = options
+
+    def get_forecasts(self):
+        """Return one record per site."""
+        if self.options.rate_limiter is not None:
+            self.options.rate_limiter.acquire()
+        if self.resource_id == 'bad':
+            raise SiteError('Site error')
+        return {'forecasts': [{'pv_estimate': 1.5, 'period_end': '2018-01-01T01:00:00.0000000Z',
+                               'period': 'PT30M'}]}
+
+    def get_estimated_actuals(self):
+        """Return no records."""
+        return {'estimated_actuals': []}
+
+
+def test_fetch_fleet_processes():
+    """Test fetching on worker processes with parsed output and per-site errors."""
+    # Arrange
+    resource_ids = [f'site-{index}' for index in range(9)] + ['bad']
+
+    # Act
+    fleet = fetch_fleet_processes(resource_ids, '12345', endpoints=('forecasts',), processes=2, max_workers=2,
+                                  output='parsed', site_class=FakeSite, chunk_size=3)
+
+    # Assert
+    assert sorted(fleet.results) == sorted(resource_ids[:-1])
+    assert fleet.results['site-4']['forecasts']['forecasts'][0]['pv_estimate'] == 1.5
+    assert isinstance(fleet.errors['bad']['forecasts'], SiteError)
+    assert (fleet.stats.sites, fleet.stats.requests, fleet.stats.errors) == (10, 10, 1)
+    assert len(fleet.stats.latencies) == 9
+
+
+def test_fetch_fleet_processes_columnar_and_shared_limit():
+    """Test columnar results and one rate limit across every worker."""
+    # Arrange
+    np = pytest.importorskip('numpy')
+    limiter = SharedRateLimiter(rate=1, capacity=4, max_wait=0, clocks=Clocks(frozen_clock))
+    resource_ids = [f'site-{index}' for index in range(6)]
+
+    # Act
+    fleet = fetch_fleet_processes(resource_ids, '12345', endpoints=('forecasts',), processes=2,
+                                  rate_limiter=limiter, site_class=FakeSite, chunk_size=1)
+
+    # Assert
+    assert len(fleet.results) == 4
+    assert all(isinstance(error['forecasts'], RateLimitExceeded) for error in fleet.errors.values())
+    series = next(iter(fleet.results.values()))['forecasts']
+    assert series.period_end[0] == np.datetime64('2018-01-01T01:00:00')
+    assert series['pv_estimate'][0] == 1.5
+
+
+def test_fetch_fleet_processes_rejects_unshared_limiter():
+    """Test a limiter that cannot be shared between processes."""
+    with pytest.raises(ValueError):
+        fetch_fleet_processes(['site-1'], '12345', rate_limiter=RateLimiter(rate=1), output='raw')
+    with pytest.raises(ValueError):
+        fetch_fleet_processes(['site-1'], '12345', output='xml')
+
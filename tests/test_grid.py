@@ -0,0 +1,88 @@
+"""Tests for grid module."""
+
+import threading
+import time
+import pytest
+from pysolcast.exceptions import SiteError
+from pysolcast.grid import GridWorld, snap
+
+
+class FakeWorld:
+    """World client counting calls, optionally slow or failing."""
+
+    def __init__(self, delay=0.0, error=None):
+        self.calls = []
+        self.delay = delay
+        self.error = error
+
+    def get_forecasts(self, latitude, longitude, hours=None):
+        """Return a response naming the requested cell."""
+        self.calls.append((latitude, longitude, hours))
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {'forecasts': [{'cell': f'{latitude},{longitude}'}]}
+
+    get_estimated_actuals = get_forecasts
+
+
+def test_snap():
+    """Test snapping to the nearest grid node."""
+    assert snap('-35.1234', 0.01) == -35.12
+    assert snap(149.126, 0.01) == 149.13
+    assert snap(149.126, 0.25) == 149.25
+
+
+def test_nearby_points_share_a_call():
+    """Test points in one cell are served from one response."""
+    # Arrange
+    world = FakeWorld()
+    grid = GridWorld(world, resolution=0.1)
+
+    # Act
+    first = grid.get_forecasts('-35.12', '149.12')
+    second = grid.get_forecasts('-35.08', '149.14')
+    other = grid.get_estimated_actuals('-35.12', '149.12')
+
+    # Assert
+    assert first == second == {'forecasts': [{'cell': '-35.1,149.1'}]}
+    assert other == first
+    assert len(world.calls) == 2
+    assert grid.stats == {'requests': 3, 'api_calls': 2, 'cache_hits': 1, 'deduplicated': 0, 'calls_saved': 1}
+
+
+def test_concurrent_requests_deduplicated():
+    """Test concurrent requests for one cell make one call."""
+    # Arrange
+    world = FakeWorld(delay=0.05)
+    grid = GridWorld(world)
+    results = []
+
+    # Act
+    threads = [threading.Thread(target=lambda: results.append(grid.get_forecasts('-35.12', '149.12')))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert len(world.calls) == 1
+    assert len(results) == 5
+    assert grid.calls_saved == 4
+
+
+def test_error_not_cached():
+    """Test errors propagate and are not cached."""
+    # Arrange
+    world = FakeWorld(error=SiteError('Site error'))
+    grid = GridWorld(world)
+
+    # Act
+    with pytest.raises(SiteError):
+        grid.get_forecasts('0', '0')
+    world.error = None
+    result = grid.get_forecasts('0', '0')
+
+    # Assert
+    assert result == {'forecasts': [{'cell': '0.0,0.0'}]}
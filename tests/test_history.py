@@ -0,0 +1,98 @@
+"""Tests for history module."""
+
+import copy
+import pytest
+from pysolcast.base import parse_date_time
+from pysolcast.history import ForecastHistory
+
+np = pytest.importorskip('numpy')
+
+
+def run(start_hour, values, extra=None):
+    """Build a parsed forecast run of hourly records."""
+    forecasts = []
+    for index, value in enumerate(values):
+        record = {'pv_estimate': value, 'pv_estimate10': value / 2, 'period': 'PT60M',
+                  'period_end': f'2018-01-01T{start_hour + index:02d}:00:00.0000000Z'}
+        if extra is not None:
+            record['pv_estimate90'] = extra
+        forecasts.append(record)
+    return parse_date_time({'forecasts': forecasts}, 'forecasts')
+
+
+RUNS = [run(0, [1.0, 2.0, 3.0, 4.0]), run(1, [2.0, 3.5, 4.0, 5.0]), run(2, [3.5, 4.0, 5.0, 6.0]),
+        run(2, [3.5, 4.0, 5.0, 6.0], extra=9.0), run(5, [7.0])]
+
+
+def expected(index):
+    """Columns of a run built directly."""
+    records = RUNS[index]['forecasts']
+    return [record['pv_estimate'] for record in records]
+
+
+@pytest.mark.parametrize('keyframe_interval', [1, 2, 24])
+def test_reconstruct(keyframe_interval):
+    """Test every run is rebuilt exactly, in any order."""
+    # Arrange
+    history = ForecastHistory(keyframe_interval=keyframe_interval)
+    for index, data in enumerate(copy.deepcopy(RUNS)):
+        history.add(data, fetched_at=index * 100)
+
+    # Act
+    rebuilt = [history.get(index) for index in (4, 0, 3, 1, 2)]
+
+    # Assert
+    assert [series['pv_estimate'].tolist() for series in rebuilt] == \
+        [expected(index) for index in (4, 0, 3, 1, 2)]
+    assert rebuilt[3]['period_end'][0] == np.datetime64('2018-01-01T01:00')
+    assert rebuilt[3]['period'][0] == np.timedelta64(3600, 's')
+    assert 'pv_estimate90' not in rebuilt[3].fields
+    assert rebuilt[2]['pv_estimate90'].tolist() == [9.0] * 4
+    assert history.get()['pv_estimate10'].tolist() == [3.5]
+    assert not rebuilt[0]['pv_estimate'].flags.writeable
+
+
+def test_deltas_are_smaller():
+    """Test overlapping runs are stored as deltas."""
+    # Arrange
+    keyframes = ForecastHistory(keyframe_interval=1)
+    deltas = ForecastHistory()
+
+    # Act
+    for data in RUNS[:3]:
+        keyframes.add(copy.deepcopy(data))
+        deltas.add(copy.deepcopy(data))
+
+    # Assert
+    assert deltas.nbytes < keyframes.nbytes
+    assert deltas.keyframes == [0]
+    assert keyframes.keyframes == [0, 1, 2]
+
+
+def test_diff_and_revisions():
+    """Test diffs and revisions between runs."""
+    # Arrange
+    history = ForecastHistory()
+    for index, data in enumerate(copy.deepcopy(RUNS[:3])):
+        history.add(data, fetched_at=index * 100)
+
+    # Act
+    delta = history.diff(0, 2)
+    windowed = history.diff(1, 2).between('2018-01-01T03:00', '2018-01-01T03:00')
+    fetched_at, values = history.revisions('2018-01-01T03:00')
+
+    # Assert
+    assert delta['period_end'].tolist() == [np.datetime64('2018-01-01T02:00', 'us'),
+                                            np.datetime64('2018-01-01T03:00', 'us')]
+    assert delta['pv_estimate'].tolist() == [0.5, 0.0]
+    assert windowed['pv_estimate'].tolist() == [0.0]
+    assert fetched_at.tolist() == [0.0, 100.0, 200.0]
+    assert values.tolist() == [4.0, 4.0, 4.0]
+    assert history.run_at(150) == 1
+    assert history.run_at(-1) is None
+
+
+def test_missing_run():
+    """Test reading a run that does not exist."""
+    with pytest.raises(IndexError):
+        ForecastHistory().get()
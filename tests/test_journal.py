@@ -0,0 +1,226 @@
+"""Tests for journal module."""
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+import pytest
+import responses
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from pysolcast.exceptions import ValidationError
+from pysolcast.journal import DEAD_LETTER_FILE, LOG_FILE, MeasurementJournal
+from pysolcast.rooftop import RooftopSite
+
+BASE_URL = 'https://api.solcast.com.au'
+
+
+@dataclass
+class FakeSite:
+    """Site recording posted batches."""
+
+    errors: list = field(default_factory=list)
+    delay: float = 0.0
+    posted: list = field(default_factory=list)
+
+    def post_measurements(self, data):
+        """Record a batch after the delay, raising queued errors first."""
+        time.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        self.posted.extend(data['measurements'])
+        return data
+
+
+def test_append_survives_reopen(tmp_path):
+    """Test pending entries survive closing the journal."""
+    # Arrange
+    journal = MeasurementJournal(str(tmp_path))
+    journal.append('site-1', {'total_power': 1})
+    journal.append('site-2', {'total_power': 2})
+    journal.close()
+
+    # Act
+    reopened = MeasurementJournal(str(tmp_path))
+
+    # Assert
+    assert [entry['seq'] for entry in reopened.pending()] == [1, 2]
+    assert reopened.append('site-1', {'total_power': 3}) == 3
+
+
+def test_torn_entry_ignored(tmp_path):
+    """Test a partially written last line is skipped."""
+    # Arrange
+    journal = MeasurementJournal(str(tmp_path))
+    journal.append('site-1', {'total_power': 1})
+    journal.close()
+    with open(tmp_path / LOG_FILE, 'a', encoding='utf-8') as log_file:
+        log_file.write('{"seq": 2, "resource')
+
+    # Act
+    reopened = MeasurementJournal(str(tmp_path))
+    reopened.append('site-1', {'total_power': 2})
+    reopened.close()
+
+    # Assert
+    with open(tmp_path / LOG_FILE, encoding='utf-8') as log_file:
+        assert [json.loads(line)['seq'] for line in log_file] == [1, 2]
+    assert len(MeasurementJournal(str(tmp_path))) == 2
+
+
+def test_replay_in_order(tmp_path):
+    """Test replay posts in order and acknowledges what was sent."""
+    # Arrange
+    journal = MeasurementJournal(str(tmp_path))
+    site = FakeSite()
+    for index in range(5):
+        journal.append('site-1', {'total_power': index})
+
+    # Act
+    acknowledged = journal.replay({'site-1': site}, batch_size=2)
+
+    # Assert
+    assert acknowledged == 5
+    assert [item['total_power'] for item in site.posted] == [0, 1, 2, 3, 4]
+    assert not journal.pending()
+    assert MeasurementJournal(str(tmp_path)).pending() == []
+
+
+def test_replay_stops_on_outage(tmp_path):
+    """Test an outage keeps the failed entry and later ones pending."""
+    # Arrange
+    journal = MeasurementJournal(str(tmp_path))
+    site = FakeSite(errors=[ValidationError(), RequestsConnectionError()])
+    for index in range(3):
+        journal.append('site-1', {'total_power': index})
+
+    # Act
+    first = journal.replay({'site-1': site}, batch_size=1)
+    second = journal.replay({'site-1': site}, batch_size=1)
+
+    # Assert
+    assert first == 1
+    assert journal.stats['dropped'] == 1
+    assert second == 2
+    assert [item['total_power'] for item in site.posted] == [1, 2]
+
+
+def test_compaction(tmp_path):
+    """Test acknowledged entries are removed from the log."""
+    # Arrange
+    journal = MeasurementJournal(str(tmp_path), compact_after=2)
+    for index in range(3):
+        journal.append('site-1', {'total_power': index})
+    journal.append('site-2', {'total_power': 9})
+
+    # Act
+    journal.replay({'site-1': FakeSite(), 'site-2': FakeSite([RequestsConnectionError()])})
+
+    # Assert
+    with open(tmp_path / LOG_FILE, encoding='utf-8') as log_file:
+        lines = log_file.readlines()
+    assert len(lines) == 1
+    assert journal.pending()[0]['resource_id'] == 'site-2'
+
+
+def test_unknown_site_dead_lettered(tmp_path):
+    """Test entries for a site missing from sites are moved aside instead of stalling replay."""
+    # Arrange
+    journal = MeasurementJournal(str(tmp_path))
+    journal.append('site-1', {'total_power': 1})
+    journal.append('gone', {'total_power': 2})
+    journal.append('site-1', {'total_power': 3})
+    site = FakeSite()
+
+    # Act
+    acknowledged = journal.replay({'site-1': site})
+
+    # Assert
+    assert acknowledged == 3
+    assert len(journal) == 0
+    assert journal.stats['dropped'] == 1
+    assert [item['total_power'] for item in site.posted] == [1, 3]
+    with open(tmp_path / DEAD_LETTER_FILE, encoding='utf-8') as dead_file:
+        assert [json.loads(line)['seq'] for line in dead_file] == [2]
+
+
+def test_concurrent_replays_post_once(tmp_path):
+    """Test a manual replay and the background thread do not post the same entries twice."""
+    # Arrange
+    journal = MeasurementJournal(str(tmp_path))
+    for index in range(3):
+        journal.append('site-1', {'total_power': index})
+    site = FakeSite(delay=0.05)
+    threads = [threading.Thread(target=journal.replay, args=({'site-1': site},)) for _ in range(2)]
+
+    # Act
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert [item['total_power'] for item in site.posted] == [0, 1, 2]
+    assert journal.stats['posted'] == 3
+
+
+def test_pending_reads_from_last_ack(tmp_path):
+    """Test pending entries are read from the end of the last acknowledged, also after reopening."""
+    # Arrange
+    journal = MeasurementJournal(str(tmp_path))
+    journal.append('site-1', {'total_power': 1})
+    journal.replay({'site-1': FakeSite()})
+    journal.append('site-1', {'total_power': 2})
+    journal.close()
+
+    # Act
+    reopened = MeasurementJournal(str(tmp_path))
+
+    # Assert
+    assert journal.ack == reopened.ack
+    assert reopened.ack.offset > 0
+    assert [entry['seq'] for entry in reopened.pending()] == [2]
+    assert len(reopened) == 1
+
+
+@pytest.mark.parametrize('status', [429, 503])
+@responses.activate
+def test_replay_keeps_failed_status_pending(tmp_path, status):
+    """Test entries rejected with a rate limit or server error stay pending."""
+    # Arrange
+    resource_id = '1234-1234'
+    responses.add(responses.POST, f'{BASE_URL}/rooftop_sites/{resource_id}/measurements',
+                  status=status)
+    journal = MeasurementJournal(str(tmp_path))
+    journal.append(resource_id, {'total_power': 1})
+
+    # Act
+    acknowledged = journal.replay({resource_id: RooftopSite('12345', resource_id)})
+
+    # Assert
+    assert acknowledged == 0
+    assert [entry['seq'] for entry in journal.pending()] == [1]
+    assert journal.stats == {'posted': 0, 'dropped': 0, 'errors': 1}
+
+
+def test_replay_without_result_not_acknowledged(tmp_path):
+    """Test a post returning no result is not acknowledged."""
+    # Arrange
+    @dataclass
+    class SilentSite:
+        """Site returning no result."""
+
+        posts: int = 0
+
+        def post_measurements(self, data):
+            """Count a post without returning a result."""
+            self.posts += len(data['measurements'])
+
+    journal = MeasurementJournal(str(tmp_path))
+    journal.append('site-1', {'total_power': 1})
+
+    # Act
+    acknowledged = journal.replay({'site-1': SilentSite()})
+
+    # Assert
+    assert acknowledged == 0
+    assert len(journal) == 1
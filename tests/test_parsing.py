@@ -0,0 +1,81 @@
+"""Tests for parsing module."""
+
+import datetime
+import isodate
+import pytest
+from pysolcast.parsing import duration_microseconds, parse_datetime, parse_duration, parse_response
+
+
+@pytest.mark.parametrize('value', [
+    '2018-01-01T01:00:00.0000000Z',
+    '2018-01-01T12:30:00.00000Z',
+    '2018-01-01T01:00:00.1234567Z',
+    '2018-01-01T01:00:00.9999999Z',
+    '2018-01-01T01:00:00.5Z',
+    '2018-01-01T01:00:00Z',
+    '2018-01-01T01:00:00+10:00',
+    '2018-01-01T01:00:00',
+    '20180101T010000Z',
+])
+def test_parse_datetime_matches_isodate(value):
+    """Test fast parsing gives the same result as isodate."""
+    # Act
+    parsed = parse_datetime(value)
+    expected = isodate.parse_datetime(value)
+
+    # Assert
+    assert parsed == expected
+    assert parsed.utcoffset() == expected.utcoffset()
+
+
+def test_parse_datetime_utc():
+    """Test Solcast timestamps use the isodate UTC timezone."""
+    assert parse_datetime('2018-01-01T01:00:00.0000000Z').tzinfo is isodate.UTC
+
+
+def test_parse_datetime_invalid():
+    """Test invalid timestamps raise as isodate does."""
+    with pytest.raises(ValueError):
+        parse_datetime('2018-13-01T01:00:00Z')
+
+
+@pytest.mark.parametrize('value', ['PT30M', 'PT5M', 'PT1H', 'P1D', 'P1M'])
+def test_parse_duration_matches_isodate(value):
+    """Test memoized durations match isodate."""
+    assert parse_duration(value) == isodate.parse_duration(value)
+
+
+def test_parse_duration_memoized():
+    """Test each distinct duration is parsed once."""
+    assert parse_duration('PT15M') is parse_duration('PT15M')
+
+
+@pytest.mark.parametrize('value', ['PT30M', datetime.timedelta(minutes=30)])
+def test_duration_microseconds(value):
+    """Test durations are converted to microseconds."""
+    assert duration_microseconds(value) == 1800000000
+
+
+def test_parse_response():
+    """Test records are converted to typed values."""
+    # Arrange
+    response = {'forecasts': [{
+        'pv_estimate': '9.5',
+        'ghi': 690,
+        'period_end': '2018-01-01T01:00:00.0000000Z',
+        'period': 'PT30M',
+        'status': 'ok',
+        'flag': True,
+    }]}
+
+    # Act
+    parsed = parse_response(response, 'forecasts')
+
+    # Assert
+    record = parsed['forecasts'][0]
+    assert record['pv_estimate'] == 9.5
+    assert isinstance(record['ghi'], float)
+    assert record['period_end'] == isodate.parse_datetime('2018-01-01T01:00:00Z')
+    assert record['period'] == datetime.timedelta(minutes=30)
+    assert record['status'] == 'ok'
+    assert record['flag'] is True
@@ -0,0 +1,111 @@
+"""Tests for probabilistic module."""
+
+import pytest
+from pysolcast.aggregate import FleetAggregator
+from pysolcast.probabilistic import Grouped, Independent, Uniform, Z90, aggregator_quantiles, fleet_quantiles
+
+np = pytest.importorskip('numpy')
+
+
+def symmetric(sites, periods=2, spread=1.0):
+    """Build P10, P50 and P90 arrays with P50 of 10 and a symmetric spread."""
+    p50 = np.full((sites, periods), 10.0)
+    return p50 - spread * Z90, p50, p50 + spread * Z90
+
+
+def test_independent_narrower_than_summed():
+    """Test independent sites give a fleet spread of sqrt(n) times a site's."""
+    # Arrange
+    p10, p50, p90 = symmetric(100)
+
+    # Act
+    result = fleet_quantiles(p10, p50, p90)
+
+    # Assert
+    assert result[0.5] == pytest.approx([1000.0, 1000.0])
+    assert result[0.9] - result[0.5] == pytest.approx([10 * Z90] * 2)
+    assert (result[0.9] - result[0.1] < p90.sum(axis=0) - p10.sum(axis=0)).all()
+
+
+def test_uniform_correlation():
+    """Test fully correlated sites match summing quantiles."""
+    # Arrange
+    p10, p50, p90 = symmetric(50)
+
+    # Act
+    result = fleet_quantiles(p10, p50, p90, correlation=Uniform(1.0), chunk_size=7)
+
+    # Assert
+    assert result[0.1] == pytest.approx(p10.sum(axis=0))
+    assert result[0.9] == pytest.approx(p90.sum(axis=0))
+
+
+def test_grouped_correlation():
+    """Test groups add variance between the independent and uniform cases."""
+    # Arrange
+    p10, p50, p90 = symmetric(40)
+    labels = ['north'] * 20 + ['south'] * 20
+
+    # Act
+    grouped = fleet_quantiles(p10, p50, p90, correlation=Grouped(labels, within=0.5, between=0.1), chunk_size=16)
+
+    # Assert
+    variance = 0.1 * 40 ** 2 + 0.4 * 2 * 20 ** 2 + 0.5 * 40
+    assert grouped[0.9] - grouped[0.5] == pytest.approx([Z90 * variance ** 0.5] * 2)
+
+
+@pytest.mark.parametrize('skewed, correlation', [
+    (True, Independent()),
+    (False, Grouped(np.arange(300) % 3, within=0.3, between=0.1)),
+])
+def test_sample_matches_analytic(skewed, correlation):
+    """Test sampling agrees with the analytic method and is reproducible across workers."""
+    # Arrange
+    p10, p50, p90 = symmetric(300, spread=2.0)
+    if skewed:
+        p10[::2] = 9.0
+    weights = np.linspace(0.5, 1.5, 300)
+
+    # Act
+    analytic = fleet_quantiles(p10, p50, p90, weights, correlation=correlation)
+    sampled = fleet_quantiles(p10, p50, p90, weights, correlation=correlation, method='sample', samples=20000, seed=1,
+                              chunk_size=64)
+    threaded = fleet_quantiles(p10, p50, p90, weights, correlation=correlation, method='sample', samples=20000, seed=1,
+                               chunk_size=64, workers=4)
+
+    # Assert
+    for quantile in (0.1, 0.5, 0.9):
+        assert sampled[quantile] == pytest.approx(analytic[quantile], rel=0.01)
+        assert threaded[quantile] == pytest.approx(sampled[quantile])
+
+
+def test_aggregator_quantiles():
+    """Test quantiles of an aggregator's sites."""
+    # Arrange
+    aggregator = FleetAggregator()
+    for index in range(4):
+        aggregator.add_site(f'site-{index}', weight=0.5)
+        aggregator.update(f'site-{index}', {'forecasts': [{
+            'pv_estimate': 10, 'pv_estimate10': 10 - Z90, 'pv_estimate90': 10 + Z90,
+            'period_end': '2018-01-01T00:30:00.0000000Z', 'period': 'PT30M'}]})
+
+    # Act
+    series = aggregator_quantiles(aggregator, Independent(), quantiles=(0.1, 0.5, 0.9))
+
+    # Assert
+    assert series['pv_estimate'].tolist() == pytest.approx([20.0])
+    assert series['pv_estimate90'].tolist() == pytest.approx([20.0 + Z90])
+    assert series['period_end'][0] == np.datetime64('2018-01-01T00:30')
+
+
+def test_invalid_arguments():
+    """Test invalid correlations, methods and shapes."""
+    p10, p50, p90 = symmetric(2)
+    with pytest.raises(ValueError):
+        Grouped(['a', 'b'], within=0.1, between=0.2)
+    with pytest.raises(ValueError):
+        fleet_quantiles(p10, p50, p90, method='exact')
+    with pytest.raises(ValueError):
+        fleet_quantiles(p10, p50, p90[:1])
+    with pytest.raises(ValueError):
+        fleet_quantiles(p10, p50, p90, correlation=Grouped(['a'], within=0.5))
@@ -0,0 +1,142 @@
+"""Tests for ratelimit module."""
+
+import asyncio
+import multiprocessing
+import responses
+import pytest
+from pysolcast.aio import AsyncRooftopSite, get_default_executor
+from pysolcast.exceptions import RateLimitExceeded
+from pysolcast.ratelimit import (Clocks, RateLimiter, SharedRateLimiter, parse_rate_limit_headers,
+                                 parse_retry_after)
+from pysolcast.rooftop import RooftopSite
+from tests.helpers import FakeClock, frozen_clock
+
+BASE_URL = 'https://api.solcast.com.au'
+
+
+def use_shared_limiter(limiter):
+    """Take two tokens and report an exhausted quota from another process."""
+    limiter.acquire()
+    limiter.acquire()
+    limiter.update({'x-rate-limit': '50', 'x-rate-limit-remaining': '0', 'x-rate-limit-reset': '1060'})
+
+
+def test_parse_rate_limit_headers():
+    """Test parsing rate limit headers."""
+    # Act
+    parsed = parse_rate_limit_headers({'x-rate-limit': '10', 'x-rate-limit-remaining': '0',
+                                       'x-rate-limit-reset': '1555555555'})
+
+    # Assert
+    assert parsed == {'limit': 10, 'remaining': 0, 'reset': 1555555555}
+    assert parse_rate_limit_headers({}) == {'limit': None, 'remaining': None, 'reset': None}
+
+
+def test_parse_retry_after():
+    """Test parsing Retry-After as seconds or an HTTP date."""
+    # Act
+    seconds = parse_retry_after({'retry-after': '120'})
+    date = parse_retry_after({'retry-after': 'Thu, 18 Apr 2019 02:46:05 GMT'}, now=1555555555)
+
+    # Assert
+    assert seconds == 120
+    assert date == 10
+    assert parse_retry_after({}) is None
+    assert parse_retry_after({'retry-after': 'soon'}) is None
+
+
+def test_token_bucket_spacing():
+    """Test requests are spaced by the configured rate."""
+    # Arrange
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2, capacity=2, clocks=Clocks(clock))
+
+    # Act
+    waits = [limiter.reserve() for _ in range(4)]
+
+    # Assert
+    assert waits == [0.0, 0.0, 0.5, 1.0]
+
+
+def test_update_pauses_until_reset():
+    """Test a 429 pauses callers until the reset time."""
+    # Arrange
+    clock = FakeClock()
+    limiter = RateLimiter(rate=100, capacity=10, clocks=Clocks(clock, lambda: 1000.0))
+
+    # Act
+    limiter.update({'x-rate-limit-reset': '1030'}, 429)
+
+    # Assert
+    assert limiter.reserve() == 30.0
+    clock.set(30.0)
+    assert limiter.reserve() == 0.0
+
+
+def test_max_wait():
+    """Test waits beyond max_wait raise RateLimitExceeded."""
+    # Arrange
+    limiter = RateLimiter(rate=1, max_wait=5, clocks=Clocks(FakeClock(), lambda: 1000.0))
+    limiter.update({'x-rate-limit-remaining': '0', 'x-rate-limit-reset': '1060'})
+
+    # Act
+    with pytest.raises(RateLimitExceeded) as error:
+        limiter.acquire()
+
+    # Assert
+    assert error.value.reset == 1060.0
+    assert (limiter.limit, limiter.remaining, limiter.reset) == (None, 0, 1060)
+
+
+@responses.activate
+def test_site_updates_limiter():
+    """Test sites report responses to a shared limiter."""
+    # Arrange
+    expected_url = f'{BASE_URL}/rooftop_sites/1234-1234/forecasts'
+    responses.add(responses.GET, expected_url, status=429, adding_headers={'x-rate-limit-reset': '1555555555'})
+    limiter = RateLimiter(rate=100, capacity=10, max_wait=0,
+                          clocks=Clocks(wall=lambda: 1555555000.0))
+    site = RooftopSite('12345', '1234-1234', rate_limiter=limiter)
+
+    # Act
+    with pytest.raises(RateLimitExceeded) as error:
+        site.get_forecasts()
+
+    # Assert
+    assert error.value.reset == 1555555555
+    with pytest.raises(RateLimitExceeded):
+        site.get_forecasts()
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_async_site_uses_limiter_once():
+    """Test async sites take one token per call."""
+    # Arrange
+    expected_url = f'{BASE_URL}/rooftop_sites/1234-1234/forecasts'
+    responses.add(responses.GET, expected_url, json={'forecasts': []}, status=200)
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, capacity=2, clocks=Clocks(clock))
+    site = AsyncRooftopSite('12345', '1234-1234', rate_limiter=limiter, executor=get_default_executor())
+
+    # Act
+    asyncio.run(site.get_forecasts())
+
+    # Assert
+    assert limiter.tokens == 1
+
+
+def test_shared_limiter_across_processes():
+    """Test tokens and a reported quota are shared with worker processes."""
+    # Arrange
+    limiter = SharedRateLimiter(rate=1, capacity=2, clocks=Clocks(frozen_clock, lambda: 1000.0))
+    process = multiprocessing.Process(target=use_shared_limiter, args=(limiter,))
+
+    # Act
+    process.start()
+    process.join(30)
+
+    # Assert
+    assert process.exitcode == 0
+    assert (limiter.limit, limiter.remaining, limiter.reset) == (50, 0, 1060)
+    assert limiter.reserve() == 60.0
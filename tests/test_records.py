@@ -0,0 +1,52 @@
+"""Tests for records module."""
+
+import datetime
+import responses
+from pysolcast.records import record_type, to_records
+from pysolcast.rooftop import RooftopSite
+
+BASE_URL = 'https://api.solcast.com.au'
+
+
+def test_record_type_reused():
+    """Test one class per field set."""
+    assert record_type(('a', 'b')) is record_type(['a', 'b'])
+    assert record_type(('a', 'b')) is not record_type(('b', 'a'))
+
+
+def test_to_records():
+    """Test records are typed, compact and share repeated values."""
+    # Arrange
+    items = [
+        {'pv_estimate': '9.5', 'period_end': '2018-01-01T01:00:00.0000000Z', 'period': 'PT30M'},
+        {'pv_estimate': '10', 'period_end': '2018-01-01T01:30:00.0000000Z', 'period': 'PT30M', 'note': 'x'},
+    ]
+
+    # Act
+    records = to_records(items)
+
+    # Assert
+    assert records[0].pv_estimate == 9.5
+    assert records[1].period_end.minute == 30
+    assert records[0].period == datetime.timedelta(minutes=30)
+    assert records[0].period is records[1].period
+    assert records[0].note is None
+    assert not hasattr(records[0], '__dict__')
+    assert records[1]._asdict()['note'] == 'x'
+
+
+@responses.activate
+def test_site_compact():
+    """Test sites return compact records when enabled."""
+    # Arrange
+    resource_id = '1234-1234'
+    responses.add(responses.GET, f'{BASE_URL}/rooftop_sites/{resource_id}/forecasts',
+                  json={'forecasts': [{'pv_estimate': '9.5', 'period_end': '2018-01-01T01:00:00.0000000Z',
+                                       'period': 'PT30M'}]}, status=200)
+
+    # Act
+    site = RooftopSite('12345', resource_id, compact=True)
+    forecasts = site.get_forecasts_parsed()
+
+    # Assert
+    assert forecasts['forecasts'][0].pv_estimate == 9.5
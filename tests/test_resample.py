@@ -0,0 +1,87 @@
+"""Tests for resample module."""
+
+import datetime
+import pytest
+from pysolcast.base import parse_date_time
+from pysolcast.columnar import ColumnarSeries
+from pysolcast.resample import resample, resample_response, to_energy
+from tests.helpers import make_response
+
+np = pytest.importorskip('numpy')
+
+
+def test_mean_to_coarser_period():
+    """Test averaging PT30M records to PT60M."""
+    # Act
+    series = resample_response(make_response([1, 3, 5, 7]), 'forecasts', 'PT60M')
+
+    # Assert
+    assert series['period_end'].tolist() == [datetime.datetime(2018, 1, 1, 1), datetime.datetime(2018, 1, 1, 2)]
+    assert series['period'][0] == np.timedelta64(60, 'm')
+    assert series['pv_estimate'].tolist() == [2.0, 6.0]
+
+
+def test_sum_and_finer_period():
+    """Test summing energy and splitting to a finer period."""
+    # Arrange
+    series = ColumnarSeries.from_response(make_response([2, 4], 60, '2018-01-01T01:00'), 'forecasts')
+
+    # Act
+    summed = resample(series, datetime.timedelta(hours=2), how={'pv_estimate': 'sum'})
+    split = resample(series, 'PT30M', how={'pv_estimate': 'sum'})
+    repeated = resample(series, 'PT30M')
+
+    # Assert
+    assert summed['pv_estimate'].tolist() == [6.0]
+    assert split['pv_estimate'].tolist() == [1.0, 1.0, 2.0, 2.0]
+    assert repeated['pv_estimate'].tolist() == [2.0, 2.0, 4.0, 4.0]
+
+
+def test_unaligned_records_and_gaps():
+    """Test records straddling output periods, nan values and partial coverage."""
+    # Arrange
+    series = ColumnarSeries.from_response(make_response([4, 8, float('nan')], 45, '2018-01-01T00:45'),
+                                          'forecasts')
+
+    # Act
+    hourly = resample(series, 'PT60M')
+    covered = resample(series, 'PT60M', min_coverage=1.0)
+
+    # Assert
+    assert hourly['pv_estimate'][:2].tolist() == [5.0, 8.0]
+    assert np.isnan(hourly['pv_estimate'][2])
+    assert covered['pv_estimate'].tolist() == [5.0, 8.0]
+
+
+def test_parsed_newest_first():
+    """Test parsed records returned newest first, as estimated actuals are."""
+    # Arrange
+    data = make_response([1, 2, 3, 4], 15, '2018-01-01T00:15')
+    data['forecasts'].reverse()
+
+    # Act
+    series = resample_response(parse_date_time(data, 'forecasts'), 'forecasts', 'PT30M')
+
+    # Assert
+    assert series['pv_estimate'].tolist() == [1.5, 3.5]
+
+
+def test_to_energy():
+    """Test converting power to energy before summing."""
+    # Arrange
+    series = ColumnarSeries.from_response(make_response([2, 4]), 'forecasts')
+
+    # Act
+    energy = resample(to_energy(series), 'PT60M', how={'pv_estimate': 'sum'})
+
+    # Assert
+    assert energy['pv_estimate'].tolist() == [3.0]
+
+
+def test_invalid_arguments():
+    """Test invalid aggregations and periods."""
+    series = ColumnarSeries.from_response(make_response([1]), 'forecasts')
+    with pytest.raises(ValueError):
+        resample(series, 'PT60M', how={'pv_estimate': 'median'})
+    with pytest.raises(ValueError):
+        resample(series, 'PT0M')
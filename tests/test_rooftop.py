@@ -3,7 +3,7 @@
 import responses
 import pytest
 from pysolcast.rooftop import RooftopSite
-from pysolcast.exceptions import ValidationError, SiteError, RateLimitExceeded
+from pysolcast.exceptions import ApiError, ValidationError, SiteError, RateLimitExceeded
 
 BASE_URL = 'https://api.solcast.com.au'
 ROOFTOP_URI = 'rooftop_sites'
@@ -371,3 +371,56 @@ def test_post_measurements_404():
         site.post_measurements(measurement_single)
 
     # Assert
+
+
+@responses.activate
+def test_post_measurements_unexpected_status():
+    """Test post_measurements raises ApiError for an unexpected status code."""
+    # Arrange
+    resource_id = '1234-1234'
+    expected_url = f'{BASE_URL}/{ROOFTOP_URI}/{resource_id}/measurements'
+    responses.add(responses.POST, expected_url, status=503)
+
+    # Act
+    site = RooftopSite('12345', resource_id)
+    with pytest.raises(ApiError) as error:
+        site.post_measurements({})
+
+    # Assert
+    assert error.value.status_code == 503
+
+
+@responses.activate
+def test_get_estimated_actuals_parsed_200():
+    """Test get_estimated_actuals_parsed with 200 status code."""
+    # Arrange
+    api_key = '12345'
+    resource_id = '1234-1234'
+    endpoint = 'estimated_actuals'
+    expected_url = f'{BASE_URL}/{ROOFTOP_URI}/{resource_id}/{endpoint}'
+
+    estimated_actual_response = {
+        "estimated_actuals": [
+            {
+                "pv_estimate": "10",
+                "period_end": "2018-01-01T01:00:00.00000Z",
+                "period": "PT30M"
+            }
+        ]
+    }
+
+    responses.add(
+        responses.GET,
+        expected_url,
+        json=estimated_actual_response,
+        status=200,
+        content_type='applicaiton/json'
+    )
+
+    # Act
+    site = RooftopSite(api_key, resource_id)
+    estimated_actuals = site.get_estimated_actuals_parsed()
+
+    # Assert
+    assert estimated_actuals['estimated_actuals'][0]['pv_estimate'] == '10'
+    assert estimated_actuals['estimated_actuals'][0]['period_end'].year == 2018
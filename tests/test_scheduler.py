@@ -0,0 +1,270 @@
+"""Tests for scheduler module."""
+
+import json
+import types
+import responses
+import pytest
+from pysolcast.exceptions import RateLimitExceeded
+from pysolcast.scheduler import (CallbackSink, DirectorySink, Job, JsonLinesSink, Scheduler, from_config, load_sink,
+                                 main)
+from tests.helpers import FakeClock
+
+BASE_URL = 'https://api.solcast.com.au'
+DAY = 86400
+
+
+class ListSink:
+    """Sink keeping written results."""
+
+    def __init__(self):
+        self.results = []
+        self.closed = False
+
+    def write(self, name, endpoint, data, fetched_at):
+        self.results.append((name, endpoint, data, fetched_at))
+
+    def close(self):
+        self.closed = True
+
+
+def run_day(scheduler, clock, step=60.0):
+    """Advance the clock through one day, running due jobs."""
+    while clock.now < DAY:
+        scheduler.run_pending()
+        clock.now += step
+
+
+def test_spreads_quota_by_weight():
+    """Test the quota is used across the day in proportion to weights."""
+    # Arrange
+    clock = FakeClock()
+    sink = ListSink()
+    jobs = [Job('heavy', lambda: {}, weight=3.0), Job('light', lambda: {}, weight=1.0)]
+    scheduler = Scheduler(jobs, sink, quota=96, min_interval=0, clock=clock)
+
+    # Act
+    run_day(scheduler, clock)
+
+    # Assert
+    counts = {name: sum(result[0] == name for result in sink.results) for name in ('heavy', 'light')}
+    assert 90 <= len(sink.results) <= 96
+    assert 2.5 <= counts['heavy'] / counts['light'] <= 3.5
+    fetch_times = sorted(result[3] for result in sink.results)
+    assert fetch_times[len(fetch_times) // 2] == pytest.approx(DAY / 2, abs=DAY / 8)
+
+
+def test_min_interval_and_reset():
+    """Test min_interval caps polling and usage resets at UTC midnight."""
+    # Arrange
+    clock = FakeClock()
+    sink = ListSink()
+    scheduler = Scheduler([Job('site', lambda: {})], sink, quota=10000, min_interval=3600, stagger=False,
+                          clock=clock)
+
+    # Act
+    run_day(scheduler, clock)
+    clock.now = DAY - 1
+    used = scheduler.stats['quota_used']
+    clock.now = DAY
+    scheduler.run_pending()
+
+    # Assert
+    assert len(sink.results) == 25
+    assert used == 24
+    assert scheduler.stats['quota_used'] == 1
+    assert scheduler.stats['quota_remaining'] == 9999
+
+
+def test_reserve_and_limiter_remaining():
+    """Test the reserve and the remaining requests the API reports shrink the quota."""
+    # Arrange
+    clock = FakeClock(1000.0)
+    limiter = types.SimpleNamespace(remaining=5, reset=1000.0 + 3600)
+    scheduler = Scheduler([Job('site', lambda: {})], ListSink(), quota=100, reserve=0.1, min_interval=0,
+                          rate_limiter=limiter, clock=clock)
+
+    # Act
+    remaining = scheduler.remaining()
+    interval = scheduler.interval(scheduler.jobs[0])
+
+    # Assert
+    assert remaining == 0
+    assert interval == 3600
+    limiter.remaining = 50
+    assert scheduler.remaining() == 40
+    assert scheduler.interval(scheduler.jobs[0]) == 90
+
+
+def test_errors_back_off():
+    """Test failing jobs are retried with backoff and rate limits wait for the reset."""
+    # Arrange
+    clock = FakeClock()
+
+    def failing():
+        raise ConnectionError('down')
+
+    def limited():
+        raise RateLimitExceeded('limited', reset=5000.0)
+
+    scheduler = Scheduler([Job('failing', failing), Job('limited', limited)], ListSink(), quota=1000,
+                          min_interval=3600, stagger=False, clock=clock)
+
+    # Act
+    scheduler.run_pending()
+    first_retry = scheduler.jobs[0].due
+    clock.now = first_retry
+    scheduler.run_pending()
+
+    # Assert
+    assert first_retry == 60
+    assert scheduler.jobs[0].due == 180
+    assert scheduler.jobs[1].due == 5000
+    assert scheduler.jobs[0].counts['errors'] == 2
+    assert scheduler.stats['errors'] == 3
+
+
+def test_stats_lag():
+    """Test scheduling lag is measured from each job's due time."""
+    # Arrange
+    clock = FakeClock()
+    scheduler = Scheduler([Job('site', lambda: {})], ListSink(), quota=25, min_interval=0, stagger=False,
+                          clock=clock)
+    scheduler.run_pending()
+
+    # Act
+    clock.now = 3600 + 30
+    scheduler.run_pending()
+    stats = scheduler.stats
+
+    # Assert
+    assert stats['requests'] == 2
+    assert stats['lag_last'] == 30
+    assert stats['lag_max'] == 30
+    assert stats['lag_mean'] == 15
+    assert stats['quota_used'] == 2
+    assert stats['quota_used_fraction'] == pytest.approx(2 / 25)
+
+
+def test_job_rejects_non_positive_weight():
+    """Test weights must be positive."""
+    with pytest.raises(ValueError):
+        Job('site', lambda: {}, weight=0)
+
+
+def test_sinks(tmp_path):
+    """Test the built-in sinks write results."""
+    # Arrange
+    jsonl = load_sink({'type': 'jsonl', 'path': str(tmp_path / 'results.jsonl')})
+    directory = load_sink({'type': 'directory', 'path': str(tmp_path / 'latest')})
+    calls = []
+    callback = CallbackSink(lambda *args: calls.append(args))
+
+    # Act
+    for sink in (jsonl, directory, callback):
+        sink.write('a/b', 'forecasts', {'forecasts': []}, 1.0)
+        sink.write('a/b', 'forecasts', {'forecasts': [1]}, 2.0)
+        sink.close()
+
+    # Assert
+    assert isinstance(jsonl, JsonLinesSink) and isinstance(directory, DirectorySink)
+    lines = (tmp_path / 'results.jsonl').read_text().splitlines()
+    assert [json.loads(line)['fetched_at'] for line in lines] == [1.0, 2.0]
+    latest = json.loads((tmp_path / 'latest' / 'a%2Fb' / 'forecasts.json').read_text())
+    assert latest == {'fetched_at': 2.0, 'data': {'forecasts': [1]}}
+    assert len(calls) == 2
+    assert load_sink({'type': 'tests.test_scheduler:ListSink'}).results == []
+    with pytest.raises(ValueError):
+        load_sink({'type': 'kafka'})
+
+
+@responses.activate
+def test_from_config():
+    """Test building jobs from a fleet definition."""
+    # Arrange
+    responses.add(responses.GET, f'{BASE_URL}/utility_scale_sites/site1/forecasts', json={'forecasts': []})
+    responses.add(responses.GET, f'{BASE_URL}/world_radiation/forecasts', json={'forecasts': []})
+    config = {
+        'api_key': 'key',
+        'quota': 1000,
+        'sink': {'type': 'tests.test_scheduler:ListSink'},
+        'sites': [
+            {'type': 'utility', 'resource_id': 'site1', 'weight': 2,
+             'endpoints': ['forecasts'], 'params': {'period': 'PT30M', 'hours': 48}},
+            {'type': 'world', 'name': 'home', 'params': {'latitude': -35, 'longitude': 149}},
+        ],
+    }
+
+    # Act
+    scheduler = from_config(config)
+    scheduler.run_once()
+
+    # Assert
+    assert [(job.name, job.endpoint, job.weight) for job in scheduler.jobs] == \
+        [('site1', 'forecasts', 2.0), ('home', 'forecasts', 1.0)]
+    assert [result[0] for result in scheduler.sink.results] == ['site1', 'home']
+    assert 'Hours=48' in responses.calls[0].request.url
+    with pytest.raises(ValueError):
+        from_config({'api_key': 'key', 'sites': [{'type': 'moon', 'resource_id': 'x'}]})
+
+
+@responses.activate
+def test_from_config_run_once_never_sleeps(monkeypatch):
+    """Test one pass over several sites sends every request without waiting on the limiter."""
+    # Arrange
+    def sleep(seconds):
+        raise AssertionError(f'slept {seconds}s')
+
+    monkeypatch.setattr('time.sleep', sleep)
+    for index in range(3):
+        responses.add(responses.GET, f'{BASE_URL}/rooftop_sites/site{index}/forecasts', json={'forecasts': []},
+                      headers={'x-rate-limit': '10', 'x-rate-limit-remaining': str(9 - index)})
+    scheduler = from_config({'api_key': 'key', 'quota': 10, 'sink': {'type': 'tests.test_scheduler:ListSink'},
+                             'sites': [{'resource_id': f'site{index}'} for index in range(3)]})
+
+    # Act
+    runs = scheduler.run_once()
+
+    # Assert
+    assert runs == 3
+    assert scheduler.stats['errors'] == 0
+    assert [result[0] for result in scheduler.sink.results] == ['site0', 'site1', 'site2']
+    assert scheduler.options.rate_limiter.remaining == 7
+
+
+@responses.activate
+def test_from_config_reschedules_at_reset():
+    """Test a used up quota reschedules the job at the reset instead of pausing."""
+    # Arrange
+    clock = FakeClock(1000.0)
+    responses.add(responses.GET, f'{BASE_URL}/rooftop_sites/site1/forecasts', status=429,
+                  headers={'x-rate-limit-remaining': '0', 'x-rate-limit-reset': '1000000000000'})
+    scheduler = from_config({'api_key': 'key', 'quota': 10, 'sink': {'type': 'tests.test_scheduler:ListSink'},
+                             'sites': [{'resource_id': 'site1'}]}, clock=clock)
+
+    # Act
+    scheduler.run_once()
+    scheduler.run_once()
+
+    # Assert
+    assert scheduler.stats['errors'] == 2
+    assert len(responses.calls) == 1
+    assert scheduler.jobs[0].due >= 1000000000000 - 1
+
+
+@responses.activate
+def test_main_once(tmp_path):
+    """Test one polling pass from the command line."""
+    # Arrange
+    responses.add(responses.GET, f'{BASE_URL}/rooftop_sites/site1/forecasts', json={'forecasts': []})
+    config_path = tmp_path / 'fleet.json'
+    config_path.write_text(json.dumps({'api_key': 'key', 'quota': 10, 'sites': [{'resource_id': 'site1'}],
+                                       'sink': {'type': 'jsonl', 'path': str(tmp_path / 'out.jsonl')}}))
+    metrics_path = tmp_path / 'metrics.json'
+
+    # Act
+    exit_code = main([str(config_path), '--once', '--metrics-file', str(metrics_path)])
+
+    # Assert
+    assert exit_code == 0
+    assert json.loads((tmp_path / 'out.jsonl').read_text())['name'] == 'site1'
+    assert json.loads(metrics_path.read_text())['quota_used'] == 1
@@ -0,0 +1,208 @@
+"""Tests for series module."""
+
+import copy
+import datetime
+import pytest
+import responses
+from pysolcast.base import parse_date_time
+from pysolcast.records import to_records_response
+from pysolcast.series import IncrementalRefresh, IndexedSeries, merge_records, merge_response
+from pysolcast.utility import UtilitySite
+
+BASE_URL = 'https://api.solcast.com.au'
+
+
+def records(start_hour, values):
+    """Build hourly records starting at start_hour."""
+    return [{'period_end': f'2018-01-01T{start_hour + index:02d}:00:00.0000000Z', 'period': 'PT60M',
+             'pv_estimate': value} for index, value in enumerate(values)]
+
+
+def test_merge_records():
+    """Test overlapping records are replaced and new ones appended."""
+    # Arrange
+    previous = records(1, [1, 2, 3, 4])
+    new = records(3, [30, 40, 50])
+
+    # Act
+    merged = merge_records(previous, new)
+
+    # Assert
+    assert [record['pv_estimate'] for record in merged] == [1, 2, 30, 40, 50]
+    assert merged[2] is new[0]
+
+
+def test_merge_records_inside_and_descending():
+    """Test a window inside the older records, newest first."""
+    # Arrange
+    previous = records(1, [1, 2, 3, 4])[::-1]
+    new = records(2, [20, 30])[::-1]
+
+    # Act
+    merged = merge_records(previous, new)
+
+    # Assert
+    assert [record['pv_estimate'] for record in merged] == [4, 30, 20, 1]
+
+
+def test_merge_records_drop_before():
+    """Test past records are dropped."""
+    # Arrange
+    previous = records(1, [1, 2, 3, 4])
+    new = records(3, [30])
+
+    # Act
+    merged = merge_records(previous, new, drop_before='2018-01-01T02:00:00.0000000Z')
+
+    # Assert
+    assert [record['pv_estimate'] for record in merged] == [2, 30, 4]
+
+
+def test_merge_parsed_records():
+    """Test merging records with parsed period_end."""
+    # Arrange
+    start = datetime.datetime(2018, 1, 1, tzinfo=datetime.timezone.utc)
+    step = datetime.timedelta(hours=1)
+    previous = [{'period_end': start + index * step, 'pv_estimate': index} for index in range(3)]
+    new = [{'period_end': start + 2 * step, 'pv_estimate': 20.0}]
+
+    # Act
+    merged = merge_response({'forecasts': previous}, {'forecasts': new}, 'forecasts')
+
+    # Assert
+    assert [record['pv_estimate'] for record in merged['forecasts']] == [0, 1, 20.0]
+    assert merge_response(None, {'forecasts': new}, 'forecasts') == {'forecasts': new}
+
+
+def test_incremental_refresh():
+    """Test full and incremental fetches."""
+    # Arrange
+    now = [0.0]
+    windows = []
+
+    def fetch(hours):
+        windows.append(hours)
+        if hours == 4:
+            return {'forecasts': records(1, [1, 2, 3, 4])}
+        return {'forecasts': records(2, [20])}
+
+    refresher = IncrementalRefresh(fetch, 'forecasts', hours=4, refresh_hours=1, full_interval=100,
+                                   clock=lambda: now[0])
+
+    # Act
+    refresher.refresh()
+    merged = refresher.refresh()
+    now[0] = 100
+    full = refresher.refresh()
+
+    # Assert
+    assert windows == [4, 1, 4]
+    assert [record['pv_estimate'] for record in merged['forecasts']] == [20, 3, 4]
+    assert len(full['forecasts']) == 4
+    assert refresher.stats == {'full_fetches': 2, 'incremental_fetches': 1}
+
+
+@responses.activate
+def test_for_utility_site():
+    """Test a utility site refresher requests the shorter window."""
+    # Arrange
+    resource_id = '1234-1234'
+    url = f'{BASE_URL}/utility_scale_sites/{resource_id}/forecasts'
+    responses.add(responses.GET, url, json={'forecasts': records(1, [1, 2, 3])}, status=200)
+    responses.add(responses.GET, url, json={'forecasts': records(3, [30, 40])}, status=200)
+    site = UtilitySite('12345', resource_id)
+    refresher = IncrementalRefresh.for_utility_site(site, 'PT60M', hours=48, refresh_hours=2)
+
+    # Act
+    refresher.refresh()
+    data = refresher.refresh()
+
+    # Assert
+    assert 'Hours=48' in responses.calls[0].request.url
+    assert 'Hours=2' in responses.calls[1].request.url
+    assert [record['pv_estimate'] for record in data['forecasts']] == [30, 40]
+
+
+def parsed_series(start_hour, count, reverse=False):
+    """Build an indexed series of parsed hourly records."""
+    data = parse_date_time({'forecasts': records(start_hour, list(range(count)))}, 'forecasts')
+    if reverse:
+        data['forecasts'].reverse()
+    return data, IndexedSeries.from_response(data, 'forecasts')
+
+
+def hour(value):
+    """Datetime of an hour on 2018-01-01."""
+    return datetime.datetime(2018, 1, 1, value, tzinfo=datetime.timezone.utc)
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+def test_indexed_slice(reverse):
+    """Test range slices are views in ascending order."""
+    # Arrange
+    data, series = parsed_series(1, 10, reverse=reverse)
+
+    # Act
+    window = series.slice(hour(3), '2018-01-01T06:00:00Z')
+    tail = window[1:]
+
+    # Assert
+    assert [record['pv_estimate'] for record in window] == [3, 4, 5]
+    assert [record['pv_estimate'] for record in tail] == [4, 5]
+    assert window[0] is data['forecasts'][6 if reverse else 3]
+    assert window[-1]['pv_estimate'] == 5
+    assert window.period_ends == [hour(4), hour(5), hour(6)]
+    assert len(series.slice(end=hour(2))) == 2
+    assert len(series.slice(hour(20))) == 0
+
+
+def test_indexed_point_queries():
+    """Test containing-period, nearest and as-of lookups."""
+    # Arrange
+    _, series = parsed_series(1, 4)
+    half_past = hour(2) + datetime.timedelta(minutes=30)
+
+    # Act / Assert
+    assert series.at(half_past)['pv_estimate'] == 2
+    assert series.at(hour(2))['pv_estimate'] == 1
+    assert series.at(hour(0) - datetime.timedelta(minutes=30)) is None
+    assert series.at(hour(5)) is None
+    assert series.nearest(hour(2) + datetime.timedelta(minutes=40))['pv_estimate'] == 2
+    assert series.nearest(hour(9))['pv_estimate'] == 3
+    assert series.asof(half_past)['pv_estimate'] == 1
+    assert series.asof(half_past, tolerance=datetime.timedelta(minutes=10)) is None
+    assert series.asof(hour(0)) is None
+
+
+def test_indexed_join_asof():
+    """Test pairing records with the latest record of another series."""
+    # Arrange
+    _, forecasts = parsed_series(2, 3)
+    _, actuals = parsed_series(1, 2, reverse=True)
+
+    # Act
+    pairs = forecasts.join_asof(actuals)
+    strict = forecasts.join_asof(actuals, tolerance=datetime.timedelta(0))
+
+    # Assert
+    assert [(left['pv_estimate'], right['pv_estimate'])
+            for left, right in pairs] == [(0, 1), (1, 1), (2, 1)]
+    assert [right is None for _, right in strict] == [False, True, True]
+
+
+def test_indexed_unsorted_and_compact():
+    """Test unsorted records are sorted and compact records are indexed."""
+    # Arrange
+    data = {'forecasts': records(1, [1, 2, 3])}
+    data['forecasts'] = [data['forecasts'][index] for index in (1, 0, 2)]
+    compact = to_records_response(copy.deepcopy(data), 'forecasts')
+
+    # Act
+    series = IndexedSeries(data['forecasts'])
+    compact_series = IndexedSeries.from_response(compact, 'forecasts')
+
+    # Assert
+    assert [record['pv_estimate'] for record in series] == [1, 2, 3]
+    assert [record.pv_estimate for record in compact_series.slice(hour(1))] == [2.0, 3.0]
+    with pytest.raises(IndexError):
+        _ = series[3]
@@ -0,0 +1,67 @@
+"""Tests for session module."""
+
+import responses
+from requests import Session
+from pysolcast import session as pysolcast_session
+from pysolcast.rooftop import RooftopSite
+from pysolcast.world import World
+
+BASE_URL = 'https://api.solcast.com.au'
+
+
+def test_create_session():
+    """Test creating a pooled session."""
+    # Act
+    session = pysolcast_session.create_session(pool_size=4)
+
+    # Assert
+    adapter = session.get_adapter(BASE_URL)
+    assert isinstance(session, Session)
+    assert adapter.poolmanager.connection_pool_kw['maxsize'] == 4
+
+
+def test_default_session_shared():
+    """Test sites share the default session."""
+    # Act
+    site_a = RooftopSite('12345', '1234-1234')
+    site_b = RooftopSite('12345', '5678-5678')
+    world = World('12345')
+
+    # Assert
+    assert site_a.options.session is site_b.options.session
+    assert site_a.options.session is world.options.session
+    assert site_a.options.session is pysolcast_session.get_default_session()
+
+
+def test_set_default_session():
+    """Test replacing the default session."""
+    # Arrange
+    session = pysolcast_session.create_session()
+
+    # Act
+    pysolcast_session.set_default_session(session)
+    site = RooftopSite('12345', '1234-1234')
+    pysolcast_session.set_default_session(None)
+
+    # Assert
+    assert site.options.session is session
+    assert pysolcast_session.get_default_session() is not session
+
+
+@responses.activate
+def test_site_uses_given_session():
+    """Test a site sends requests through the given session."""
+    # Arrange
+    resource_id = '1234-1234'
+    expected_url = f'{BASE_URL}/rooftop_sites/{resource_id}/forecasts'
+    responses.add(responses.GET, expected_url, json={'forecasts': []}, status=200)
+    session = pysolcast_session.create_session()
+
+    # Act
+    site = RooftopSite('12345', resource_id, session=session)
+    forecasts = site.get_forecasts()
+
+    # Assert
+    assert site.options.session is session
+    assert forecasts == {'forecasts': []}
+    assert responses.calls[0].request.headers['Authorization'] == 'Basic MTIzNDU6'
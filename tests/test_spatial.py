@@ -0,0 +1,95 @@
+"""Tests for spatial module."""
+
+import pytest
+from pysolcast.columnar import ColumnarPoints
+from pysolcast.spatial import SpatialIndex, haversine
+from tests.helpers import make_response
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture(name='index')
+def fixture_index():
+    """Index of three locations on the equator."""
+    return SpatialIndex.from_results({
+        (0.0, 0.0): make_response([100, 200], 60, '2018-01-01T00:00', 'estimated_actuals', 'ghi'),
+        (0.0, 1.0): make_response([300, None], 60, '2018-01-01T00:00', 'estimated_actuals', 'ghi'),
+        (0.0, 2.0): make_response([500, 600], 60, '2018-01-01T00:00', 'estimated_actuals', 'ghi'),
+    }, 'estimated_actuals')
+
+
+def test_haversine():
+    """Test one degree of longitude at the equator."""
+    assert haversine(0, 0, 0, 1) == pytest.approx(111.195, rel=1e-4)
+
+
+def test_query(index):
+    """Test nearest neighbours are sorted by distance."""
+    # Act
+    indices, distances = index.query([0.0, 0.0], [0.1, 1.9], k=2)
+
+    # Assert
+    assert indices.tolist() == [[0, 1], [2, 1]]
+    assert distances[0, 0] < distances[0, 1]
+
+
+def test_nearest_max_distance(index):
+    """Test nearest lookups respect max_distance."""
+    # Act
+    values = index.nearest([0.0, 10.0], [0.9, 10.0], 'ghi', max_distance=50)
+
+    # Assert
+    assert values[0, 0] == 300
+    assert np.isnan(values[0, 1])
+    assert np.isnan(values[1]).all()
+
+
+def test_empty_index():
+    """Test value lookups on an index without locations raise ValueError."""
+    # Arrange
+    index = SpatialIndex.from_results({}, 'estimated_actuals')
+
+    # Act
+    indices, distances = index.query([0.0], [0.0])
+
+    # Assert
+    assert indices.shape == distances.shape == (1, 0)
+    with pytest.raises(ValueError):
+        index.nearest([0.0], [0.0], 'ghi')
+    with pytest.raises(ValueError):
+        index.interpolate([0.0], [0.0], 'ghi')
+
+
+def test_interpolate(index):
+    """Test inverse-distance interpolation."""
+    # Act
+    values = index.interpolate([0.0, 0.0, 0.0], [0.5, 1.0, 1.5], 'ghi', k=2)
+
+    # Assert
+    assert values[0, 0] == pytest.approx(200)
+    assert values[0, 1] == pytest.approx(200)
+    assert values[1].tolist()[0] == 300
+    assert values[2, 0] == pytest.approx(400)
+    assert values[2, 1] == pytest.approx(600)
+
+
+def test_query_matches_brute_force():
+    """Test banded lookups find the same neighbours as measuring every location."""
+    # Arrange
+    rng = np.random.default_rng(7)
+    latitude, longitude = rng.uniform(-40, -10, 500), rng.uniform(110, 155, 500)
+    index = SpatialIndex(ColumnarPoints(latitude, longitude, np.array([]), np.array([]), {}))
+    query_latitude, query_longitude = rng.uniform(-45, -5, 50), rng.uniform(105, 160, 50)
+
+    # Act
+    indices, distances = index.query(query_latitude, query_longitude, k=5)
+    _, limited = index.query(query_latitude, query_longitude, k=5, max_distance=100)
+
+    # Assert
+    expected = haversine(query_latitude[:, None], query_longitude[:, None],
+                         latitude[None, :], longitude[None, :])
+    expected.sort(axis=1)
+    assert distances == pytest.approx(expected[:, :5])
+    assert haversine(query_latitude[:, None], query_longitude[:, None], latitude[indices],
+                     longitude[indices]) == pytest.approx(distances)
+    assert limited == pytest.approx(np.where(expected[:, :5] <= 100, expected[:, :5], np.inf))
@@ -0,0 +1,132 @@
+"""Tests for store module."""
+
+import responses
+import pytest
+from pysolcast.rooftop import RooftopSite
+from pysolcast.utility import UtilitySite
+from pysolcast.store import INDEX_FILE, TimeSeriesStore
+from tests.helpers import make_response
+
+np = pytest.importorskip('numpy')
+
+BASE_URL = 'https://api.solcast.com.au'
+
+
+def test_append_and_read(tmp_path):
+    """Test runs are read back as memory-mapped views."""
+    # Arrange
+    store = TimeSeriesStore(str(tmp_path))
+    first = make_response(['1', '2', '3'], 60, '2018-01-01T01:00')
+    store.append('site-1', 'rooftop_sites/forecasts', first, fetched_at=100)
+    second = make_response(['4', '5', '6'], 60, '2018-01-01T02:00')
+    store.append('site-1', 'rooftop_sites/forecasts', second, fetched_at=200)
+
+    # Act
+    latest = store.read('site-1', 'rooftop_sites/forecasts')
+    earlier = store.read('site-1', 'rooftop_sites/forecasts', fetched_at=150)
+    window = latest.between('2018-01-01T03:00', '2018-01-01T03:00')
+
+    # Assert
+    assert latest['pv_estimate'].tolist() == [4.0, 5.0, 6.0]
+    assert earlier['pv_estimate'].tolist() == [1.0, 2.0, 3.0]
+    assert window['pv_estimate'].tolist() == [5.0]
+    assert isinstance(latest['pv_estimate'].base, np.memmap)
+    assert store.read('site-1', 'rooftop_sites/forecasts', fetched_at=50) is None
+    runs = store.runs('site-1', 'rooftop_sites/forecasts')
+    assert [run['fetched_at'] for run in runs] == [100, 200]
+
+
+def test_unsorted_runs_and_new_fields(tmp_path):
+    """Test runs are sorted and fields added later are back-filled."""
+    # Arrange
+    store = TimeSeriesStore(str(tmp_path))
+    newest_first = make_response([1, 2], 60, '2018-01-01T01:00', key='estimated_actuals')
+    newest_first['estimated_actuals'].reverse()
+    store.append('site-1', 'estimated_actuals', newest_first)
+    extra = make_response([7], 60, '2018-01-01T05:00')
+    extra['forecasts'][0]['pv_estimate90'] = 9
+    store.append('site-1', 'estimated_actuals', extra)
+
+    # Act
+    series, runs = store.history('site-1', 'estimated_actuals')
+
+    # Assert
+    assert series['pv_estimate'].tolist() == [1.0, 2.0, 7.0]
+    assert np.isnan(series['pv_estimate90'][:2]).all()
+    assert series['pv_estimate90'][2] == 9.0
+    assert [run['length'] for run in runs] == [2, 1]
+
+
+def test_torn_write_ignored(tmp_path):
+    """Test data written without an index line is overwritten."""
+    # Arrange
+    store = TimeSeriesStore(str(tmp_path))
+    store.append('site-1', 'forecasts', make_response([1], 60, '2018-01-01T01:00'))
+    path = tmp_path / 'site-1' / 'forecasts'
+    with open(path / 'pv_estimate.f8', 'ab') as column_file:
+        np.array([99.0]).tofile(column_file)
+
+    # Act
+    store.append('site-1', 'forecasts', make_response([2], 60, '2018-01-01T02:00'))
+
+    # Assert
+    series, _ = store.history('site-1', 'forecasts')
+    assert series['pv_estimate'].tolist() == [1.0, 2.0]
+    assert len((path / INDEX_FILE).read_text().splitlines()) == 2
+
+
+@responses.activate
+def test_site_writes_store(tmp_path):
+    """Test sites write responses to the store."""
+    # Arrange
+    resource_id = '1234-1234'
+    responses.add(responses.GET, f'{BASE_URL}/rooftop_sites/{resource_id}/forecasts',
+                  json=make_response(['9.5'], 60, '2018-01-01T01:00'), status=200)
+    store = TimeSeriesStore(str(tmp_path))
+
+    # Act
+    RooftopSite('12345', resource_id, store=store).get_forecasts()
+
+    # Assert
+    assert store.read(resource_id, '/rooftop_sites/forecasts')['pv_estimate'].tolist() == [9.5]
+
+
+def test_torn_index_line_ignored(tmp_path):
+    """Test an index line cut short by a crash is skipped and cut off by the next append."""
+    # Arrange
+    store = TimeSeriesStore(str(tmp_path))
+    store.append('site-1', 'forecasts', make_response([1], 60, '2018-01-01T01:00'))
+    index_path = tmp_path / 'site-1' / 'forecasts' / INDEX_FILE
+    with open(index_path, 'a', encoding='utf-8') as index_file:
+        index_file.write('{"fetched_at": 1, "off')
+    torn = store.runs('site-1', 'forecasts')
+
+    # Act
+    store.append('site-1', 'forecasts', make_response([2], 60, '2018-01-01T02:00'))
+
+    # Assert
+    assert len(torn) == 1
+    assert [run['offset'] for run in store.runs('site-1', 'forecasts')] == [0, 1]
+    assert store.read('site-1', 'forecasts')['pv_estimate'].tolist() == [2.0]
+
+
+@responses.activate
+def test_site_stores_each_period(tmp_path):
+    """Test responses for different periods are stored apart."""
+    # Arrange
+    resource_id = '1234-1234'
+    responses.add(responses.GET, f'{BASE_URL}/utility_scale_sites/{resource_id}/forecasts',
+                  json=make_response(['1'], 30, '2018-01-01T01:00'), status=200)
+    responses.add(responses.GET, f'{BASE_URL}/utility_scale_sites/{resource_id}/forecasts',
+                  json=make_response(['2'], 60, '2018-01-01T01:00'), status=200)
+    store = TimeSeriesStore(str(tmp_path))
+    site = UtilitySite('12345', resource_id, store=store)
+
+    # Act
+    site.get_forecasts('PT30M', '24')
+    site.get_forecasts('PT60M', '24')
+
+    # Assert
+    endpoint = '/utility_scale_sites/forecasts'
+    assert store.read(resource_id, f'{endpoint}/PT30M')['pv_estimate'].tolist() == [1.0]
+    assert store.read(resource_id, f'{endpoint}/PT1H')['pv_estimate'].tolist() == [2.0]
@@ -0,0 +1,99 @@
+"""Tests for stream module."""
+
+import datetime
+import json
+import responses
+import pytest
+from pysolcast.exceptions import SiteError
+from pysolcast.stream import iter_json_array, iter_text
+from pysolcast.utility import UtilitySite
+
+BASE_URL = 'https://api.solcast.com.au'
+UTILTY_URI = 'utility_scale_sites'
+
+FORECAST_RESPONSE = {
+    "forecasts": [
+        {
+            "pv_estimate": "9.5",
+            "pv_estimate10": "6",
+            "pv_estimate90": "13.8",
+            "period_end": "2018-01-01T01:00:00.00000Z",
+            "period": "PT30M"
+        },
+        {
+            "pv_estimate": "10",
+            "pv_estimate10": "8",
+            "pv_estimate90": "12",
+            "period_end": "2018-01-01T12:30:00.00000Z",
+            "period": "PT30M"
+        }
+    ]
+}
+
+
+def chunked(text, size):
+    """Split text into chunks of size."""
+    return [text[index:index + size] for index in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize('size', [1, 3, 7, 64, 10000])
+def test_iter_json_array(size):
+    """Test records are decoded across any chunk boundary."""
+    # Arrange
+    text = json.dumps(FORECAST_RESPONSE, indent=2)
+
+    # Act
+    records = list(iter_json_array(chunked(text, size), 'forecasts'))
+
+    # Assert
+    assert records == FORECAST_RESPONSE['forecasts']
+
+
+def test_iter_json_array_empty_and_missing():
+    """Test empty arrays and missing keys."""
+    assert not list(iter_json_array(['{"forecasts": []}'], 'forecasts'))
+    assert not list(iter_json_array(['{"other": [1]}'], 'forecasts'))
+
+
+def test_iter_json_array_truncated():
+    """Test a truncated response raises."""
+    with pytest.raises(ValueError):
+        list(iter_json_array(['{"forecasts": [{"a": 1}, {"b"'], 'forecasts'))
+
+
+def test_iter_text_split_character():
+    """Test multi-byte characters split across chunks."""
+    data = '{"site": "Zürich"}'.encode()
+    assert ''.join(iter_text([data[:12], data[12:]])) == '{"site": "Zürich"}'
+
+
+@responses.activate
+def test_stream_forecasts_parsed():
+    """Test streaming utility forecasts with parsing."""
+    # Arrange
+    resource_id = '1234-1234'
+    expected_url = f'{BASE_URL}/{UTILTY_URI}/{resource_id}/forecasts'
+    responses.add(responses.GET, expected_url, json=FORECAST_RESPONSE, status=200)
+
+    # Act
+    site = UtilitySite('12345', resource_id)
+    records = list(site.stream_forecasts('PT30M', '48', parse=True))
+
+    # Assert
+    assert len(records) == 2
+    assert records[0]['period'] == datetime.timedelta(minutes=30)
+    assert records[1]['period_end'].hour == 12
+    assert 'Hours=48' in responses.calls[0].request.url
+
+
+@responses.activate
+def test_stream_forecasts_404():
+    """Test streaming raises mapped exceptions."""
+    # Arrange
+    expected_url = f'{BASE_URL}/{UTILTY_URI}/1234-1234/weather/forecasts'
+    responses.add(responses.GET, expected_url, status=404)
+
+    # Act
+    site = UtilitySite('12345', '1234-1234')
+    with pytest.raises(SiteError):
+        list(site.stream_radiation_forecasts('PT30M', '48'))
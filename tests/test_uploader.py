@@ -0,0 +1,188 @@
+"""Tests for uploader module."""
+
+import json
+from dataclasses import dataclass, field
+import responses
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from pysolcast.exceptions import ValidationError
+from pysolcast.rooftop import RooftopSite
+from pysolcast.uploader import MeasurementUploader
+from tests.helpers import FakeClock
+
+BASE_URL = 'https://api.solcast.com.au'
+
+
+@dataclass
+class FakeSite:
+    """Site recording posted batches."""
+
+    resource_id: str
+    errors: list = field(default_factory=list)
+    posted: list = field(default_factory=list)
+
+    def post_measurements(self, data):
+        """Record a batch, raising queued errors first."""
+        if self.errors:
+            raise self.errors.pop(0)
+        self.posted.append(data['measurements'])
+        return data
+
+
+def measurement(index):
+    """Build a measurement."""
+    return {'period_end': f'2018-02-02T03:{index:02d}:00.0000000Z', 'period': 'PT5M',
+            'total_power': index}
+
+
+def test_flush_splits_batches():
+    """Test flushes are split to the maximum batch size."""
+    # Arrange
+    site = FakeSite('site-1')
+    uploader = MeasurementUploader(max_batch_size=2, flush_size=10)
+    for index in range(5):
+        uploader.add(site, measurement(index))
+
+    # Act
+    uploader.flush()
+
+    # Assert
+    assert [len(batch) for batch in site.posted] == [2, 2, 1]
+    assert uploader.stats['measurements_sent'] == 5
+    assert uploader.stats['posts'] == 3
+    assert uploader.queue_depth == 0
+
+
+def test_flush_thresholds():
+    """Test only buffers over the size or age thresholds are flushed."""
+    # Arrange
+    clock = FakeClock()
+    full, young, old = FakeSite('full'), FakeSite('young'), FakeSite('old')
+    uploader = MeasurementUploader(flush_size=2, max_age=10, clock=clock)
+    uploader.add(old, measurement(0))
+    clock.now = 5
+    uploader.add(full, measurement(1))
+    uploader.add(full, measurement(2))
+    uploader.add(young, measurement(3))
+
+    # Act
+    clock.now = 11
+    uploader.flush(force=False)
+
+    # Assert
+    assert len(full.posted) == 1
+    assert len(old.posted) == 1
+    assert not young.posted
+    assert uploader.queue_depth == 1
+
+
+def test_retry_and_drop():
+    """Test connection errors are retried and validation errors dropped."""
+    # Arrange
+    site = FakeSite('site-1', errors=[RequestsConnectionError(), ValidationError()])
+    uploader = MeasurementUploader()
+    uploader.add(site, measurement(0))
+
+    # Act
+    uploader.flush()
+    retained = uploader.queue_depth
+    uploader.flush()
+
+    # Assert
+    assert retained == 1
+    assert uploader.stats['errors'] == 2
+    assert uploader.stats['dropped'] == 1
+    assert uploader.queue_depth == 0
+
+
+@responses.activate
+def test_background_upload():
+    """Test the background thread posts measurements to the API."""
+    # Arrange
+    resource_id = '1234-1234'
+    expected_url = f'{BASE_URL}/rooftop_sites/{resource_id}/measurements'
+    responses.add(responses.POST, expected_url, json={}, status=200)
+    site = RooftopSite('12345', resource_id)
+
+    # Act
+    with MeasurementUploader(flush_size=3) as uploader:
+        for index in range(3):
+            uploader.add(site, measurement(index))
+
+    # Assert
+    assert len(responses.calls) == 1
+    assert len(json.loads(responses.calls[0].request.body)['measurements']) == 3
+    assert uploader.stats['queue_depth'] == 0
+
+
+def test_backoff():
+    """Test a failed site is retried after a backoff that doubles on each failure."""
+    # Arrange
+    clock = FakeClock()
+    site = FakeSite('site-1', errors=[RequestsConnectionError(), RequestsConnectionError()])
+    uploader = MeasurementUploader(flush_size=1, backoff=10, clock=clock)
+    uploader.add(site, measurement(0))
+    uploader.flush(force=False)
+
+    # Act
+    clock.advance(4.9)
+    uploader.flush(force=False)
+    early = uploader.stats['errors']
+    clock.advance(5.1)
+    uploader.flush(force=False)
+    clock.advance(9.9)
+    uploader.flush(force=False)
+    second_early = len(site.posted)
+    clock.advance(10.1)
+    uploader.flush(force=False)
+
+    # Assert
+    assert early == 1
+    assert uploader.stats['errors'] == 2
+    assert second_early == 0
+    assert site.posted == [[measurement(0)]]
+    assert uploader.queue_depth == 0
+
+
+@responses.activate
+def test_unexpected_status_retried():
+    """Test posts with an unexpected status stay buffered."""
+    # Arrange
+    resource_id = '1234-1234'
+    expected_url = f'{BASE_URL}/rooftop_sites/{resource_id}/measurements'
+    responses.add(responses.POST, expected_url, status=503)
+    uploader = MeasurementUploader()
+    uploader.add(RooftopSite('12345', resource_id), measurement(0))
+
+    # Act
+    uploader.flush()
+
+    # Assert
+    assert uploader.queue_depth == 1
+    assert uploader.stats['errors'] == 1
+    assert uploader.stats['dropped'] == 0
+
+
+@responses.activate
+def test_retry_after():
+    """Test a rate limited site is retried after the Retry-After of the response."""
+    # Arrange
+    clock = FakeClock()
+    resource_id = '1234-1234'
+    expected_url = f'{BASE_URL}/rooftop_sites/{resource_id}/measurements'
+    responses.add(responses.POST, expected_url, status=429, headers={'Retry-After': '30'})
+    responses.add(responses.POST, expected_url, json={}, status=200)
+    uploader = MeasurementUploader(flush_size=1, clock=clock)
+    uploader.add(RooftopSite('12345', resource_id), measurement(0))
+    uploader.flush(force=False)
+
+    # Act
+    clock.advance(29)
+    uploader.flush(force=False)
+    waiting = len(responses.calls)
+    clock.advance(1)
+    uploader.flush(force=False)
+
+    # Assert
+    assert waiting == 1
+    assert len(responses.calls) == 2
+    assert uploader.queue_depth == 0
@@ -301,6 +301,53 @@ def test_get_radiation_forecasts_200():
     assert len(forecasts['forecasts']) == 2
 
 
+@responses.activate
+def test_get_radiation_forecasts_parsed_200():
+    """Test get_radiation_forecasts_parsed with 200 status code."""
+    # Arrange
+    api_key = '12345'
+    resource_id = '1234-1234'
+    endpoint = 'weather/forecasts'
+    period = 'PT30M'
+    hours = '170'
+    expected_url = f'{BASE_URL}/{UTILTY_URI}/{resource_id}/{endpoint}'
+
+    forecast_response = {
+        "forecasts": [
+            {
+                "pv_estimate": "9.5",
+                "pv_estimate10": "6",
+                "pv_estimate90": "13.8",
+                "period_end": "2018-01-01T01:00:00.00000Z",
+                "period": "PT30M"
+            },
+            {
+                "pv_estimate": "10",
+                "pv_estimate10": "8",
+                "pv_estimate90": "12",
+                "period_end": "2018-01-01T12:30:00.00000Z",
+                "period": "PT30M"
+            }
+        ]
+    }
+
+    responses.add(
+        responses.GET,
+        expected_url,
+        json=forecast_response,
+        status=200,
+        content_type='applicaiton/json'
+    )
+
+    # Act
+    site = UtilitySite(api_key, resource_id, numeric=True)
+    forecasts = site.get_radiation_forecasts_parsed(period, hours)
+
+    # Assert
+    assert forecasts['forecasts'][0]['pv_estimate90'] == 13.8
+    assert forecasts['forecasts'][1]['period_end'].hour == 12
+
+
 @responses.activate
 def test_get_radiation_forecasts_400():
     """Test get_radiation_forecasts with 400 status code."""
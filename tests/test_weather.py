@@ -260,3 +260,41 @@ def test_get_estimated_actuals_429():
         site.get_estimated_actuals()
 
     # Assert
+
+
+@responses.activate
+def test_get_estimated_actuals_parsed_200():
+    """Test get_estimated_actuals_parsed with 200 status code."""
+    # Arrange
+    api_key = '12345'
+    resource_id = '1234-1234'
+    endpoint = 'estimated_actuals'
+    expected_url = f'{BASE_URL}/{WEATHER_URI}/{resource_id}/{endpoint}'
+
+    estimated_actual_response = {
+        "estimated_actuals": [
+            {
+                "ghi": "10",
+                "air_temp": "20",
+                "azimuth": "45.1234",
+                "period_end": "2018-01-01T01:00:00.00000Z",
+                "period": "PT30M"
+            }
+        ]
+    }
+
+    responses.add(
+        responses.GET,
+        expected_url,
+        json=estimated_actual_response,
+        status=200,
+        content_type='applicaiton/json'
+    )
+
+    # Act
+    site = WeatherSite(api_key, resource_id)
+    estimated_actuals = site.get_estimated_actuals_parsed()
+
+    # Assert
+    assert estimated_actuals['estimated_actuals'][0]['azimuth'] == '45.1234'
+    assert estimated_actuals['estimated_actuals'][0]['period_end'].hour == 1
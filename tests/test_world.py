@@ -185,6 +185,56 @@ def test_get_estimated_actuals_200():
     assert len(estimated_actuals['estimated_actuals']) == 2
 
 
+@responses.activate
+def test_get_estimated_actuals_parsed_200():
+    """Test get_estimated_actuals_parsed with 200 status code."""
+    # Arrange
+    api_key = '12345'
+    endpoint = 'estimated_actuals'
+    latitude = '-35.123'
+    longitude = '149.123'
+    expected_url = f'{BASE_URL}{WORLD_URI}{endpoint}'
+
+    estimated_actual_response = {
+        "estimated_actuals": [
+            {
+                "ghi": 640,
+                "ebh": 516,
+                "dni": 803,
+                "dhi": 124,
+                "cloud_opacity": 0,
+                "period_end": "2017-01-29T23:00:00.0000000Z",
+                "period": "PT30M"
+            },
+            {
+                "ghi": 543,
+                "ebh": 430,
+                "dni": 769,
+                "dhi": 113,
+                "cloud_opacity": 0,
+                "period_end": "2017-01-29T22:30:00.0000000Z",
+                "period": "PT30M"
+            }
+        ]
+    }
+
+    responses.add(
+        responses.GET,
+        expected_url,
+        json=estimated_actual_response,
+        status=200,
+        content_type='applicaiton/json'
+    )
+
+    # Act
+    site = World(api_key)
+    estimated_actuals = site.get_estimated_actuals_parsed(latitude, longitude)
+
+    # Assert
+    assert estimated_actuals['estimated_actuals'][0]['ghi'] == 640.0
+    assert estimated_actuals['estimated_actuals'][1]['period'].seconds == 1800
+
+
 @responses.activate
 def test_get_estimated_actuals_400():
     """Test get_estimated_actuals with 400 status code."""